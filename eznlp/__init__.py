@@ -1,8 +1,4 @@
 # -*- coding: utf-8 -*-
-import torch
-import flair
-flair.device = torch.device('cpu')
-
 __version__ = '0.2.3'
 
 from .training import auto_device
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+from typing import List, Iterable
+import numpy
+
+
+CHUNK_DTYPE = numpy.dtype([('type', numpy.int32), ('start', numpy.int32), ('end', numpy.int32)])
+ATTRIBUTE_DTYPE = numpy.dtype([('type', numpy.int32),
+                               ('ck_type', numpy.int32), ('ck_start', numpy.int32), ('ck_end', numpy.int32)])
+RELATION_DTYPE = numpy.dtype([('type', numpy.int32),
+                              ('head_type', numpy.int32), ('head_start', numpy.int32), ('head_end', numpy.int32),
+                              ('tail_type', numpy.int32), ('tail_start', numpy.int32), ('tail_end', numpy.int32)])
+
+
+class LabelTable(object):
+    """A bidirectional mapping between labels and integer codes, shared by many annotation arrays.
+    
+    New labels are appended on encoding, so the existing codes never change.
+    """
+    def __init__(self, labels: Iterable[str]=None):
+        self.id2label = []
+        self.label2id = {}
+        for label in (labels or []):
+            self.add(label)
+        
+    def add(self, label: str):
+        if label not in self.label2id:
+            self.label2id[label] = len(self.id2label)
+            self.id2label.append(label)
+        return self.label2id[label]
+        
+    def __len__(self):
+        return len(self.id2label)
+        
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.id2label})"
+        
+    def map_to(self, label2idx: dict, default: int=-1):
+        """Return an array mapping the codes in this table to `label2idx` (e.g., of a decoder).
+        """
+        return numpy.array([label2idx.get(label, default) for label in self.id2label], dtype=numpy.int64)
+
+
+
+class AnnotationArray(object):
+    """A compact, immutable representation of a list of annotation tuples, as a numpy structured array
+    with the labels coded by shared `LabelTable`s.
+    
+    `AnnotationArray` behaves like a read-only list of the original tuples: iterating, indexing, `len`,
+    `in`, `==` and `+` (which returns a list) are all supported. Hence, the code consuming lists of tuples
+    works unchanged, while the vectorized code (e.g., metrics, target building) may access `records` directly.
+    
+    Parameters
+    ----------
+    records: numpy.ndarray
+        A 1D structured array of `dtype`.
+    labels: LabelTable
+        The table of the annotation types.
+    ck_labels: LabelTable
+        The table of the chunk types; identical to `labels` for chunks.
+    """
+    dtype = None
+        
+    def __init__(self, records: numpy.ndarray, labels: LabelTable, ck_labels: LabelTable=None):
+        assert records.dtype == self.dtype and records.ndim == 1
+        self.records = records
+        self.labels = labels
+        self.ck_labels = labels if ck_labels is None else ck_labels
+        
+    def _to_tuple(self, rec: tuple):
+        raise NotImplementedError("Not Implemented `_to_tuple`")
+        
+    def _from_tuple(self, tp: tuple, add: bool=True):
+        raise NotImplementedError("Not Implemented `_from_tuple`")
+        
+    @classmethod
+    def from_tuples(cls, tuples: List[tuple], labels: LabelTable, ck_labels: LabelTable=None):
+        compact = cls(numpy.empty(0, dtype=cls.dtype), labels, ck_labels)
+        compact.records = numpy.array([compact._from_tuple(tp) for tp in tuples], dtype=cls.dtype)
+        return compact
+        
+    def tolist(self):
+        return [self._to_tuple(rec) for rec in self.records.tolist()]
+        
+        
+    def __len__(self):
+        return len(self.records)
+        
+    def __iter__(self):
+        return iter(self.tolist())
+        
+    def __getitem__(self, i):
+        if isinstance(i, (int, numpy.integer)):
+            return self._to_tuple(self.records[i].tolist())
+        else:
+            return self.__class__(self.records[i], self.labels, self.ck_labels)
+        
+    def __contains__(self, tp: tuple):
+        try:
+            rec = self._from_tuple(tp, add=False)
+        except (KeyError, TypeError, ValueError):
+            return False
+        return bool((self.records == numpy.array(rec, dtype=self.dtype)).any())
+        
+    def __eq__(self, other):
+        if isinstance(other, (AnnotationArray, list, tuple)):
+            return self.tolist() == list(other)
+        return NotImplemented
+    
+    __hash__ = None
+        
+    def __add__(self, other):
+        return self.tolist() + list(other)
+        
+    def __radd__(self, other):
+        return list(other) + self.tolist()
+        
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.tolist()})"
+        
+        
+    def _code(self, table: LabelTable, label: str, add: bool):
+        return table.add(label) if add else table.label2id[label]
+        
+    def map_labels(self, label2idx: dict):
+        """Return the annotation types mapped to `label2idx` (e.g., of a decoder), as an int64 array.
+        """
+        type_ids = self.labels.map_to(label2idx)[self.records['type']]
+        if (type_ids < 0).any():
+            raise KeyError(f"Labels missing in `label2idx`: {set(self.labels.id2label[t] for t in self.records['type'][type_ids < 0])}")
+        return type_ids
+
+
+
+class ChunkArray(AnnotationArray):
+    """A compact array of chunks in format of (chunk_type, chunk_start, chunk_end).
+    """
+    dtype = CHUNK_DTYPE
+        
+    def _to_tuple(self, rec: tuple):
+        return (self.labels.id2label[rec[0]], rec[1], rec[2])
+        
+    def _from_tuple(self, tp: tuple, add: bool=True):
+        label, start, end = tp
+        return (self._code(self.labels, label, add), start, end)
+        
+    @property
+    def starts(self):
+        return self.records['start']
+        
+    @property
+    def ends(self):
+        return self.records['end']
+
+
+
+class AttributeArray(AnnotationArray):
+    """A compact array of attributes in format of (attr_type, (chunk_type, chunk_start, chunk_end)).
+    """
+    dtype = ATTRIBUTE_DTYPE
+        
+    def _to_tuple(self, rec: tuple):
+        return (self.labels.id2label[rec[0]], (self.ck_labels.id2label[rec[1]], rec[2], rec[3]))
+        
+    def _from_tuple(self, tp: tuple, add: bool=True):
+        label, (ck_label, ck_start, ck_end) = tp
+        return (self._code(self.labels, label, add), self._code(self.ck_labels, ck_label, add), ck_start, ck_end)
+
+
+
+class RelationArray(AnnotationArray):
+    """A compact array of relations in format of (rel_type, (head_type, head_start, head_end), (tail_type, tail_start, tail_end)).
+    """
+    dtype = RELATION_DTYPE
+        
+    def _to_tuple(self, rec: tuple):
+        return (self.labels.id2label[rec[0]],
+                (self.ck_labels.id2label[rec[1]], rec[2], rec[3]),
+                (self.ck_labels.id2label[rec[4]], rec[5], rec[6]))
+        
+    def _from_tuple(self, tp: tuple, add: bool=True):
+        label, (h_label, h_start, h_end), (t_label, t_start, t_end) = tp
+        return (self._code(self.labels, label, add),
+                self._code(self.ck_labels, h_label, add), h_start, h_end,
+                self._code(self.ck_labels, t_label, add), t_start, t_end)
+
+
+
+class AnnotationCoder(object):
+    """Convert the annotations of data entries between lists of tuples and compact `AnnotationArray`s.
+    
+    All arrays encoded by one coder share the same `LabelTable`s, so the labels are stored only once.
+    
+    Examples
+    --------
+    >>> coder = AnnotationCoder()
+    >>> entry = coder.encode({'tokens': tokens, 'chunks': [('PER', 3, 5)]})
+    >>> entry['chunks']
+    ChunkArray([('PER', 3, 5)])
+    """
+    _key2cls = {'chunks': ChunkArray, 'attributes': AttributeArray, 'relations': RelationArray}
+        
+    def __init__(self, ck_labels: LabelTable=None, attr_labels: LabelTable=None, rel_labels: LabelTable=None):
+        self.ck_labels = LabelTable() if ck_labels is None else ck_labels
+        self.attr_labels = LabelTable() if attr_labels is None else attr_labels
+        self.rel_labels = LabelTable() if rel_labels is None else rel_labels
+        self._key2labels = {'chunks': self.ck_labels, 'attributes': self.attr_labels, 'relations': self.rel_labels}
+        
+        
+    def encode_annotations(self, key: str, tuples: List[tuple]):
+        if isinstance(tuples, AnnotationArray) and tuples.ck_labels is self.ck_labels and tuples.labels is self._key2labels[key]:
+            return tuples
+        return self._key2cls[key].from_tuples(tuples, self._key2labels[key], self.ck_labels)
+        
+    def encode(self, entry: dict):
+        """Return a shallow copy of `entry`, with `chunks`, `attributes` and `relations` encoded.
+        """
+        return {k: self.encode_annotations(k, v) if k in self._key2cls else v for k, v in entry.items()}
+        
+    @staticmethod
+    def decode(entry: dict):
+        """Return a shallow copy of `entry`, with the `AnnotationArray`s decoded to lists of tuples.
+        """
+        return {k: v.tolist() if isinstance(v, AnnotationArray) else v for k, v in entry.items()}
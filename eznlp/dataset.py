@@ -1,16 +1,105 @@
 # -*- coding: utf-8 -*-
 from typing import List, Any
+import os
+import copy
 import random
+import pickle
+import hashlib
+import logging
+import json
+import numpy
 import torch
 
 from .nn.functional import seq_lens2mask
-from .wrapper import Batch
+from .wrapper import Batch, TargetWrapper
+from .config import Config
+from .vocab import Vocab, FrozenVocab
+from .token import TokenSequence
 from .model.model import ModelConfigBase
 from .plm import PreTrainingConfig
 
+logger = logging.getLogger(__name__)
+
+
+def _md5(data: bytes):
+    return hashlib.md5(data).hexdigest()
+
+
+def _fingerprint(x):
+    """A deterministic (across processes) and hashable representation of configurations or data. 
+    
+    The representation covers the full content that may affect the examples, e.g., all token fields (including `raw_text` 
+    and additional tags), the vocabulary and settings of tokenizers. Pretrained models excluded by `__getstate__` of configs 
+    are ignored. An object without a well-defined content raises `TypeError`, so that a stale disk cache is never served. 
+    """
+    if isinstance(x, (str, int, float, bool, type(None))):
+        return x
+    elif isinstance(x, numpy.generic):
+        return x.item()
+    elif isinstance(x, Config):
+        state = x.__getstate__() if hasattr(x, '__getstate__') else x.__dict__
+        return (x.__class__.__name__, _fingerprint(state if state is not None else {}))
+    elif isinstance(x, Vocab):
+        return ('Vocab', tuple(x.itos))
+    elif isinstance(x, FrozenVocab):
+        return ('FrozenVocab', x.hashed, _md5(x._keys.tobytes() + x._ids.tobytes()))
+    elif isinstance(x, TokenSequence):
+        if hasattr(x, 'columns'):
+            field_names = list(x.columns.keys())
+        else:
+            field_names = x.token_list[0]._field_names if len(x) > 0 else []
+        return ('TokenSequence', x.token_sep, x.pad_token, x.none_token, 
+                tuple((name, _fingerprint(getattr(x, name))) for name in field_names))
+    elif isinstance(x, numpy.ndarray):
+        return ('ndarray', x.dtype.str, x.shape, _md5(numpy.ascontiguousarray(x).tobytes()))
+    elif isinstance(x, torch.Tensor):
+        x = x.detach().cpu()
+        values = x.float() if x.dtype == torch.bfloat16 else x
+        return ('Tensor', str(x.dtype), tuple(x.size()), _md5(values.contiguous().numpy().tobytes()))
+    elif isinstance(x, (torch.dtype, torch.device)):
+        return str(x)
+    elif isinstance(x, torch.nn.Module):
+        return (x.__class__.__name__, _fingerprint(x.state_dict()))
+    elif isinstance(x, (list, tuple)):
+        return tuple(_fingerprint(xi) for xi in x)
+    elif isinstance(x, (set, frozenset)):
+        # The iteration order of a set varies across processes
+        return ('set', tuple(sorted((_fingerprint(xi) for xi in x), key=repr)))
+    elif isinstance(x, dict):
+        return tuple((k, _fingerprint(v)) for k, v in x.items())
+    elif hasattr(x, 'get_vocab') and hasattr(x, 'init_kwargs'):
+        # transformers.PreTrainedTokenizer(Fast)
+        settings = json.dumps(x.init_kwargs, sort_keys=True, default=str)
+        if hasattr(x, 'backend_tokenizer'):
+            content = x.backend_tokenizer.to_str()
+        else:
+            content = json.dumps(sorted(x.get_vocab().items()))
+        return (x.__class__.__name__, getattr(x, 'name_or_path', None), x.model_max_length, x.padding_side, x.truncation_side, 
+                _md5(settings.encode('utf-8')), _md5(content.encode('utf-8')))
+    elif callable(x) and '<' not in getattr(x, '__qualname__', '<'):
+        # Module-level functions and classes (but not lambdas or local functions)
+        return ('callable', getattr(x, '__module__', None), x.__qualname__)
+    elif hasattr(x, '__dict__') and x.__class__.__module__.split('.')[0] == 'eznlp':
+        return (x.__class__.__name__, _fingerprint(x.__dict__))
+    else:
+        raise TypeError(f"Unable to fingerprint {x!r} of type {type(x)}, hence unable to use the disk cache")
+
+
+def _copy_example(example: Any):
+    """Copy a cached example, so that the in-place operations on `TargetWrapper` 
+    (e.g., `to`, `inject_chunks` and `build`) never reach the cache. 
+    """
+    if isinstance(example, TargetWrapper):
+        return copy.copy(example)
+    elif isinstance(example, dict):
+        return {k: _copy_example(v) for k, v in example.items()}
+    else:
+        return example
+
+
 
 class Dataset(torch.utils.data.Dataset):
-    def __init__(self, data: List[dict], config: ModelConfigBase, training: bool=True):
+    def __init__(self, data: List[dict], config: ModelConfigBase, training: bool=True, cache_mode: str='none', cache_dir: str='cache'):
         """
         Parameters
         ----------
@@ -21,11 +110,31 @@ class Dataset(torch.utils.data.Dataset):
                   (2) each `chunk` follows the format of (chunk_type, chunk_start, chunk_end). 
                   (3) each `relation` follows the format of (relation_type, head_chunk, tail_chunk), 
                       i.e., (relation_type, (head_type, head_start, head_end), (tail_type, tail_start, tail_end)). 
+        cache_mode : str
+            'none': `config.exemplify` is invoked on every access. 
+            'memory': The static part of examples (`config.exemplify_static`) is lazily computed once and cached in memory. 
+            'disk': All static examples are computed at the first access and persisted to `cache_dir`, keyed by the hash of `config` and `data`. 
+            In either case, the stochastic part (`config.exemplify_stochastic`, e.g., negative sampling) is re-computed on every access, 
+            re-using the deterministic targets in the static part (e.g., candidate spans and label matrices). 
+        
+        Notes
+        -----
+        The dataset is safe to be loaded by `torch.utils.data.DataLoader` with `num_workers` > 0, where `exemplify` and `collate` 
+        run in the workers. The configs are pickled to workers without the pretrained models and vectors (see `__getstate__` 
+        of the configs), and the collated `Batch` supports `pin_memory`. 
+        With `persistent_workers=True`, the in-memory cache of each worker survives across epochs. 
         """
         super().__init__()
         self.data = data
         self.config = config
         self.training = training
+        # Checked once, as accessing an entry may be costly (e.g., decoded from disk by `MemmapData`)
+        self.has_tokens = len(data) > 0 and 'tokens' in data[0]
+        
+        assert cache_mode.lower() in ('none', 'memory', 'disk')
+        self.cache_mode = cache_mode.lower()
+        self.cache_dir = cache_dir
+        self.clear_cache()
         
     def __len__(self):
         return len(self.data)
@@ -68,25 +177,96 @@ class Dataset(torch.utils.data.Dataset):
         return "\n".join(summary)
         
         
-    def build_vocabs_and_dims(self, *others):
-        self.config.build_vocabs_and_dims(self.data, *others)
+    @property
+    def seq_lens(self):
+        """The sequence lengths used for length-bucketed batching and sorted inference. 
+        """
+        return [len(self._get_entry(i)['tokens']) for i in range(len(self))]
         
-    def _get_entry(self, i):
-        return self.data[i]
         
-    def __getitem__(self, i):
+    @property
+    def costs(self):
+        """The estimated computational costs used for token-budget batching. 
+        """
+        return [self.config.estimate_cost(self._get_entry(i)) for i in range(len(self))]
+        
+        
+    def build_vocabs_and_dims(self, *others, num_workers: int=0):
+        self.config.build_vocabs_and_dims(self.data, *others, num_workers=num_workers)
+        # The cached examples are outdated with the updated vocabularies
+        self.clear_cache()
+        
+    def clear_cache(self):
+        """Clear the in-memory cache. This method should be invoked if `config` is modified after any access. 
+        """
+        self._cache = None
+        
+    @property
+    def cache_path(self):
+        md5 = hashlib.md5()
+        md5.update(repr(_fingerprint(self.config)).encode('utf-8'))
+        md5.update(repr(_fingerprint(self.training)).encode('utf-8'))
+        for i in range(len(self)):
+            md5.update(repr(_fingerprint(self._get_entry(i))).encode('utf-8'))
+        return f"{self.cache_dir}/{self.__class__.__name__}-{md5.hexdigest()}.pkl"
+        
+        
+    def _exemplify_static(self, i):
         entry = self._get_entry(i)
         example = {}
-        if 'tokens' in self.data[0]:
+        if self.has_tokens:
             example['tokenized_text'] = entry['tokens'].text
         
-        example.update(self.config.exemplify(entry, training=self.training))
+        example.update(self.config.exemplify_static(entry, training=self.training))
+        return example
+        
+        
+    def build_cache(self):
+        """Compute the static part of all examples, or load it from `cache_dir` if `cache_mode` is 'disk'. 
+        """
+        if self.cache_mode == 'disk':
+            cache_path = self.cache_path
+            if os.path.exists(cache_path):
+                with open(cache_path, 'rb') as f:
+                    self._cache = pickle.load(f)
+                logger.info(f"Static examples loaded from {cache_path}")
+                return
+        
+        self._cache = [self._exemplify_static(i) for i in range(len(self))]
+        
+        if self.cache_mode == 'disk':
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file and then rename it, in case of concurrent workers
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(self._cache, f)
+            os.replace(tmp_path, cache_path)
+            logger.info(f"Static examples saved to {cache_path}")
+        
+        
+    def _get_entry(self, i):
+        return self.data[i]
+        
+    def __getitem__(self, i):
+        if self.cache_mode == 'none':
+            example = self._exemplify_static(i)
+        else:
+            if self._cache is None:
+                if self.cache_mode == 'disk':
+                    self.build_cache()
+                else:
+                    self._cache = [None] * len(self)
+            if self._cache[i] is None:
+                self._cache[i] = self._exemplify_static(i)
+            example = _copy_example(self._cache[i])
+        
+        example.update(self.config.exemplify_stochastic(self._get_entry(i), example, training=self.training))
         return example
         
         
     def collate(self, batch_examples: List[dict]):
         batch = {}
-        if 'tokens' in self.data[0]:
+        if self.has_tokens:
             batch['tokenized_text'] = [ex['tokenized_text'] for ex in batch_examples]
             batch['seq_lens'] = torch.tensor([len(tokenized_text) for tokenized_text in batch['tokenized_text']])
             batch['mask'] = seq_lens2mask(batch['seq_lens'])
@@ -98,8 +278,8 @@ class Dataset(torch.utils.data.Dataset):
 
 
 class GenerationDataset(Dataset):
-    def __init__(self, data: List[dict], config: ModelConfigBase=None, training: bool=True):
-        super().__init__(data, config=config, training=training)
+    def __init__(self, data: List[dict], config: ModelConfigBase=None, training: bool=True, cache_mode: str='none', cache_dir: str='cache'):
+        super().__init__(data, config=config, training=training, cache_mode=cache_mode, cache_dir=cache_dir)
         if training:
             self._indexing = [(src_idx, trg_idx) for src_idx, entry in enumerate(self.data) 
                                 for trg_idx, tokens in enumerate(entry['full_trg_tokens'])]
@@ -121,6 +301,15 @@ class GenerationDataset(Dataset):
         else:
             return len(self.data)
         
+    @property
+    def seq_lens(self):
+        if self.has_tokens:
+            return super().seq_lens
+        elif self.training:
+            return [len(self.data[src_idx]['full_trg_tokens'][trg_idx]) for src_idx, trg_idx in self._indexing]
+        else:
+            return [max(len(tokens) for tokens in entry['full_trg_tokens']) for entry in self.data]
+        
     def _get_entry(self, i):
         if self.training:
             src_idx, trg_idx = self._indexing[i]
@@ -135,14 +324,21 @@ class GenerationDataset(Dataset):
 
 class PreTrainingDataset(torch.utils.data.Dataset):
     """Dataset for Pre-training. 
+    
+    Parameters
+    ----------
+    mp_rank, mp_world_size: int
+        If `mp_world_size` > 0, `data` is assumed to be the full data, and only the `mp_rank`-th shard is kept. 
+        To save the memory and preprocessing time, it is preferable to read the shard only (e.g., by `RawTextIO.read` with 
+        `rank` and `world_size`), and leave `mp_world_size` as 0. In either case, use `ShardedRandomSampler` instead of 
+        `torch.utils.data.distributed.DistributedSampler`, which would shard the data again. 
     """
     def __init__(self, data: List[Any], config: PreTrainingConfig, training: bool=True, mp_rank=0, mp_world_size=0):
         super().__init__()
-        # if mp_world_size > 0:
-        #     assert 0 <= mp_rank < mp_world_size
-            
-        #     text_paths = text_paths[_slice_chunk(mp_rank, mp_world_size, len(text_paths))]
-        # logger.info(f"Totally {len(text_paths)} text files in the {mp_rank}-th process")
+        if mp_world_size > 0:
+            assert 0 <= mp_rank < mp_world_size
+            data = data[mp_rank::mp_world_size]
+            logger.info(f"Totally {len(data):,} sequences in the {mp_rank}-th process")
         
         self.data = data
         self.config = config
@@ -175,3 +371,100 @@ class PreTrainingDataset(torch.utils.data.Dataset):
     def collate(self, batch_examples: List[str]):
         batch = self.config.batchify(batch_examples)
         return Batch(**batch)
+
+
+
+class StreamingDataset(torch.utils.data.IterableDataset):
+    """Dataset streaming entries from files, for corpora larger than the memory. 
+    
+    Parameters
+    ----------
+    file_paths: List[str]
+        The files to be lazily read by `io.iter_read`. 
+    io: IO
+        The IO interface, e.g., `RawTextIO`, `ConllIO` or `JsonIO`. 
+    config: ModelConfigBase or PreTrainingConfig
+        The config should have been built (e.g., on a sampled subset of the corpus) in advance. 
+    shuffle_buffer_size: int
+        The entries are shuffled within a buffer of this size. 0 or 1 disables shuffling. 
+    
+    Notes
+    -----
+    (1) If used with `num_workers` > 0 in `torch.utils.data.DataLoader`, the entries are sharded across workers by `io.iter_read` with `rank` and `world_size`, so that each worker only parses its own shard. 
+    (2) The length is unknown, hence `disp_every_steps` should be specified in `Trainer.train_steps`. 
+    """
+    def __init__(self, file_paths: List[str], io, config, training: bool=True, shuffle_buffer_size: int=10000):
+        super().__init__()
+        self.file_paths = [file_paths] if isinstance(file_paths, str) else list(file_paths)
+        self.io = io
+        self.config = config
+        self.training = training
+        self.shuffle_buffer_size = shuffle_buffer_size
+        
+        
+    def _iter_entries(self):
+        worker_info = torch.utils.data.get_worker_info()
+        worker_id, num_workers = (0, 1) if worker_info is None else (worker_info.id, worker_info.num_workers)
+        
+        # Each worker only parses its own shard of every file
+        for file_path in self.file_paths:
+            yield from self.io.iter_read(file_path, rank=worker_id, world_size=num_workers)
+        
+        
+    def _iter_shuffled_entries(self):
+        """Shuffle the entries with a bounded buffer, where each incoming entry replaces a randomly chosen buffered one. 
+        """
+        buffer = []
+        for entry in self._iter_entries():
+            if len(buffer) < self.shuffle_buffer_size:
+                buffer.append(entry)
+            else:
+                k = random.randrange(len(buffer))
+                yield buffer[k]
+                buffer[k] = entry
+        
+        random.shuffle(buffer)
+        yield from buffer
+        
+        
+    def _exemplify(self, entry: dict, paired_entry: dict=None):
+        if isinstance(self.config, PreTrainingConfig):
+            return self.config.exemplify(entry, paired_entry=paired_entry, training=self.training)
+        
+        example = {}
+        if 'tokens' in entry:
+            example['tokenized_text'] = entry['tokens'].text
+        
+        example.update(self.config.exemplify(entry, training=self.training))
+        return example
+        
+        
+    def __iter__(self):
+        if self.training and self.shuffle_buffer_size > 1:
+            entries = self._iter_shuffled_entries()
+        else:
+            entries = self._iter_entries()
+        
+        if getattr(self.config, 'paired_task', 'None').lower() == 'nsp':
+            # The random paired entry is drawn from the preceding entry, which is (approximately) random if shuffled
+            prev_entry = None
+            for entry in entries:
+                yield self._exemplify(entry, paired_entry=entry if prev_entry is None else prev_entry)
+                prev_entry = entry
+        else:
+            for entry in entries:
+                yield self._exemplify(entry)
+        
+        
+    def collate(self, batch_examples: List[dict]):
+        if isinstance(self.config, PreTrainingConfig):
+            return Batch(**self.config.batchify(batch_examples))
+        
+        batch = {}
+        if 'tokenized_text' in batch_examples[0]:
+            batch['tokenized_text'] = [ex['tokenized_text'] for ex in batch_examples]
+            batch['seq_lens'] = torch.tensor([len(tokenized_text) for tokenized_text in batch['tokenized_text']])
+            batch['mask'] = seq_lens2mask(batch['seq_lens'])
+        
+        batch.update(self.config.batchify(batch_examples))
+        return Batch(**batch)
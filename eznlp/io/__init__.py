@@ -8,3 +8,4 @@ from .chip import ChipIO
 from .src2trg import Src2TrgIO
 from .raw_text import RawTextIO
 from .processing import PostIO
+from .memmap import MemmapIO, MemmapData
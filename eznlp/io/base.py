@@ -8,13 +8,14 @@ class IO(object):
     """An IO interface. 
     
     """
-    def __init__(self, is_tokenized: bool, tokenize_callback=None, encoding=None, verbose: bool=True, **token_kwargs):
+    def __init__(self, is_tokenized: bool, tokenize_callback=None, encoding=None, verbose: bool=True, num_workers: int=1, **token_kwargs):
         self.is_tokenized = is_tokenized
         self.tokenize_callback = tokenize_callback
         assert not self.is_tokenized or self.tokenize_callback is None
         
         self.encoding = encoding
         self.verbose = verbose
+        self.num_workers = num_workers
         self.token_kwargs = token_kwargs
         
         
@@ -25,5 +26,32 @@ class IO(object):
             return TokenSequence.from_raw_text(text, self.tokenize_callback, **kwargs, **self.token_kwargs)
         
         
+    def _build_tokens_batch(self, texts: List[Union[str, List[str]]], **kwargs):
+        """Build tokens for many texts at once, where raw texts are tokenized in batches by `num_workers` processes. 
+        """
+        if self.is_tokenized:
+            return [TokenSequence.from_tokenized_text(text, **kwargs, **self.token_kwargs) for text in texts]
+        else:
+            return TokenSequence.from_raw_texts(texts, self.tokenize_callback, num_workers=self.num_workers, **kwargs, **self.token_kwargs)
+        
+        
     def read(self, file_path):
         raise NotImplementedError("Not Implemented `read`")
+        
+    def iter_read(self, file_path, rank: int=0, world_size: int=1):
+        """Lazily yield the entries in `file_path`. 
+        
+        Parameters
+        ----------
+        rank, world_size: int
+            If `world_size` > 1, only the entries of the `rank`-th shard are yielded (e.g., in a `DataLoader` worker). 
+        
+        Notes
+        -----
+        This falls back to `read`, which loads (and parses) all entries into memory. 
+        Subclasses should override this method if the file format allows streaming, and skip the other shards before parsing. 
+        """
+        assert 0 <= rank < world_size
+        for k, entry in enumerate(self.read(file_path)):
+            if k % world_size == rank:
+                yield entry
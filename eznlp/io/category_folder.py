@@ -23,7 +23,7 @@ class CategoryFolderIO(IO):
         
         
     def read(self, folder_path):
-        data = []
+        raw_texts, labels = [], []
         for label in self.categories:
             file_paths = glob.glob(f"{folder_path}/{label}/*.txt")
             for path in tqdm.tqdm(file_paths, disable=not self.verbose, ncols=100, desc=f"Loading data in folder {label}"):
@@ -31,8 +31,9 @@ class CategoryFolderIO(IO):
                     raw_text = f.read()
                 for pattern, repl in self.mapping.items():
                     raw_text = raw_text.replace(pattern, repl)
-                    
-                tokens = self._build_tokens(raw_text)
-                data.append({'tokens': tokens, 'label': label})
+                raw_texts.append(raw_text)
+                labels.append(label)
                 
+        tokens_list = self._build_tokens_batch(raw_texts)
+        data = [{'tokens': tokens, 'label': label} for tokens, label in zip(tokens_list, labels)]
         return data
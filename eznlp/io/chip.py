@@ -27,12 +27,12 @@ class ChipIO(IO):
         with open(file_path, 'r', encoding=self.encoding) as f:
             raw_lines = [line for line in f if len(line.strip()) > 0]
 
+        raw_lines = [line.strip().split(self.sep) for line in raw_lines]
+        tokens_list = self._build_tokens_batch([text for text, *_ in raw_lines])
+        
         data = []
         errors, mismatches = [], []
-        for line in raw_lines:
-            text, *text_chunks = line.strip().split(self.sep)
-            tokens = self._build_tokens(text)
-            
+        for (text, *text_chunks), tokens in zip(raw_lines, tokens_list):
             text_chunks = [text_chunk.split() for text_chunk in text_chunks if len(text_chunk) > 0]
             text_chunks = [(chunk_type, int(start), int(end)+1) for start, end, chunk_type in text_chunks]
 
@@ -1,4 +1,9 @@
 # -*- coding: utf-8 -*-
+import collections
+import multiprocessing
+import os
+import io
+import locale
 import numpy
 
 from ..utils import ChunksTagsTranslator
@@ -53,29 +58,38 @@ class ConllIO(IO):
         super().__init__(is_tokenized=True, encoding=encoding, verbose=verbose, **token_kwargs)
         
         
-    def read(self, file_path):
-        data = []
-        with open(file_path, 'r', encoding=self.encoding) as f:
-            text, tags = [], []
-            additional = {col_id: [] for col_id in self.additional_col_id2name.keys()}
+    def _build_entry(self, text: list, tags: list, additional: dict):
+        additional_tags = {self.additional_col_id2name[col_id]: atags for col_id, atags in additional.items()}
+        tokens = self._build_tokens(text, additional_tags=additional_tags)
+        chunks = self.tags_translator.tags2chunks(tags)
+        return {'tokens': tokens, 'chunks': chunks}
             
-            _is_skipping_last = True
-            for line in f:
-                line = line.strip()
                 
-                if self._is_breaking(line):
-                    if len(text) > 0:
-                        additional_tags = {self.additional_col_id2name[col_id]: atags for col_id, atags in additional.items()}
-                        tokens = self._build_tokens(text, additional_tags=additional_tags)
-                        chunks = self.tags_translator.tags2chunks(tags)
-                        data.append({'tokens': tokens, 'chunks': chunks})
+    def _iter_parse(self, lines, rank: int=0, world_size: int=1):
+        # Only the entries of the `rank`-th shard are parsed
+        text, tags = [], []
+        additional = {col_id: [] for col_id in self.additional_col_id2name.keys()}
+        
+        entry_idx, num_tokens = 0, 0
+        _is_skipping_last = True
+        for line in lines:
+            line = line.strip()
+            
+            if self._is_breaking(line):
+                if num_tokens > 0:
+                    if entry_idx % world_size == rank:
+                        yield self._build_entry(text, tags, additional)
                         
                         text, tags = [], []
                         additional = {col_id: [] for col_id in self.additional_col_id2name.keys()}
-                    _is_skipping_last = True
-                elif self._is_skipping(line):
-                    _is_skipping_last = True
-                else:
+                    entry_idx += 1
+                    num_tokens = 0
+                _is_skipping_last = True
+            elif self._is_skipping(line):
+                _is_skipping_last = True
+            else:
+                num_tokens += 1
+                if entry_idx % world_size == rank:
                     line_seperated = line.split(self.sep)
                     text.append(line_seperated[self.text_col_id])
                     tags.append(line_seperated[self.tag_col_id])
@@ -88,15 +102,74 @@ class ConllIO(IO):
                         and _is_skipping_last):
                         tags[-1] = tags[-1].replace('I', 'B', 1)
 
-                    _is_skipping_last = False
+                _is_skipping_last = False
                         
-            if len(text) > 0:
-                additional_tags = {self.additional_col_id2name[col_id]: atags for col_id, atags in additional.items()}
-                tokens = self._build_tokens(text, additional_tags=additional_tags)
-                chunks = self.tags_translator.tags2chunks(tags)
-                data.append({'tokens': tokens, 'chunks': chunks})
+        if num_tokens > 0 and entry_idx % world_size == rank:
+            yield self._build_entry(text, tags, additional)
             
-        return data
+        
+    def _shard_boundaries(self, f, file_size: int, chunk_size: int):
+        """Split the file into shards of about `chunk_size` bytes, each ending right after a breaking line. 
+        
+        The parsing state is reset by a breaking line, hence the shards can be parsed independently. 
+        """
+        encoding = locale.getpreferredencoding(False) if self.encoding is None else self.encoding
+        boundaries = [0]
+        while boundaries[-1] < file_size:
+            f.seek(boundaries[-1] + chunk_size)
+            f.readline()
+            for line in iter(f.readline, b""):
+                if self._is_breaking(line.decode(encoding, errors='replace').strip()):
+                    break
+            boundaries.append(min(f.tell(), file_size))
+        return list(zip(boundaries[:-1], boundaries[1:]))
+        
+        
+    def _parse_shard(self, file_path, start: int, end: int):
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            shard = f.read(end - start)
+        # Decode with the same newline handling as `open` in text mode
+        with io.TextIOWrapper(io.BytesIO(shard), encoding=self.encoding) as lines:
+            return list(self._iter_parse(lines))
+        
+        
+    def iter_read(self, file_path, rank: int=0, world_size: int=1, num_workers: int=0, chunk_size: int=2**24):
+        """Lazily yield the entries in `file_path`, in the same order as `read`. 
+        
+        Parameters
+        ----------
+        rank, world_size: int
+            If `world_size` > 1, only every `world_size`-th entry starting from `rank` is parsed and yielded 
+            (e.g., in a `DataLoader` worker). 
+        num_workers: int
+            If positive, the file is split into byte-range shards of about `chunk_size` bytes (aligned to 
+            sentence or document boundaries), which are parsed by a pool of `num_workers` processes. 
+            At most `2*num_workers` shards are in flight, so that the memory usage is bounded. 
+        """
+        assert 0 <= rank < world_size
+        if num_workers <= 0:
+            with open(file_path, 'r', encoding=self.encoding) as f:
+                yield from self._iter_parse(f, rank=rank, world_size=world_size)
+            return
+        elif world_size > 1:
+            raise ValueError("Sharding by `rank` and `world_size` is not supported with `num_workers` > 0")
+        
+        with open(file_path, 'rb') as f:
+            ranges = self._shard_boundaries(f, os.path.getsize(file_path), chunk_size)
+        
+        with multiprocessing.Pool(num_workers) as pool:
+            pending = collections.deque()
+            for start, end in ranges:
+                pending.append(pool.apply_async(self._parse_shard, (file_path, start, end)))
+                if len(pending) >= 2*num_workers:
+                    yield from pending.popleft().get()
+            while len(pending) > 0:
+                yield from pending.popleft().get()
+        
+        
+    def read(self, file_path, num_workers: int=0):
+        return list(self.iter_read(file_path, num_workers=num_workers))
     
     
     def _is_sentence_seperator(self, line: str):
@@ -125,7 +198,7 @@ class ConllIO(IO):
 
 
     def flatten_to_characters(self, data: list):
-        additional_keys = [key for key in data[0]['tokens'][0].__dict__.keys() if key not in ('text', 'raw_text')]
+        additional_keys = [key for key in data[0]['tokens'][0]._field_names if key not in ('text', 'raw_text')]
         
         new_data = []
         for entry in data:
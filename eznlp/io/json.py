@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from typing import List
 import os
+import collections
+import multiprocessing
 import logging
 import json
 
@@ -18,6 +20,20 @@ def _filter_duplicated(tuples: List[tuple]):
     return filtered_tuples
 
 
+# The IO is passed to the worker processes once at initialization, instead of pickling for every batch
+_worker_io = None
+
+def _init_worker(io):
+    global _worker_io
+    _worker_io = io
+    # Daemonic worker processes are not allowed to create process pools for tokenization
+    _worker_io.num_workers = 1
+
+
+def _parse_batch_in_worker(batch: list):
+    return _worker_io._parse_batch(batch)
+
+
 # TODO: rename as InfoExIO?
 class JsonIO(IO):
     """An IO Interface of Json files. 
@@ -76,17 +92,11 @@ class JsonIO(IO):
             self.text_translator = TextChunksTranslator()
         
         
-    def read(self, file_path, return_errors: bool=False):
-        with open(file_path, 'r', encoding=self.encoding) as f:
-            if self.is_whole_piece:
-                raw_data = json.load(f)
-            else:
-                raw_data = [json.loads(line) for line in f if len(line.strip()) > 0]
-        
+    def _parse_raw_entries(self, raw_data: List[dict]):
         data = []
         errors, mismatches = [], []
-        for raw_entry in raw_data:
-            tokens = self._build_tokens(raw_entry[self.text_key])
+        tokens_list = self._build_tokens_batch([raw_entry[self.text_key] for raw_entry in raw_data])
+        for raw_entry, tokens in zip(raw_data, tokens_list):
             chunks = [(chunk[self.chunk_type_key], 
                        chunk[self.chunk_start_key],
                        chunk[self.chunk_end_key]) for chunk in raw_entry[self.chunk_key]]
@@ -123,6 +133,103 @@ class JsonIO(IO):
                 entry.update({k:v for k, v in raw_entry.items() if k not in (self.text_key, self.chunk_key, self.attribute_key, self.relation_key)})
             
             data.append(entry)
+        
+        return data, errors, mismatches
+        
+        
+    def _parse_batch(self, batch: list):
+        """Parse a batch of raw entries, or a batch of lines (of JSON-lines files). 
+        """
+        raw_data = [json.loads(line) if isinstance(line, str) else line for line in batch]
+        return self._parse_raw_entries(raw_data)
+        
+        
+    def _iter_raw_batches(self, file_path, batch_size: int=None, rank: int=0, world_size: int=1):
+        """Yield the raw entries (of the `rank`-th shard) in batches of `batch_size`; a single batch of all entries if `batch_size` is None. 
+        """
+        with open(file_path, 'r', encoding=self.encoding) as f:
+            if self.is_whole_piece:
+                # A whole-piece JSON file can only be loaded at once
+                raw_data = json.load(f)[rank::world_size]
+                batch_size = max(len(raw_data), 1) if batch_size is None else batch_size
+                for start in range(0, len(raw_data), batch_size):
+                    yield raw_data[start:start+batch_size]
+            else:
+                # Lines are decoded by `_parse_batch` (possibly in the worker processes)
+                batch = []
+                k = 0
+                for line in f:
+                    if len(line.strip()) > 0:
+                        if k % world_size == rank:
+                            batch.append(line)
+                        k += 1
+                    if batch_size is not None and len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+                if len(batch) > 0:
+                    yield batch
+        
+        
+    def _iter_parsed_batches(self, file_path, num_workers: int=0, batch_size: int=1000, rank: int=0, world_size: int=1):
+        assert 0 <= rank < world_size
+        raw_batches = self._iter_raw_batches(file_path, batch_size, rank=rank, world_size=world_size)
+        if num_workers <= 0:
+            for batch in raw_batches:
+                yield self._parse_batch(batch)
+            return
+        
+        with multiprocessing.Pool(num_workers, initializer=_init_worker, initargs=(self, )) as pool:
+            pending = collections.deque()
+            for batch in raw_batches:
+                pending.append(pool.apply_async(_parse_batch_in_worker, (batch, )))
+                if len(pending) >= 2*num_workers:
+                    yield pending.popleft().get()
+            while len(pending) > 0:
+                yield pending.popleft().get()
+        
+        
+    def iter_read(self, file_path, rank: int=0, world_size: int=1, num_workers: int=0, batch_size: int=1000):
+        """Lazily yield the entries in `file_path`, in the same order as `read`. 
+        
+        Parameters
+        ----------
+        rank, world_size: int
+            If `world_size` > 1, only every `world_size`-th entry starting from `rank` is parsed and yielded 
+            (e.g., in a `DataLoader` worker). 
+        num_workers: int
+            If positive, the entries are parsed in batches of `batch_size` by a pool of `num_workers` processes. 
+            At most `2*num_workers` batches are in flight, so that the memory usage is bounded (except that 
+            a whole-piece JSON file has to be loaded at once). 
+            Note that this is different from `self.num_workers`, which is used for batch tokenization. 
+        """
+        num_errors, num_mismatches = 0, 0
+        for data, errors, mismatches in self._iter_parsed_batches(file_path, num_workers=num_workers, batch_size=batch_size, rank=rank, world_size=world_size):
+            num_errors += len(errors)
+            num_mismatches += len(mismatches)
+            yield from data
+        
+        if num_errors > 0 or num_mismatches > 0:
+            logger.warning(f"{num_errors} errors and {num_mismatches} mismatches detected during parsing {file_path}")
+        
+        
+    def read(self, file_path, return_errors: bool=False, num_workers: int=0, batch_size: int=None):
+        """Read the data in `file_path`. 
+        
+        Parameters
+        ----------
+        num_workers, batch_size: int
+            The same as in `iter_read`. If `num_workers` is 0 and `batch_size` is None, all entries are parsed in a 
+            single batch, which is preferable for batch tokenization with `self.num_workers` > 1. 
+        """
+        if batch_size is None and num_workers > 0:
+            batch_size = 1000
+        
+        data = []
+        errors, mismatches = [], []
+        for batch_data, batch_errors, batch_mismatches in self._iter_parsed_batches(file_path, num_workers=num_workers, batch_size=batch_size):
+            data.extend(batch_data)
+            errors.extend(batch_errors)
+            mismatches.extend(batch_mismatches)
             
         if len(errors) > 0 or len(mismatches) > 0:
             logger.warning(f"{len(errors)} errors and {len(mismatches)} mismatches detected during parsing {file_path}")
@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+from typing import List, Iterable
+import os
+import json
+import logging
+import collections.abc
+import tqdm
+import numpy
+
+from ..token import TokenSequence, ColumnarTokenSequence
+from ..annotation import LabelTable, ChunkArray, AttributeArray, RelationArray
+from .base import IO
+
+logger = logging.getLogger(__name__)
+
+
+class _BytesColumnWriter(object):
+    """Write strings as concatenated UTF-8 bytes, with int64 offsets. 
+    """
+    def __init__(self, path_prefix: str):
+        self.data_file = open(f"{path_prefix}.bin", 'wb')
+        self.offsets_file = open(f"{path_prefix}.offsets.bin", 'wb')
+        self.num_bytes = 0
+        numpy.array([0], dtype=numpy.int64).tofile(self.offsets_file)
+        
+    def extend(self, values: List[str]):
+        encoded = [v.encode('utf-8') for v in values]
+        self.data_file.write(b"".join(encoded))
+        offsets = self.num_bytes + numpy.cumsum([len(b) for b in encoded], dtype=numpy.int64)
+        offsets.tofile(self.offsets_file)
+        if len(offsets) > 0:
+            self.num_bytes = int(offsets[-1])
+        
+    def close(self):
+        self.data_file.close()
+        self.offsets_file.close()
+
+
+def _memmap(path: str, dtype, shape=None):
+    # `numpy.memmap` cannot map empty files
+    if os.path.getsize(path) == 0:
+        return numpy.empty((0, ) if shape is None else (0, ) + tuple(shape[1:]), dtype=dtype)
+    memmap = numpy.memmap(path, dtype=dtype, mode='r')
+    return memmap if shape is None else memmap.reshape(shape)
+
+
+def _json_default(obj):
+    # Tag values may be numpy arrays or scalars (e.g., from `ColumnarTokenSequence`)
+    if isinstance(obj, (numpy.ndarray, numpy.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, default=_json_default)
+
+
+def _column_kind(values):
+    """Return the narrowest kind of `values` among `int`, `str` and `json`, or None if `values` is empty. 
+    """
+    if isinstance(values, numpy.ndarray) and numpy.issubdtype(values.dtype, numpy.integer):
+        return 'int'
+    elif len(values) == 0:
+        return None
+    elif all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return 'int'
+    elif all(isinstance(v, str) for v in values):
+        return 'str'
+    else:
+        return 'json'
+
+
+
+class _TokenColumnWriter(object):
+    """Write a token field as int64 values, UTF-8 strings, or JSON-encoded values, whichever fits all the values. 
+    
+    The kind is inferred from the values instead of the first entry, and widened to `json` once a value does 
+    not fit (e.g., a `None` tag in an integer field); the written values are then re-encoded chunk by chunk. 
+    """
+    def __init__(self, path_prefix: str, chunk_size: int=2**16):
+        self.path_prefix = path_prefix
+        self.chunk_size = chunk_size
+        self.kind = None
+        self.writer = None
+        self.writer_prefix = path_prefix
+        
+    def _open(self, kind: str):
+        self.kind = kind
+        if kind == 'int':
+            self.writer = open(f"{self.writer_prefix}.bin", 'wb')
+        else:
+            self.writer = _BytesColumnWriter(self.writer_prefix)
+        
+    def extend(self, values):
+        kind = _column_kind(values)
+        if kind is None:
+            return
+        elif self.kind is None:
+            self._open(kind)
+        elif kind != self.kind and self.kind != 'json':
+            self._widen()
+        
+        if self.kind == 'int':
+            numpy.asarray(values, dtype=numpy.int64).tofile(self.writer)
+        elif self.kind == 'str':
+            self.writer.extend(values)
+        else:
+            self.writer.extend([_dumps(v) for v in values])
+        
+    def _widen(self):
+        # Re-encode the written values to a temporary file, which replaces the original one on closing
+        self.writer.close()
+        old_kind = self.kind
+        self.writer_prefix = f"{self.path_prefix}.tmp"
+        self._open('json')
+        if old_kind == 'int':
+            values = _memmap(f"{self.path_prefix}.bin", numpy.int64)
+            for k in range(0, len(values), self.chunk_size):
+                self.writer.extend([_dumps(v) for v in values[k:k+self.chunk_size].tolist()])
+        else:
+            buffer = _memmap(f"{self.path_prefix}.bin", numpy.uint8)
+            offsets = _memmap(f"{self.path_prefix}.offsets.bin", numpy.int64)
+            for k in range(0, len(offsets)-1, self.chunk_size):
+                tok_offsets = offsets[k:k+self.chunk_size+1]
+                chunk = buffer[tok_offsets[0]:tok_offsets[-1]].tobytes()
+                tok_offsets = tok_offsets - tok_offsets[0]
+                self.writer.extend([_dumps(chunk[s:e].decode('utf-8')) for s, e in zip(tok_offsets[:-1], tok_offsets[1:])])
+        
+    def close(self):
+        # A field without any values (e.g., all the entries are empty) is written as `str`
+        if self.kind is None:
+            self._open('str')
+        self.writer.close()
+        if self.writer_prefix != self.path_prefix:
+            for suffix in ['.bin', '.offsets.bin']:
+                os.replace(f"{self.writer_prefix}{suffix}", f"{self.path_prefix}{suffix}")
+
+
+
+class MemmapData(collections.abc.Sequence):
+    """A read-only, randomly accessible sequence of data entries, memory-mapped from the columnar files 
+    written by `MemmapIO.write`. 
+    
+    Opening is O(1), and the underlying pages are shared across processes (e.g., `DataLoader` workers), 
+    as no Python objects are created until an entry is accessed. Each access returns a new entry dict, 
+    with `tokens` as a `ColumnarTokenSequence`, whose integer columns are views of the memory maps. 
+    
+    If `compact` is True, the chunks, attributes and relations are returned as `AnnotationArray`s, 
+    which are also views of the memory maps and share the label tables in `meta.json`. 
+    """
+    def __init__(self, dir_path: str, compact: bool=False):
+        self.dir_path = dir_path
+        self.compact = compact
+        with open(f"{dir_path}/meta.json", 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self._open()
+        
+    def _open(self):
+        num_entries = self.meta['num_entries']
+        self._offsets = {name: _memmap(self._path(f"{name}.offsets"), numpy.int64) for name in self.meta['segmented']}
+        self._tok_fields = {}
+        for field, dtype in self.meta['token_fields'].items():
+            if dtype == 'int':
+                self._tok_fields[field] = _memmap(self._path(f"tokens.{field}"), numpy.int64)
+            else:
+                self._tok_fields[field] = (_memmap(self._path(f"tokens.{field}"), numpy.uint8),
+                                           _memmap(self._path(f"tokens.{field}.offsets"), numpy.int64))
+        
+        self._arrays = {name: _memmap(self._path(name), numpy.int32, shape=(-1, width))
+                            for name, width in [('chunks', 3), ('attributes', 4), ('relations', 7)] if name in self.meta['segmented']}
+        if 'label' in self.meta['keys']:
+            self._labels = _memmap(self._path('label'), numpy.int32)
+        self._extras = {key: (_memmap(self._path(f"extra.{key}"), numpy.uint8),
+                              _memmap(self._path(f"extra.{key}.offsets"), numpy.int64)) for key in self.meta['extra_keys']}
+        assert all(len(offsets) == num_entries+1 for offsets in self._offsets.values())
+        
+        types = self.meta['types']
+        self._ck_labels = LabelTable(types['chunks'])
+        self._attr_labels = LabelTable(types['attributes'])
+        self._rel_labels = LabelTable(types['relations'])
+        
+    def _path(self, name: str):
+        return f"{self.dir_path}/{name}.bin"
+        
+    def __getstate__(self):
+        # Re-open the memory maps in the unpickled object (e.g., in `DataLoader` workers)
+        return {'dir_path': self.dir_path, 'compact': self.compact, 'meta': self.meta}
+        
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._open()
+        
+    def __len__(self):
+        return self.meta['num_entries']
+        
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.dir_path!r}, num_entries={len(self)})"
+        
+        
+    def _build_tokens(self, start: int, end: int):
+        columns = {}
+        for field, dtype in self.meta['token_fields'].items():
+            if dtype == 'int':
+                columns[field] = self._tok_fields[field][start:end]
+            else:
+                buffer, offsets = self._tok_fields[field]
+                tok_offsets = offsets[start:end+1]
+                chunk = buffer[tok_offsets[0]:tok_offsets[-1]].tobytes()
+                tok_offsets = tok_offsets - tok_offsets[0]
+                columns[field] = [chunk[s:e].decode('utf-8') for s, e in zip(tok_offsets[:-1], tok_offsets[1:])]
+                if dtype == 'json':
+                    columns[field] = [json.loads(v) for v in columns[field]]
+        return ColumnarTokenSequence(columns, **self.meta['token_kwargs'])
+        
+        
+    def _get_entry(self, i: int):
+        if not -len(self) <= i < len(self):
+            raise IndexError(f"Index {i} out of range for {len(self)} entries")
+        i = i % len(self)
+        
+        entry = {}
+        if 'tokens' in self.meta['keys']:
+            offsets = self._offsets['tokens']
+            entry['tokens'] = self._build_tokens(offsets[i], offsets[i+1])
+        
+        types = self.meta['types']
+        if self.compact:
+            for name, cls, labels in [('chunks', ChunkArray, self._ck_labels), 
+                                      ('attributes', AttributeArray, self._attr_labels), 
+                                      ('relations', RelationArray, self._rel_labels)]:
+                if name in self.meta['keys']:
+                    offsets = self._offsets[name]
+                    records = self._arrays[name][offsets[i]:offsets[i+1]].view(cls.dtype).reshape(-1)
+                    entry[name] = cls(records, labels, self._ck_labels)
+        
+        if 'chunks' in self.meta['keys'] and not self.compact:
+            offsets = self._offsets['chunks']
+            entry['chunks'] = [(types['chunks'][ck_type], start, end)
+                                   for ck_type, start, end in self._arrays['chunks'][offsets[i]:offsets[i+1]].tolist()]
+        
+        if 'attributes' in self.meta['keys'] and not self.compact:
+            offsets = self._offsets['attributes']
+            entry['attributes'] = [(types['attributes'][attr_type], (types['chunks'][ck_type], start, end))
+                                       for attr_type, ck_type, start, end in self._arrays['attributes'][offsets[i]:offsets[i+1]].tolist()]
+        
+        if 'relations' in self.meta['keys'] and not self.compact:
+            offsets = self._offsets['relations']
+            entry['relations'] = [(types['relations'][rel_type], (types['chunks'][h_type], h_start, h_end), (types['chunks'][t_type], t_start, t_end))
+                                      for rel_type, h_type, h_start, h_end, t_type, t_start, t_end in self._arrays['relations'][offsets[i]:offsets[i+1]].tolist()]
+        
+        if 'label' in self.meta['keys']:
+            entry['label'] = types['label'][self._labels[i]]
+        
+        for key, (buffer, offsets) in self._extras.items():
+            entry[key] = json.loads(buffer[offsets[i]:offsets[i+1]].tobytes().decode('utf-8'))
+        
+        return entry
+        
+        
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._get_entry(k) for k in range(*i.indices(len(self)))]
+        else:
+            return self._get_entry(i)
+
+
+
+class MemmapIO(IO):
+    """An IO interface of the memory-mapped columnar format. 
+    
+    A directory holds a `meta.json` and several binary files: 
+        * token fields: a file per field, with UTF-8 bytes and offsets for `str` fields, or int64 values for `int` fields, 
+          or JSON-encoded values for the others; 
+        * `chunks`, `attributes`, `relations`: int32 arrays with the types coded by `meta.json`; 
+        * `label`: int32 codes; 
+        * other keys: JSON-encoded values; 
+    where the variable-length columns are segmented by per-entry offsets. 
+    
+    Examples 
+    --------
+    >>> MemmapIO().convert(ConllIO(...), "data/conll2003/eng.train", "cache/conll2003-train")
+    >>> train_data = MemmapIO().read("cache/conll2003-train")
+    >>> train_set = Dataset(train_data, config)
+    """
+    def __init__(self, verbose: bool=True):
+        super().__init__(is_tokenized=True, verbose=verbose)
+        
+        
+    def read(self, dir_path: str, compact: bool=False):
+        return MemmapData(dir_path, compact=compact)
+        
+        
+    def write(self, data: Iterable[dict], dir_path: str):
+        """Write `data` to `dir_path`. `data` may be any iterable (e.g., a generator from `IO.iter_read`), 
+        which is consumed in a streaming way. 
+        """
+        os.makedirs(dir_path, exist_ok=True)
+        path = lambda name: f"{dir_path}/{name}"
+        
+        meta = None
+        files, tok_writers, extra_writers = {}, {}, {}
+        type2id = {'chunks': {}, 'attributes': {}, 'relations': {}, 'label': {}}
+        counts = collections.defaultdict(int)
+        
+        def _get_id(name, t):
+            return type2id[name].setdefault(t, len(type2id[name]))
+        
+        num_entries = 0
+        for entry in tqdm.tqdm(data, disable=not self.verbose, ncols=100, desc="Writing memmap data"):
+            if meta is None:
+                meta = self._init_meta(entry)
+                for name in meta['segmented']:
+                    files[f"{name}.offsets"] = open(path(f"{name}.offsets.bin"), 'wb')
+                    numpy.array([0], dtype=numpy.int64).tofile(files[f"{name}.offsets"])
+                for name in ['chunks', 'attributes', 'relations', 'label']:
+                    if name in meta['keys']:
+                        files[name] = open(path(f"{name}.bin"), 'wb')
+                for key in meta['extra_keys']:
+                    extra_writers[key] = _BytesColumnWriter(path(f"extra.{key}"))
+            
+            if entry.keys() != set(meta['keys']):
+                raise ValueError(f"Inconsistent keys: {list(entry.keys())} vs. {meta['keys']}")
+            
+            if 'tokens' in meta['keys'] and len(entry['tokens']) > 0:
+                tokens = entry['tokens']
+                # The token fields are taken from the first non-empty entry, as an empty one may not have any
+                fields = list(tokens.columns.keys()) if isinstance(tokens, ColumnarTokenSequence) else tokens.token_list[0]._field_names
+                if len(tok_writers) == 0:
+                    tok_writers.update({field: _TokenColumnWriter(path(f"tokens.{field}")) for field in fields})
+                elif set(fields) != tok_writers.keys():
+                    raise ValueError(f"Inconsistent token fields: {list(fields)} vs. {list(tok_writers.keys())}")
+                for field, writer in tok_writers.items():
+                    writer.extend(getattr(tokens, field))
+                counts['tokens'] += len(tokens)
+            
+            if 'chunks' in meta['keys']:
+                rows = [(_get_id('chunks', ck_type), start, end) for ck_type, start, end in entry['chunks']]
+                numpy.array(rows, dtype=numpy.int32).reshape(-1, 3).tofile(files['chunks'])
+                counts['chunks'] += len(rows)
+            
+            if 'attributes' in meta['keys']:
+                rows = [(_get_id('attributes', attr_type), _get_id('chunks', ck[0]), ck[1], ck[2]) for attr_type, ck in entry['attributes']]
+                numpy.array(rows, dtype=numpy.int32).reshape(-1, 4).tofile(files['attributes'])
+                counts['attributes'] += len(rows)
+            
+            if 'relations' in meta['keys']:
+                rows = [(_get_id('relations', rel_type), _get_id('chunks', head[0]), head[1], head[2], _get_id('chunks', tail[0]), tail[1], tail[2])
+                            for rel_type, head, tail in entry['relations']]
+                numpy.array(rows, dtype=numpy.int32).reshape(-1, 7).tofile(files['relations'])
+                counts['relations'] += len(rows)
+            
+            if 'label' in meta['keys']:
+                numpy.array([_get_id('label', entry['label'])], dtype=numpy.int32).tofile(files['label'])
+            
+            for key in meta['extra_keys']:
+                extra_writers[key].extend([_dumps(entry[key])])
+            
+            for name in meta['segmented']:
+                numpy.array([counts[name]], dtype=numpy.int64).tofile(files[f"{name}.offsets"])
+            num_entries += 1
+        
+        if meta is None:
+            raise ValueError("Empty data cannot be written")
+        
+        if 'tokens' in meta['keys'] and len(tok_writers) == 0:
+            tok_writers.update({field: _TokenColumnWriter(path(f"tokens.{field}")) for field in ['raw_text', 'text']})
+        for f in files.values():
+            f.close()
+        for writer in list(tok_writers.values()) + list(extra_writers.values()):
+            writer.close()
+        
+        meta['token_fields'] = {field: writer.kind for field, writer in tok_writers.items()}
+        meta['num_entries'] = num_entries
+        meta['types'] = {name: list(t2id.keys()) for name, t2id in type2id.items()}
+        with open(path("meta.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        
+        
+    def _init_meta(self, entry: dict):
+        meta = {'keys': list(entry.keys()), 'token_fields': {}, 'token_kwargs': {}, 'segmented': [], 'extra_keys': []}
+        
+        if 'tokens' in entry:
+            # The token fields and their kinds are inferred across all the entries by `_TokenColumnWriter`
+            tokens = entry['tokens']
+            meta['token_kwargs'] = {'token_sep': tokens.token_sep, 'pad_token': tokens.pad_token, 'none_token': tokens.none_token}
+            meta['segmented'].append('tokens')
+        
+        for name in ['chunks', 'attributes', 'relations']:
+            if name in entry:
+                meta['segmented'].append(name)
+        
+        meta['extra_keys'] = [key for key in entry.keys() if key not in ('tokens', 'chunks', 'attributes', 'relations', 'label')]
+        return meta
+        
+        
+    def convert(self, io: IO, file_path: str, dir_path: str, **kwargs):
+        """Convert the data in `file_path` read by `io` (any `eznlp.io` reader) to `dir_path`. 
+        
+        The entries are streamed by `io.iter_read` if available, so that the full data is never held in memory. 
+        """
+        self.write(io.iter_read(file_path, **kwargs), dir_path)
+        return self.read(dir_path)
@@ -2,6 +2,8 @@
 from typing import Union, List, Callable
 import tqdm
 
+from ..annotation import AnnotationCoder
+
 
 def _make_tuple_mapping(type_mapping: Union[Callable, dict]=None, aux_check: Callable=None):
     def tuple_mapping(x):
@@ -27,7 +29,8 @@ class PostIO(object):
         (1) *drop* chunks with overlong spans;
         (2) *drop* or *merge* chunks, attributes or relations of specific types; 
         (3) *absorb* specific type of attributes into chunk-type, or *exclude* it;
-        (4) *infer* relations given specific grouping relation-types.  
+        (4) *infer* relations given specific grouping relation-types;  
+        (5) *compact* annotations to integer-coded arrays, or *expand* them back. 
     
     Notes
     -----
@@ -159,3 +162,16 @@ class PostIO(object):
             new_relations = self._detect_relations(entry, group_rel_types, chunk2group)
             entry['relations'] = entry['relations'] + new_relations
         return data
+
+        
+    def compact(self, data: List[dict], coder: AnnotationCoder=None):
+        """Encode the chunks, attributes and relations to compact `AnnotationArray`s, which share the label tables of `coder`. 
+        """
+        coder = AnnotationCoder() if coder is None else coder
+        return [coder.encode(entry) for entry in tqdm.tqdm(data, disable=not self.verbose, ncols=100, desc="Annotation compacting")]
+        
+        
+    def expand(self, data: List[dict]):
+        """Decode the compact `AnnotationArray`s back to lists of tuples. 
+        """
+        return [AnnotationCoder.decode(entry) for entry in tqdm.tqdm(data, disable=not self.verbose, ncols=100, desc="Annotation expanding")]
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import List, Iterable
 import logging
 import tqdm
 import json
@@ -74,21 +74,24 @@ class RawTextIO(IO):
         return wwm_cuts
         
         
-    def _parse_raw(self, byte_lines: List[bytes]):
-        data = []
-        
+    def _iter_parse_raw(self, byte_lines: Iterable[bytes], rank: int=0, world_size: int=1):
+        # Only the documents of the `rank`-th shard are tokenized
+        doc_idx = 0
         tokenized_doc = []
-        for byte_line in tqdm.tqdm(byte_lines, disable=not self.verbose, ncols=100, desc="Loading raw text data"):
+        for byte_line in byte_lines:
             line = byte_line.decode(self.encoding)
             
             if self._is_breaking(line):
                 if len(tokenized_doc) >= self.min_len:
                     for start, end in segment_text_uniformly(tokenized_doc, max_span_size=self.max_len):
                         tokenized_text = tokenized_doc[start:end]
-                        data.append({'rejoined_text': " ".join(tokenized_text), 
-                                     'wwm_cuts': self._detect_wwm_cuts(tokenized_text)})
+                        yield {'rejoined_text': " ".join(tokenized_text), 
+                               'wwm_cuts': self._detect_wwm_cuts(tokenized_text)}
                 tokenized_doc = []
+                doc_idx += 1
                 
+            elif doc_idx % world_size != rank:
+                continue
             elif self.tokenize_callback is None:
                 tokenized_doc.extend(line.split(" "))
             else:
@@ -97,29 +100,51 @@ class RawTextIO(IO):
         if len(tokenized_doc) >= self.min_len:
             for start, end in segment_text_uniformly(tokenized_doc, max_span_size=self.max_len):
                 tokenized_text = tokenized_doc[start:end]
-                data.append({'rejoined_text': " ".join(tokenized_text), 
-                             'wwm_cuts': self._detect_wwm_cuts(tokenized_text)})
+                yield {'rejoined_text': " ".join(tokenized_text), 
+                       'wwm_cuts': self._detect_wwm_cuts(tokenized_text)}
         
-        return data
         
+    def _iter_parse_json(self, byte_lines: Iterable[bytes], rank: int=0, world_size: int=1):
+        # Only the lines of the `rank`-th shard are parsed
+        for k, byte_line in enumerate(byte_lines):
+            if k % world_size == rank:
+                # `tokenize_callback` must be None
+                yield json.loads(byte_line.decode(self.encoding))
+        
+        
+    def _iter_parse(self, byte_lines: Iterable[bytes], rank: int=0, world_size: int=1):
+        assert 0 <= rank < world_size
+        if self.tokenize_callback is None:
+            return self._iter_parse_json(byte_lines, rank=rank, world_size=world_size)
+        else:
+            return self._iter_parse_raw(byte_lines, rank=rank, world_size=world_size)
         
-    def _parse_json(self, byte_lines: List[bytes]):
-        data = []
-        for byte_line in tqdm.tqdm(byte_lines, disable=not self.verbose, ncols=100, desc="Loading raw text data"):
-            # `tokenize_callback` must be None
-            entry = json.loads(byte_line.decode(self.encoding))
-            data.append(entry)
-        return data
         
+    def read(self, file_path, rank: int=0, world_size: int=1):
+        """Read the data in `file_path`. 
         
-    def read(self, file_path):
+        Parameters
+        ----------
+        rank, world_size: int
+            If `world_size` > 1, only the `rank`-th shard is parsed and returned, i.e., every `world_size`-th document 
+            (for raw text) or line (for prepared cache) starting from `rank`. This is typically used in distributed training. 
+        """
         with open(file_path, 'rb') as f:
-            byte_lines = [line for line in f if len(line.rstrip()) > 0]
+            byte_lines = (line for line in f if len(line.rstrip()) > 0)
+            if self.tokenize_callback is None and world_size > 1:
+                # Only hold the lines of the `rank`-th shard in memory
+                byte_lines = [line for k, line in enumerate(byte_lines) if k % world_size == rank]
+                rank, world_size = 0, 1
+            else:
+                byte_lines = list(byte_lines)
         
-        if self.tokenize_callback is None:
-            return self._parse_json(byte_lines)
-        else:
-            return self._parse_raw(byte_lines)
+        byte_lines = tqdm.tqdm(byte_lines, disable=not self.verbose, ncols=100, desc="Loading raw text data")
+        return list(self._iter_parse(byte_lines, rank=rank, world_size=world_size))
+        
+        
+    def iter_read(self, file_path, rank: int=0, world_size: int=1):
+        with open(file_path, 'rb') as f:
+            yield from self._iter_parse((line for line in f if len(line.rstrip()) > 0), rank=rank, world_size=world_size)
         
         
     def setup_data_with_tokens(self, data: List[dict]):
@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 import tqdm
-import pandas
 
 from .base import IO
 
@@ -29,15 +28,17 @@ class TabularIO(IO):
         
         
     def read(self, file_path):
+        import pandas
         df = pandas.read_csv(file_path, encoding=self.encoding, sep=self.sep, header=self.header, dtype=str, na_filter=False, engine=self.engine)
         
-        data = []
+        raw_texts, labels = [], []
         for _, line in tqdm.tqdm(df.iterrows(), total=df.shape[0], disable=not self.verbose, ncols=100, desc="Loading tabular data"):
             raw_text, label = line.iloc[self.text_col_id].strip(), line.iloc[self.label_col_id].strip()
             for pattern, repl in self.mapping.items():
                 raw_text = raw_text.replace(pattern, repl)
-                
-            tokens = self._build_tokens(raw_text)
-            data.append({'tokens': tokens, 'label': label})
+            raw_texts.append(raw_text)
+            labels.append(label)
             
+        tokens_list = self._build_tokens_batch(raw_texts)
+        data = [{'tokens': tokens, 'label': label} for tokens, label in zip(tokens_list, labels)]
         return data
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 from typing import List
+import numpy
+
+from .annotation import AnnotationArray
 
 
 def _agg_scores_by_key(scores, key, agg_mode='mean'):
@@ -73,6 +76,67 @@ def _prf_scores_over_types(list_tuples_gold: List[List[tuple]], list_tuples_pred
     return scores
 
 
+def _find_compact(*list_annotations_groups):
+    for list_annotations in list_annotations_groups:
+        for annotations in list_annotations:
+            if isinstance(annotations, AnnotationArray):
+                return annotations
+    return None
+
+
+def _compact_rows(list_annotations: List[AnnotationArray], template: AnnotationArray):
+    """Stack the annotations of all samples to a 2D integer array, with the sample index as the first column. 
+    Duplicate annotations within a sample are removed (i.e., set semantics). 
+    """
+    all_records = []
+    for annotations in list_annotations:
+        if not (isinstance(annotations, AnnotationArray) and annotations.labels is template.labels and annotations.ck_labels is template.ck_labels):
+            annotations = template.__class__.from_tuples(annotations, template.labels, template.ck_labels)
+        all_records.append(annotations.records)
+    
+    sample_ids = numpy.repeat(numpy.arange(len(list_annotations)), [len(records) for records in all_records])
+    records = numpy.concatenate(all_records) if len(all_records) > 0 else numpy.empty(0, dtype=template.dtype)
+    rows = numpy.column_stack([sample_ids] + [records[name].astype(numpy.int64) for name in template.dtype.names])
+    return numpy.unique(rows.reshape(-1, len(template.dtype.names)+1), axis=0)
+
+
+def _compact_counts(list_tuples_gold: list, list_tuples_pred: list, template: AnnotationArray, col: int, minlength: int):
+    """Count the gold, predicted and true positive annotations by the values in column `col` 
+    (0 for samples, 1 for types). 
+    """
+    gold_rows = _compact_rows(list_tuples_gold, template)
+    pred_rows = _compact_rows(list_tuples_pred, template)
+    both_rows, both_counts = numpy.unique(numpy.concatenate([gold_rows, pred_rows]), axis=0, return_counts=True)
+    tp_rows = both_rows[both_counts == 2]
+    return [numpy.bincount(rows[:, col], minlength=minlength).tolist() for rows in (gold_rows, pred_rows, tp_rows)]
+
+
+def _prf_scores_from_counts(n_gold, n_pred, n_true_positive, **kwargs):
+    precision, recall, f1 = _precision_recall_f1(n_gold, n_pred, n_true_positive, **kwargs)
+    return {'n_gold': n_gold,
+            'n_pred': n_pred,
+            'n_true_positive': n_true_positive,
+            'precision': precision, 
+            'recall': recall, 
+            'f1': f1}
+
+
+def _prf_scores_over_samples_compact(list_tuples_gold: list, list_tuples_pred: list, template: AnnotationArray, **kwargs):
+    counts = _compact_counts(list_tuples_gold, list_tuples_pred, template, col=0, minlength=len(list_tuples_gold))
+    return [_prf_scores_from_counts(*sample_counts, **kwargs) for sample_counts in zip(*counts)]
+
+
+def _prf_scores_over_types_compact(list_tuples_gold: list, list_tuples_pred: list, template: AnnotationArray, **kwargs):
+    # The label table may grow when encoding the tuples, so count after encoding
+    gold_counts, pred_counts, tp_counts = _compact_counts(list_tuples_gold, list_tuples_pred, template, col=1, minlength=0)
+    num_types = max(len(gold_counts), len(pred_counts))
+    gold_counts = gold_counts + [0] * (num_types - len(gold_counts))
+    pred_counts = pred_counts + [0] * (num_types - len(pred_counts))
+    tp_counts = tp_counts + [0] * (num_types - len(tp_counts))
+    return {template.labels.id2label[t]: _prf_scores_from_counts(gold_counts[t], pred_counts[t], tp_counts[t], **kwargs)
+                for t in range(num_types) if gold_counts[t] + pred_counts[t] > 0}
+
+
 def precision_recall_f1_report(list_tuples_gold: List[List[tuple]], list_tuples_pred: List[List[tuple]], macro_over='types', **kwargs):
     """
     Parameters
@@ -88,6 +152,10 @@ def precision_recall_f1_report(list_tuples_gold: List[List[tuple]], list_tuples_
     type_pos: int
         The position indicating type in a tuple
         
+    Notes
+    -----
+    If any element of `list_tuples_{gold, pred}` is an `AnnotationArray`, the scores are computed by 
+    vectorized set operations over all samples, and the other elements are encoded accordingly. 
         
     References
     ----------
@@ -95,7 +163,16 @@ def precision_recall_f1_report(list_tuples_gold: List[List[tuple]], list_tuples_
     """
     assert len(list_tuples_gold) == len(list_tuples_pred)
     
-    if macro_over == 'types':
+    template = _find_compact(list_tuples_gold, list_tuples_pred)
+    if template is not None and kwargs.get('type_pos', 0) == 0:
+        kwargs.pop('type_pos', None)
+        if macro_over == 'types':
+            scores = _prf_scores_over_types_compact(list_tuples_gold, list_tuples_pred, template, **kwargs)
+        elif macro_over == 'samples':
+            scores = _prf_scores_over_samples_compact(list_tuples_gold, list_tuples_pred, template, **kwargs)
+        else:
+            raise ValueError(f"Invalid `macro_over` {macro_over}")
+    elif macro_over == 'types':
         scores = _prf_scores_over_types(list_tuples_gold, list_tuples_pred, **kwargs)
     elif macro_over == 'samples':
         scores = _prf_scores_over_samples(list_tuples_gold, list_tuples_pred, **kwargs)
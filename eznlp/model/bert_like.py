@@ -1,12 +1,12 @@
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import List, TYPE_CHECKING
 import logging
 import re
 import tqdm
 import numpy
-import truecase
 import torch
-import transformers
+if TYPE_CHECKING:
+    import transformers
 
 from ..utils import find_ascending
 from ..token import TokenSequence
@@ -266,6 +266,7 @@ def _truecase(tokenized_raw_text: List[str]):
     lst = [w for w, _ in word_lst if re.match(r'\b[A-Z\.\-]+\b', w)]
     
     if len(lst) > 0 and len(lst) == len(word_lst):
+        import truecase
         parts = truecase.get_true_case(' '.join(lst)).split()
         
         # the trucaser have its own tokenization ...
@@ -277,7 +278,7 @@ def _truecase(tokenized_raw_text: List[str]):
     return new_tokenized
 
 
-def _tokenized2nested(tokenized_raw_text: List[str], tokenizer: transformers.PreTrainedTokenizer, max_len: int=5):
+def _tokenized2nested(tokenized_raw_text: List[str], tokenizer: 'transformers.PreTrainedTokenizer', max_len: int=5):
     nested_sub_tokens = []
     for word in tokenized_raw_text:
         sub_tokens = tokenizer.tokenize(word)
@@ -326,7 +327,7 @@ def _truncate_tokens(tokens: TokenSequence, sub_tok_seq_lens: List[int], max_len
 
 
 def truncate_for_bert_like(data: list, 
-                           tokenizer: transformers.PreTrainedTokenizer, 
+                           tokenizer: 'transformers.PreTrainedTokenizer', 
                            mode: str='head+tail', 
                            verbose=True):
     """Truncate overlong tokens in `data`, typically for text classification. 
@@ -379,7 +380,7 @@ def truncate_for_bert_like(data: list,
 
 
 
-def segment_uniformly_for_bert_like(data: list, tokenizer: transformers.PreTrainedTokenizer, update_raw_idx: bool=False, verbose=True):
+def segment_uniformly_for_bert_like(data: list, tokenizer: 'transformers.PreTrainedTokenizer', update_raw_idx: bool=False, verbose=True):
     """Segment overlong tokens in `data`. 
     
     Notes: Currently only supports entity recognition. 
@@ -4,14 +4,71 @@ import torch
 
 from ...wrapper import Batch
 from ...config import Config
+from ...statistics import StatsMixin
 from ...nn.modules import SmoothLabelCrossEntropyLoss, FocalLoss
 
 
+def pad_targets(tensors: List[torch.Tensor], num_dims: int=1, padding_value=0):
+    """Pad target tensors of shapes (n_1, ...), (n_2, ...), ... to a batched tensor, where the leading `num_dims` 
+    dimensions are padded to the maximum sizes. 
+    
+    Returns
+    -------
+    padded: (batch, max_n, ...)
+    non_mask: (batch, max_n) if `num_dims` is 1
+        True for the valid (non-padded) positions. 
+    """
+    trailing_size = tensors[0].size()[num_dims:]
+    sizes = [t.size()[:num_dims] for t in tensors]
+    max_sizes = [max(size[d] for size in sizes) for d in range(num_dims)]
+    sizes = torch.tensor(sizes, dtype=torch.long, device=tensors[0].device).view(len(tensors), num_dims)
+    padded = tensors[0].new_full((len(tensors), *max_sizes, *trailing_size), padding_value)
+    
+    # `masked_scatter_` fills the valid positions in the row-major order, i.e., the order of the flattened tensors, 
+    # hence all values are copied at once
+    non_mask = torch.ones(len(tensors), *max_sizes, dtype=torch.bool, device=tensors[0].device)
+    for d in range(num_dims):
+        positions = torch.arange(max_sizes[d], device=tensors[0].device).view(-1, *[1]*(num_dims-d-1))
+        non_mask = non_mask & (positions < sizes[:, d].view(-1, *[1]*num_dims))
+    padded.masked_scatter_(non_mask.view(*non_mask.size(), *[1]*len(trailing_size)), torch.cat([t.reshape(-1) for t in tensors]))
+    return padded, non_mask
+
+
+
 class DecoderMixinBase(object):
     @property
     def num_metrics(self):
         return 1
         
+    def is_stochastic(self, training: bool=True):
+        """Whether `exemplify` involves random sampling (e.g., negative sampling). 
+        If so, the sampled part of targets should be re-generated on every access, instead of being cached. 
+        """
+        return False
+        
+    def exemplify_static(self, data_entry: dict, training: bool=True):
+        """The deterministic part of `exemplify`, which is allowed to be computed once and cached. 
+        """
+        if self.is_stochastic(training):
+            return {}
+        else:
+            return self.exemplify(data_entry, training=training)
+        
+    def exemplify_stochastic(self, data_entry: dict, example: dict, training: bool=True):
+        """The stochastic part of `exemplify`, given `example` from `exemplify_static`. 
+        Subclasses may override this method (together with `exemplify_static`) to re-use the deterministic targets in `example`. 
+        """
+        if self.is_stochastic(training):
+            return self.exemplify(data_entry, training=training)
+        else:
+            return {}
+        
+    def estimate_cost(self, data_entry: dict):
+        """The estimated computational cost of an example, where the cost of a batch is assumed to be 
+        the maximum cost of examples multiplied by the batch size (i.e., padded). 
+        """
+        return len(data_entry['tokens'])
+        
     def retrieve(self, batch: Batch):
         raise NotImplementedError("Not Implemented `retrieve`")
         
@@ -43,7 +100,7 @@ class DecoderMixinBase(object):
 
 
 
-class SingleDecoderConfigBase(Config):
+class SingleDecoderConfigBase(Config, StatsMixin):
     def __init__(self, **kwargs):
         self.in_dim = kwargs.pop('in_dim', None)
         
@@ -89,6 +146,28 @@ class DecoderBase(torch.nn.Module):
     def decode(self, batch: Batch, **states):
         raise NotImplementedError("Not Implemented `decode`")
         
+    def _batched_losses(self, logits: torch.Tensor, targets: torch.Tensor, non_mask: torch.Tensor):
+        """Compute the losses of all examples by one flattened `criterion` call over the valid positions. 
+        `criterion` should be instantiated with `reduction='none'`. 
+        
+        Parameters
+        ----------
+        logits: (batch, *, voc_dim)
+        targets: (batch, *) or (batch, *, voc_dim) for soft/multi-hot labels
+        non_mask: (batch, *)
+        
+        Returns
+        -------
+        losses: (batch, )
+        """
+        flat_losses = self.criterion(logits[non_mask], targets[non_mask])
+        if flat_losses.dim() > 1:
+            flat_losses = flat_losses.sum(dim=-1)
+        
+        # Scatter back and sum per example, which is numerically closer to per-example `reduction='sum'` than `index_add_`
+        losses = flat_losses.new_zeros(non_mask.size()).masked_scatter(non_mask, flat_losses)
+        return losses.flatten(start_dim=1).sum(dim=-1)
+        
     def _unsqueezed_decode(self, batch: Batch, **states):
         if self.num_metrics == 0:
             raise RuntimeError("`_unsqueezed` method does not applies if `num_metrics` is 0")
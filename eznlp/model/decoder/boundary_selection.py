@@ -2,15 +2,18 @@
 from typing import List, Tuple
 from collections import Counter
 import logging
+import copy
+import numpy
 import torch
 
 from ...wrapper import TargetWrapper, Batch
+from ...annotation import ChunkArray
 from ...utils.chunk import detect_nested, filter_clashed_by_priority
 from ...nn.modules import CombinedDropout, SoftLabelCrossEntropyLoss
 from ...nn.init import reinit_embedding_, reinit_layer_
 from ...metrics import precision_recall_f1_report
 from ..encoder import EncoderConfig
-from .base import DecoderMixinBase, SingleDecoderConfigBase, DecoderBase
+from .base import DecoderMixinBase, SingleDecoderConfigBase, DecoderBase, pad_targets
 
 logger = logging.getLogger(__name__)
 
@@ -33,11 +36,40 @@ class BoundarySelectionDecoderMixin(DecoderMixinBase):
     def none_idx(self):
         return self.label2idx[self.none_label]
         
+    def is_stochastic(self, training: bool=True):
+        # Negative boundaries are randomly sampled in training
+        return training and self.neg_sampling_rate < 1
+        
+    def estimate_cost(self, data_entry: dict):
+        # Scores are computed for all (start, end) pairs
+        return len(data_entry['tokens']) ** 2
+        
     def exemplify(self, data_entry: dict, training: bool=True):
         return {'boundaries_obj': Boundaries(data_entry, self, training=training)}
         
+    def exemplify_static(self, data_entry: dict, training: bool=True):
+        return {'boundaries_obj': Boundaries(data_entry, self, training=training, sampling=False)}
+        
+    def exemplify_stochastic(self, data_entry: dict, example: dict, training: bool=True):
+        if self.is_stochastic(training):
+            boundaries_obj = copy.copy(example['boundaries_obj'])
+            boundaries_obj.sample_non_mask(self)
+            return {'boundaries_obj': boundaries_obj}
+        else:
+            return {}
+        
     def batchify(self, batch_examples: List[dict]):
-        return {'boundaries_objs': [ex['boundaries_obj'] for ex in batch_examples]}
+        batch = {'boundaries_objs': [ex['boundaries_obj'] for ex in batch_examples]}
+        if all(hasattr(boundaries_obj, 'boundary2label_id') for boundaries_obj in batch['boundaries_objs']):
+            # boundary2label_ids: (batch, step, step) or (batch, step, step, voc_dim)
+            batch['boundary2label_ids'], _ = pad_targets([boundaries_obj.boundary2label_id for boundaries_obj in batch['boundaries_objs']], num_dims=2)
+            # Spans from the upper triangular area, or the negative sampled spans
+            non_masks = [getattr(boundaries_obj, 'non_mask', None) for boundaries_obj in batch['boundaries_objs']]
+            non_masks = [torch.ones(boundaries_obj.boundary2label_id.size(0), boundaries_obj.boundary2label_id.size(0), dtype=torch.bool).triu() 
+                             if curr_non_mask is None else curr_non_mask 
+                             for curr_non_mask, boundaries_obj in zip(non_masks, batch['boundaries_objs'])]
+            batch['boundaries_non_mask'], _ = pad_targets(non_masks, num_dims=2, padding_value=False)
+        return batch
         
     def retrieve(self, batch: Batch):
         return [boundaries_obj.chunks for boundaries_obj in batch.boundaries_objs]
@@ -66,6 +98,10 @@ def _spans_from_surrounding(span: Tuple[int], distance: int, num_tokens: int):
                 yield (start, end)
 
 
+def _as_index(positions):
+    return torch.from_numpy(positions.astype('int64'))
+
+
 def _spans_from_upper_triangular(seq_len: int):
     """Spans from the upper triangular area. 
     """
@@ -83,54 +119,34 @@ class Boundaries(TargetWrapper):
         {'tokens': TokenSequence, 
          'chunks': List[tuple]}
     """
-    def __init__(self, data_entry: dict, config: BoundarySelectionDecoderMixin, training: bool=True):
+    _batched_attributes = {'boundary2label_id': 'boundary2label_ids', 'non_mask': 'boundaries_non_mask'}
+        
+    def __init__(self, data_entry: dict, config: BoundarySelectionDecoderMixin, training: bool=True, sampling: bool=True):
         super().__init__(training)
         
         self.chunks = data_entry.get('chunks', None)
-        num_tokens = len(data_entry['tokens'])
-        
-        if training and config.neg_sampling_rate < 1:
-            non_mask = (torch.arange(num_tokens) - torch.arange(num_tokens).unsqueeze(-1) >= 0)
-            pos_non_mask = torch.zeros_like(non_mask)
-            for label, start, end in self.chunks:
-                pos_non_mask[start, end-1] = True
-            
-            neg_sampled = torch.empty_like(non_mask).bernoulli(p=config.neg_sampling_rate)
-            
-            if config.hard_neg_sampling_rate > config.neg_sampling_rate:
-                hard_neg_non_mask = torch.zeros_like(non_mask)
-                for label, start, end in self.chunks:
-                    for dist in range(1, config.hard_neg_sampling_size+1):
-                        for sur_start, sur_end in _spans_from_surrounding((start, end), dist, num_tokens):
-                            hard_neg_non_mask[sur_start, sur_end-1] = True
-                
-                if config.hard_neg_sampling_rate < 1:
-                    # Solve: 1 - (1 - p_{neg})(1 - p_{comp}) = p_{hard}
-                    # Get: p_{comp} = (p_{hard} - p_{neg}) / (1 - p_{neg})
-                    comp_sampling_rate = (config.hard_neg_sampling_rate - config.neg_sampling_rate) / (1 - config.neg_sampling_rate)
-                    comp_sampled = torch.empty_like(non_mask).bernoulli(p=comp_sampling_rate)
-                    neg_sampled = neg_sampled | (comp_sampled & hard_neg_non_mask)
-                else:
-                    neg_sampled = neg_sampled | hard_neg_non_mask
-            
-            self.non_mask = pos_non_mask | (neg_sampled & non_mask)
+        self.num_tokens = len(data_entry['tokens'])
         
         if self.chunks is not None:
             if config.sb_epsilon <= 0 and config.sl_epsilon <= 0:
                 # Cross entropy loss
-                self.boundary2label_id = torch.full((num_tokens, num_tokens), config.none_idx, dtype=torch.long)
-                for label, start, end in self.chunks:
-                    self.boundary2label_id[start, end-1] = config.label2idx[label]
+                self.boundary2label_id = torch.full((self.num_tokens, self.num_tokens), config.none_idx, dtype=torch.long)
+                if isinstance(self.chunks, ChunkArray):
+                    # Note: chunks with duplicate spans but different types are very rare; only one of them is kept
+                    self.boundary2label_id[_as_index(self.chunks.starts), _as_index(self.chunks.ends)-1] = torch.from_numpy(self.chunks.map_labels(config.label2idx))
+                else:
+                    for label, start, end in self.chunks:
+                        self.boundary2label_id[start, end-1] = config.label2idx[label]
             else:
                 # Soft label loss for either boundary or label smoothing 
-                self.boundary2label_id = torch.zeros(num_tokens, num_tokens, config.voc_dim, dtype=torch.float)
+                self.boundary2label_id = torch.zeros(self.num_tokens, self.num_tokens, config.voc_dim, dtype=torch.float)
                 for label, start, end in self.chunks:
                     label_id = config.label2idx[label]
                     self.boundary2label_id[start, end-1, label_id] += (1 - config.sb_epsilon)
                     
                     for dist in range(1, config.sb_size+1):
                         eps_per_span = config.sb_epsilon / (config.sb_size * dist * 4)
-                        sur_spans = list(_spans_from_surrounding((start, end), dist, num_tokens))
+                        sur_spans = list(_spans_from_surrounding((start, end), dist, self.num_tokens))
                         for sur_start, sur_end in sur_spans:
                             self.boundary2label_id[sur_start, sur_end-1, label_id] += (eps_per_span*config.sb_adj_factor)
                         # Absorb the probabilities assigned to illegal positions
@@ -148,6 +164,47 @@ class Boundaries(TargetWrapper):
                     self.boundary2label_id[:, :, pos_indic] = (self.boundary2label_id[:, :, pos_indic] * (1-config.sl_epsilon) + 
                                                                self.boundary2label_id[:, :, pos_indic].sum(dim=-1, keepdim=True)*config.sl_epsilon / (config.voc_dim-1))
 
+        if training and config.neg_sampling_rate < 1:
+            # The deterministic part of negative sampling: 2 for positive boundaries, 1 for hard negative boundaries, 
+            # 0 for other negative boundaries, and -1 for illegal ones (i.e., the lower triangular area)
+            # Note: a numpy array is neither moved to devices nor packed with the batch
+            non_mask_levels = numpy.triu(numpy.ones((self.num_tokens, self.num_tokens), dtype=numpy.int8)) - 1
+            if config.hard_neg_sampling_rate > config.neg_sampling_rate:
+                for label, start, end in self.chunks:
+                    for dist in range(1, config.hard_neg_sampling_size+1):
+                        for sur_start, sur_end in _spans_from_surrounding((start, end), dist, self.num_tokens):
+                            non_mask_levels[sur_start, sur_end-1] = 1
+            if isinstance(self.chunks, ChunkArray):
+                non_mask_levels[self.chunks.starts, self.chunks.ends-1] = 2
+            else:
+                for label, start, end in self.chunks:
+                    non_mask_levels[start, end-1] = 2
+            self._non_mask_levels = non_mask_levels
+            
+            if sampling:
+                self.sample_non_mask(config)
+        
+        
+    def sample_non_mask(self, config: BoundarySelectionDecoderMixin):
+        """Randomly sample the negative boundaries into `non_mask`. 
+        
+        This should be re-done on every access in training, while the other attributes are deterministic and thus can be cached. 
+        """
+        non_mask_levels = torch.from_numpy(self._non_mask_levels)
+        neg_sampled = torch.empty(self.num_tokens, self.num_tokens, dtype=torch.bool).bernoulli(p=config.neg_sampling_rate)
+        
+        if config.hard_neg_sampling_rate > config.neg_sampling_rate:
+            hard_neg_non_mask = (non_mask_levels == 1)
+            if config.hard_neg_sampling_rate < 1:
+                # Solve: 1 - (1 - p_{neg})(1 - p_{comp}) = p_{hard}
+                # Get: p_{comp} = (p_{hard} - p_{neg}) / (1 - p_{neg})
+                comp_sampling_rate = (config.hard_neg_sampling_rate - config.neg_sampling_rate) / (1 - config.neg_sampling_rate)
+                comp_sampled = torch.empty_like(neg_sampled).bernoulli(p=comp_sampling_rate)
+                neg_sampled = neg_sampled | (comp_sampled & hard_neg_non_mask)
+            else:
+                neg_sampled = neg_sampled | hard_neg_non_mask
+        
+        self.non_mask = (non_mask_levels == 2) | (neg_sampled & (non_mask_levels >= 0))
 
 
 class BoundarySelectionDecoderConfig(SingleDecoderConfigBase, BoundarySelectionDecoderMixin):
@@ -209,17 +266,24 @@ class BoundarySelectionDecoderConfig(SingleDecoderConfigBase, BoundarySelectionD
             return super().instantiate_criterion(**kwargs)
         
         
-    def build_vocab(self, *partitions):
-        counter = Counter(label for data in partitions for entry in data for label, start, end in entry['chunks'])
-        self.idx2label = [self.none_label] + list(counter.keys())
+    def init_stats(self):
+        return {'counter': Counter(), 'allow_nested': False, 'max_len': 0}
+        
+    def update_stats(self, stats: dict, entry: dict):
+        stats['counter'].update(label for label, start, end in entry['chunks'])
+        stats['allow_nested'] = stats['allow_nested'] or detect_nested(entry['chunks'])
+        stats['max_len'] = max(stats['max_len'], len(entry['tokens']))
         
-        self.allow_nested = any(detect_nested(entry['chunks']) for data in partitions for entry in data)
+    def build_vocab_from_stats(self, stats: dict):
+        self.idx2label = [self.none_label] + list(stats['counter'].keys())
+        
+        self.allow_nested = stats['allow_nested']
         if self.allow_nested:
             logger.info("Nested chunks detected, nested chunks are allowed in decoding...")
         else:
             logger.info("No nested chunks detected, only flat chunks are allowed in decoding...")
         
-        self.max_len = max(len(data_entry['tokens']) for data in partitions for data_entry in data)
+        self.max_len = stats['max_len']
         
         
     def instantiate(self):
@@ -262,7 +326,7 @@ class BoundarySelectionDecoder(DecoderBase, BoundarySelectionDecoderMixin):
         torch.nn.init.orthogonal_(self.W.data)
         torch.nn.init.zeros_(self.b.data)
         
-        self.criterion = config.instantiate_criterion(reduction='sum')
+        self.criterion = config.instantiate_criterion(reduction='none')
         
         
     def _get_span_size_ids(self, seq_len: int):
@@ -304,13 +368,8 @@ class BoundarySelectionDecoder(DecoderBase, BoundarySelectionDecoderMixin):
     def forward(self, batch: Batch, full_hidden: torch.Tensor):
         batch_scores = self.compute_scores(batch, full_hidden)
         
-        losses = []
-        for curr_scores, boundaries_obj, curr_len in zip(batch_scores, batch.boundaries_objs, batch.seq_lens.cpu().tolist()):
-            curr_non_mask = getattr(boundaries_obj, 'non_mask', self._get_span_non_mask(curr_len))
-            
-            loss = self.criterion(curr_scores[:curr_len, :curr_len][curr_non_mask], boundaries_obj.boundary2label_id[curr_non_mask])
-            losses.append(loss)
-        return torch.stack(losses)
+        max_len = batch.boundary2label_ids.size(1)
+        return self._batched_losses(batch_scores[:, :max_len, :max_len], batch.boundary2label_ids, batch.boundaries_non_mask)
         
         
     def decode(self, batch: Batch, full_hidden: torch.Tensor):
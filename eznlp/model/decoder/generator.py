@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from typing import List
 import itertools
-import nltk
 import torch
 
 from ...wrapper import Batch
@@ -13,6 +12,12 @@ from .base import DecoderMixinBase, SingleDecoderConfigBase, DecoderBase
 
 
 class GeneratorMixin(DecoderMixinBase, VocabMixin):
+    def estimate_cost(self, entry: dict):
+        # The source length (if any) plus the number of decoding steps
+        src_len = len(entry['tokens']) if 'tokens' in entry else 0
+        trg_len = len(entry['trg_tokens']) if 'trg_tokens' in entry else self.max_len
+        return src_len + trg_len
+        
     def exemplify(self, entry: dict, training: bool=True):
         example = {}
         
@@ -48,6 +53,7 @@ class GeneratorMixin(DecoderMixinBase, VocabMixin):
         assert isinstance(y_gold[0], list) and isinstance(y_gold[0][0], list) and isinstance(y_gold[0][0][0], str)
         assert isinstance(y_pred[0], list) and (len(y_pred[0]) == 0 or isinstance(y_pred[0][0], str))
         # torchtext.data.metrics.bleu_score(candidate_corpus=y_pred, references_corpus=y_gold)
+        import nltk
         return nltk.translate.bleu_score.corpus_bleu(list_of_references=y_gold, hypotheses=y_pred)
 
 
@@ -128,9 +134,15 @@ class GeneratorConfig(SingleDecoderConfigBase, GeneratorMixin):
     def max_len(self):
         return self.embedding.max_len
         
-    def build_vocab(self, *partitions):
-        flattened_partitions = [[{'trg_tokens': tokens} for entry in data for tokens in entry['full_trg_tokens']] for data in partitions]
-        self.embedding.build_vocab(*flattened_partitions)
+    def init_stats(self):
+        return self.embedding.init_stats()
+        
+    def update_stats(self, stats: dict, entry: dict):
+        for tokens in entry['full_trg_tokens']:
+            self.embedding.update_stats(stats, {'trg_tokens': tokens})
+        
+    def build_vocab_from_stats(self, stats: dict):
+        self.embedding.build_vocab_from_stats(stats)
         
     def instantiate(self):
         if self.arch.lower() in ('lstm', 'gru'):
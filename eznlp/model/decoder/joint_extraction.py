@@ -4,6 +4,7 @@ import torch
 
 from ...wrapper import Batch
 from ...config import Config
+from ...statistics import StatsMixin
 from .base import DecoderMixinBase, SingleDecoderConfigBase, DecoderBase
 from .sequence_tagging import SequenceTaggingDecoderConfig
 from .span_classification import SpanClassificationDecoderConfig
@@ -34,6 +35,13 @@ class JointExtractionDecoderMixin(DecoderMixinBase):
             yield self.rel_decoder
         
         
+    def is_stochastic(self, training: bool=True):
+        # `attr_decoder` and `rel_decoder` are not built (and thus not sampled) in `exemplify`
+        return self.ck_decoder.is_stochastic(training)
+        
+    def estimate_cost(self, data_entry: dict):
+        return sum(decoder.estimate_cost(data_entry) for decoder in self.decoders)
+        
     def exemplify(self, data_entry: dict, training: bool=True):
         example = self.ck_decoder.exemplify(data_entry, training=training)
         if self.has_attr_decoder:
@@ -42,6 +50,17 @@ class JointExtractionDecoderMixin(DecoderMixinBase):
             example.update(self.rel_decoder.exemplify(data_entry, training=training, building=False))
         return example
         
+    def exemplify_static(self, data_entry: dict, training: bool=True):
+        example = self.ck_decoder.exemplify_static(data_entry, training=training)
+        if self.has_attr_decoder:
+            example.update(self.attr_decoder.exemplify(data_entry, training=training, building=False))
+        if self.has_rel_decoder:
+            example.update(self.rel_decoder.exemplify(data_entry, training=training, building=False))
+        return example
+        
+    def exemplify_stochastic(self, data_entry: dict, example: dict, training: bool=True):
+        return self.ck_decoder.exemplify_stochastic(data_entry, example, training=training)
+        
     def batchify(self, batch_examples: List[dict]):
         batch = self.ck_decoder.batchify(batch_examples)
         if self.has_attr_decoder:
@@ -60,7 +79,7 @@ class JointExtractionDecoderMixin(DecoderMixinBase):
 
 
 
-class JointExtractionDecoderConfig(Config, JointExtractionDecoderMixin):
+class JointExtractionDecoderConfig(Config, StatsMixin, JointExtractionDecoderMixin):
     def __init__(self, 
                  ck_decoder: Union[SingleDecoderConfigBase, str]='span_classification', 
                  attr_decoder: Union[SingleDecoderConfigBase, str]='span_attr_classification', 
@@ -111,9 +130,16 @@ class JointExtractionDecoderConfig(Config, JointExtractionDecoderMixin):
         for decoder in self.decoders:
             decoder.in_dim = dim
         
-    def build_vocab(self, *partitions):
-        for decoder in self.decoders:
-            decoder.build_vocab(*partitions)
+    def init_stats(self):
+        return {'decoders': [decoder.init_stats() for decoder in self.decoders]}
+        
+    def update_stats(self, stats: dict, entry: dict):
+        for decoder, d_stats in zip(self.decoders, stats['decoders']):
+            decoder.update_stats(d_stats, entry)
+        
+    def build_vocab_from_stats(self, stats: dict):
+        for decoder, d_stats in zip(self.decoders, stats['decoders']):
+            decoder.build_vocab_from_stats(d_stats)
         
     def instantiate(self):
         return JointExtractionDecoder(self)
@@ -9,7 +9,7 @@ from ...nn.utils import unpad_seqs
 from ...nn.modules import CombinedDropout, CRF
 from ...nn.init import reinit_layer_
 from ...metrics import precision_recall_f1_report
-from .base import DecoderMixinBase, SingleDecoderConfigBase, DecoderBase
+from .base import DecoderMixinBase, SingleDecoderConfigBase, DecoderBase, pad_targets
 
 
 class SequenceTaggingDecoderMixin(DecoderMixinBase):
@@ -43,7 +43,11 @@ class SequenceTaggingDecoderMixin(DecoderMixinBase):
         return {'tags_obj': Tags(data_entry, self, training=training)}
         
     def batchify(self, batch_examples: List[dict]):
-        return {'tags_objs': [ex['tags_obj'] for ex in batch_examples]}
+        batch = {'tags_objs': [ex['tags_obj'] for ex in batch_examples]}
+        if all(hasattr(tags_obj, 'tag_ids') for tags_obj in batch['tags_objs']):
+            # tag_ids / tags_non_mask: (batch, step)
+            batch['tag_ids'], batch['tags_non_mask'] = pad_targets([tags_obj.tag_ids for tags_obj in batch['tags_objs']], padding_value=self.pad_idx)
+        return batch
         
     def retrieve(self, batch: Batch):
         return [tags_obj.chunks for tags_obj in batch.tags_objs]
@@ -69,6 +73,8 @@ class Tags(TargetWrapper):
         {'tokens': TokenSequence, 
          'chunks': List[tuple]}
     """
+    _batched_attributes = {'tag_ids': 'tag_ids'}
+        
     def __init__(self, data_entry: dict, config: SequenceTaggingDecoderMixin, training: bool=True):
         super().__init__(training)
         
@@ -112,13 +118,14 @@ class SequenceTaggingDecoderConfig(SingleDecoderConfigBase, SequenceTaggingDecod
             return super().instantiate_criterion(**kwargs)
         
         
-    def build_vocab(self, *partitions):
-        counter = Counter()
-        for data in partitions:
-            for data_entry in data:
-                curr_tags = self.translator.chunks2tags(data_entry['chunks'], len(data_entry['tokens']))
-                counter.update(curr_tags)
-        self.idx2tag = ['<pad>'] + list(counter.keys())
+    def init_stats(self):
+        return {'counter': Counter()}
+        
+    def update_stats(self, stats: dict, entry: dict):
+        stats['counter'].update(self.translator.chunks2tags(entry['chunks'], len(entry['tokens'])))
+        
+    def build_vocab_from_stats(self, stats: dict):
+        self.idx2tag = ['<pad>'] + list(stats['counter'].keys())
         
         
     def instantiate(self):
@@ -136,7 +143,7 @@ class SequenceTaggingDecoder(DecoderBase, SequenceTaggingDecoderMixin):
         self.hid2logit = torch.nn.Linear(config.in_dim, config.voc_dim)
         reinit_layer_(self.hid2logit, 'sigmoid')
         
-        self.criterion = config.instantiate_criterion(ignore_index=config.pad_idx, reduction='sum')
+        self.criterion = config.instantiate_criterion(ignore_index=config.pad_idx, reduction='none')
         
         
     def forward(self, batch: Batch, full_hidden: torch.Tensor):
@@ -144,15 +151,10 @@ class SequenceTaggingDecoder(DecoderBase, SequenceTaggingDecoderMixin):
         logits = self.hid2logit(self.dropout(full_hidden))
         
         if isinstance(self.criterion, CRF):
-            batch_tag_ids = torch.nn.utils.rnn.pad_sequence([tags_obj.tag_ids for tags_obj in batch.tags_objs], 
-                                                            batch_first=True, 
-                                                            padding_value=self.criterion.pad_idx)
-            losses = self.criterion(logits, batch_tag_ids, mask=batch.mask)
+            losses = self.criterion(logits, batch.tag_ids, mask=batch.mask)
             
         else:
-            losses = [self.criterion(lg[:slen], tags_obj.tag_ids) for lg, tags_obj, slen in zip(logits, batch.tags_objs, batch.seq_lens.cpu().tolist())]
-            # `torch.stack`: Concatenates sequence of tensors along a new dimension. 
-            losses = torch.stack(losses, dim=0)
+            losses = self._batched_losses(logits[:, :batch.tag_ids.size(1)], batch.tag_ids, batch.tags_non_mask)
         
         return losses
         
@@ -9,7 +9,7 @@ from ...nn.modules import SequencePooling, SequenceAttention, CombinedDropout
 from ...nn.functional import seq_lens2mask
 from ...nn.init import reinit_embedding_, reinit_layer_
 from ...metrics import precision_recall_f1_report
-from .base import DecoderMixinBase, SingleDecoderConfigBase, DecoderBase
+from .base import DecoderMixinBase, SingleDecoderConfigBase, DecoderBase, pad_targets
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +49,10 @@ class SpanAttrClassificationDecoderMixin(DecoderMixinBase):
     def attr_none_idx(self):
         return self.attr_label2idx[self.attr_none_label]
         
+    def estimate_cost(self, data_entry: dict):
+        # The number of candidate chunks
+        return len(data_entry['tokens']) + len(data_entry.get('chunks', []))
+        
     def exemplify(self, data_entry: dict, training: bool=True, building: bool=True):
         return {'chunks_obj': Chunks(data_entry, self, training=training, building=building)}
         
@@ -173,13 +177,18 @@ class SpanAttrClassificationDecoderConfig(SingleDecoderConfigBase, SpanAttrClass
         repr_attr_dict = {key: getattr(self, key) for key in ['in_dim', 'in_drop_rates', 'agg_mode', 'criterion']}
         return self._repr_non_config_attrs(repr_attr_dict)
         
-    def build_vocab(self, *partitions):
-        ck_counter = Counter(label for data in partitions for entry in data for label, start, end in entry['chunks'])
-        self.idx2ck_label = [self.ck_none_label] + list(ck_counter.keys())
-        attr_counter = Counter(label for data in partitions for entry in data for label, chunk in entry['attributes'])
-        self.idx2attr_label = [self.attr_none_label] + list(attr_counter.keys())
-        legal_ck_counter = Counter(chunk[0] for data in partitions for entry in data for label, chunk in entry['attributes'])
-        self.legal_chunk_types = set(list(legal_ck_counter.keys()))
+    def init_stats(self):
+        return {'ck_counter': Counter(), 'attr_counter': Counter(), 'legal_ck_counter': Counter()}
+        
+    def update_stats(self, stats: dict, entry: dict):
+        stats['ck_counter'].update(label for label, start, end in entry['chunks'])
+        stats['attr_counter'].update(label for label, chunk in entry['attributes'])
+        stats['legal_ck_counter'].update(chunk[0] for label, chunk in entry['attributes'])
+        
+    def build_vocab_from_stats(self, stats: dict):
+        self.idx2ck_label = [self.ck_none_label] + list(stats['ck_counter'].keys())
+        self.idx2attr_label = [self.attr_none_label] + list(stats['attr_counter'].keys())
+        self.legal_chunk_types = set(list(stats['legal_ck_counter'].keys()))
         
     def instantiate(self):
         return SpanAttrClassificationDecoder(self)
@@ -213,7 +222,7 @@ class SpanAttrClassificationDecoder(DecoderBase, SpanAttrClassificationDecoderMi
         self.hid2logit = torch.nn.Linear(config.in_dim+config.ck_size_emb_dim+config.ck_label_emb_dim, config.attr_voc_dim)
         reinit_layer_(self.hid2logit, 'sigmoid')
         
-        self.criterion = config.instantiate_criterion(reduction='sum')
+        self.criterion = config.instantiate_criterion(reduction='none')
         self.confidence_threshold = config.confidence_threshold
         
         
@@ -251,11 +260,11 @@ class SpanAttrClassificationDecoder(DecoderBase, SpanAttrClassificationDecoderMi
     def forward(self, batch: Batch, full_hidden: torch.Tensor):
         batch_logits = self.get_logits(batch, full_hidden)
         
-        losses = [self.criterion(batch_logits[k], batch.chunks_objs[k].attr_label_ids) 
-                      if len(batch.chunks_objs[k].chunks) > 0
-                      else torch.tensor(0.0, device=full_hidden.device)
-                      for k in range(full_hidden.size(0))]
-        return torch.stack(losses)
+        # The targets may be built on the fly (e.g., in joint modeling), hence padded here instead of in `batchify`
+        # batch_logits / attr_label_ids: (batch, num_chunks, attr_voc_dim)
+        batch_logits, non_mask = pad_targets(batch_logits)
+        attr_label_ids, _ = pad_targets([chunks_obj.attr_label_ids for chunks_obj in batch.chunks_objs])
+        return self._batched_losses(batch_logits, attr_label_ids, non_mask)
         
         
     def decode(self, batch: Batch, full_hidden: torch.Tensor):
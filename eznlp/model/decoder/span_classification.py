@@ -3,6 +3,7 @@ from typing import List
 from collections import Counter
 import random
 import logging
+import copy
 import torch
 
 from ...wrapper import TargetWrapper, Batch
@@ -11,7 +12,7 @@ from ...nn.modules import SequencePooling, SequenceAttention, CombinedDropout
 from ...nn.functional import seq_lens2mask
 from ...nn.init import reinit_embedding_, reinit_layer_
 from ...metrics import precision_recall_f1_report
-from .base import DecoderMixinBase, SingleDecoderConfigBase, DecoderBase
+from .base import DecoderMixinBase, SingleDecoderConfigBase, DecoderBase, pad_targets
 
 logger = logging.getLogger(__name__)
 
@@ -34,11 +35,36 @@ class SpanClassificationDecoderMixin(DecoderMixinBase):
     def none_idx(self):
         return self.label2idx[self.none_label]
         
+    def is_stochastic(self, training: bool=True):
+        # Negative spans are randomly sampled in training
+        return training
+        
+    def estimate_cost(self, data_entry: dict):
+        # The number of candidate spans
+        num_tokens = len(data_entry['tokens'])
+        max_span_size = min(self.max_span_size, num_tokens)
+        return num_tokens*max_span_size - max_span_size*(max_span_size-1)//2
+        
     def exemplify(self, data_entry: dict, training: bool=True):
         return {'spans_obj': Spans(data_entry, self, training=training)}
         
+    def exemplify_static(self, data_entry: dict, training: bool=True):
+        return {'spans_obj': Spans(data_entry, self, training=training, sampling=False)}
+        
+    def exemplify_stochastic(self, data_entry: dict, example: dict, training: bool=True):
+        if self.is_stochastic(training):
+            spans_obj = copy.copy(example['spans_obj'])
+            spans_obj.sample_spans(self)
+            return {'spans_obj': spans_obj}
+        else:
+            return {}
+        
     def batchify(self, batch_examples: List[dict]):
-        return {'spans_objs': [ex['spans_obj'] for ex in batch_examples]}
+        batch = {'spans_objs': [ex['spans_obj'] for ex in batch_examples]}
+        if all(hasattr(spans_obj, 'label_ids') for spans_obj in batch['spans_objs']):
+            # span_label_ids / spans_non_mask: (batch, num_spans)
+            batch['span_label_ids'], batch['spans_non_mask'] = pad_targets([spans_obj.label_ids for spans_obj in batch['spans_objs']])
+        return batch
         
     def retrieve(self, batch: Batch):
         return [spans_obj.chunks for spans_obj in batch.spans_objs]
@@ -64,7 +90,9 @@ class Spans(TargetWrapper):
         {'tokens': TokenSequence, 
          'chunks': List[tuple]}
     """
-    def __init__(self, data_entry: dict, config: SpanClassificationDecoderMixin, training: bool=True):
+    _batched_attributes = {'label_ids': 'span_label_ids'}
+        
+    def __init__(self, data_entry: dict, config: SpanClassificationDecoderMixin, training: bool=True, sampling: bool=True):
         super().__init__(training)
         
         self.chunks = data_entry.get('chunks', None)
@@ -78,10 +106,27 @@ class Spans(TargetWrapper):
                          for end in range(start+1, min(start+1+config.max_span_size, len(data_entry['tokens']) + 1))
                          if (start, end) not in pos_spans]
         
-        if training and len(neg_spans) > config.num_neg_chunks:
+        if training:
+            # The candidate spans are deterministic and thus can be cached, while the negative spans are sampled by `sample_spans`
+            # Note: tuples are not traversed in moving or packing the batch
+            self._pos_spans, self._neg_spans = tuple(pos_spans), tuple(neg_spans)
+            if sampling:
+                self.sample_spans(config)
+        else:
+            self._build_spans(pos_spans + neg_spans, config)
+        
+        
+    def sample_spans(self, config: SpanClassificationDecoderMixin):
+        """Randomly sample the negative spans, which should be re-done on every access in training. 
+        """
+        neg_spans = list(self._neg_spans)
+        if len(neg_spans) > config.num_neg_chunks:
             neg_spans = random.sample(neg_spans, config.num_neg_chunks)
+        self._build_spans(list(self._pos_spans) + neg_spans, config)
+        
         
-        self.spans = pos_spans + neg_spans
+    def _build_spans(self, spans: List[tuple], config: SpanClassificationDecoderMixin):
+        self.spans = spans
         # Note: size_id = size - 1
         self.span_size_ids = torch.tensor([end-start-1 for start, end in self.spans], dtype=torch.long)
         self.span_size_ids.masked_fill_(self.span_size_ids>=config.max_span_size, config.max_span_size-1)
@@ -94,7 +139,6 @@ class Spans(TargetWrapper):
             self.label_ids = torch.tensor([config.label2idx[label] for label in labels], dtype=torch.long)
 
 
-
 class SpanClassificationDecoderConfig(SingleDecoderConfigBase, SpanClassificationDecoderMixin):
     def __init__(self, **kwargs):
         self.in_drop_rates = kwargs.pop('in_drop_rates', (0.5, 0.0, 0.0))
@@ -120,17 +164,24 @@ class SpanClassificationDecoderConfig(SingleDecoderConfigBase, SpanClassificatio
         repr_attr_dict = {key: getattr(self, key) for key in ['in_dim', 'in_drop_rates', 'agg_mode', 'criterion']}
         return self._repr_non_config_attrs(repr_attr_dict)
         
-    def build_vocab(self, *partitions):
-        counter = Counter(label for data in partitions for entry in data for label, start, end in entry['chunks'])
-        self.idx2label = [self.none_label] + list(counter.keys())
+    def init_stats(self):
+        return {'counter': Counter(), 'allow_nested': False, 'size_counter': Counter()}
+        
+    def update_stats(self, stats: dict, entry: dict):
+        stats['counter'].update(label for label, start, end in entry['chunks'])
+        stats['allow_nested'] = stats['allow_nested'] or detect_nested(entry['chunks'])
+        stats['size_counter'].update(end-start for label, start, end in entry['chunks'])
+        
+    def build_vocab_from_stats(self, stats: dict):
+        self.idx2label = [self.none_label] + list(stats['counter'].keys())
         
-        self.allow_nested = any(detect_nested(entry['chunks']) for data in partitions for entry in data)
+        self.allow_nested = stats['allow_nested']
         if self.allow_nested:
             logger.info("Nested chunks detected, nested chunks are allowed in decoding...")
         else:
             logger.info("No nested chunks detected, only flat chunks are allowed in decoding...")
         
-        size_counter = Counter(end-start for data in partitions for entry in data for label, start, end in entry['chunks'])
+        size_counter = stats['size_counter']
         num_spans = sum(size_counter.values())
         num_oov_spans = sum(num for size, num in size_counter.items() if size > self.max_span_size)
         if num_oov_spans > 0:
@@ -162,7 +213,7 @@ class SpanClassificationDecoder(DecoderBase, SpanClassificationDecoderMixin):
         self.hid2logit = torch.nn.Linear(config.in_dim+config.size_emb_dim, config.voc_dim)
         reinit_layer_(self.hid2logit, 'sigmoid')
         
-        self.criterion = config.instantiate_criterion(reduction='sum')
+        self.criterion = config.instantiate_criterion(reduction='none')
         
         
     def get_logits(self, batch: Batch, full_hidden: torch.Tensor):
@@ -189,8 +240,9 @@ class SpanClassificationDecoder(DecoderBase, SpanClassificationDecoderMixin):
     def forward(self, batch: Batch, full_hidden: torch.Tensor):
         batch_logits = self.get_logits(batch, full_hidden)
         
-        losses = [self.criterion(batch_logits[k], batch.spans_objs[k].label_ids) for k in range(full_hidden.size(0))]
-        return torch.stack(losses)
+        # batch_logits: (batch, num_spans, voc_dim)
+        batch_logits, _ = pad_targets(batch_logits)
+        return self._batched_losses(batch_logits, batch.span_label_ids, batch.spans_non_mask)
         
         
     def decode(self, batch: Batch, full_hidden: torch.Tensor):
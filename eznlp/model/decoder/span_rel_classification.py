@@ -3,6 +3,7 @@ from typing import List
 from collections import Counter
 import random
 import logging
+import copy
 import torch
 
 from ...wrapper import TargetWrapper, Batch
@@ -11,7 +12,7 @@ from ...nn.modules import SequencePooling, SequenceAttention, CombinedDropout
 from ...nn.functional import seq_lens2mask
 from ...nn.init import reinit_embedding_, reinit_layer_
 from ...metrics import precision_recall_f1_report
-from .base import DecoderMixinBase, SingleDecoderConfigBase, DecoderBase
+from .base import DecoderMixinBase, SingleDecoderConfigBase, DecoderBase, pad_targets
 
 logger = logging.getLogger(__name__)
 
@@ -51,9 +52,28 @@ class SpanRelClassificationDecoderMixin(DecoderMixinBase):
     def rel_none_idx(self):
         return self.rel_label2idx[self.rel_none_label]
         
+    def is_stochastic(self, training: bool=True):
+        # Negative chunk-pairs are randomly sampled in training
+        return training
+        
+    def estimate_cost(self, data_entry: dict):
+        # The number of candidate chunk-pairs
+        return len(data_entry['tokens']) + len(data_entry.get('chunks', [])) ** 2
+        
     def exemplify(self, data_entry: dict, training: bool=True, building: bool=True):
         return {'chunk_pairs_obj': ChunkPairs(data_entry, self, training=training, building=building)}
         
+    def exemplify_static(self, data_entry: dict, training: bool=True):
+        return {'chunk_pairs_obj': ChunkPairs(data_entry, self, training=training, sampling=False)}
+        
+    def exemplify_stochastic(self, data_entry: dict, example: dict, training: bool=True):
+        if self.is_stochastic(training):
+            chunk_pairs_obj = copy.copy(example['chunk_pairs_obj'])
+            chunk_pairs_obj.sample_chunk_pairs(self)
+            return {'chunk_pairs_obj': chunk_pairs_obj}
+        else:
+            return {}
+        
     def batchify(self, batch_examples: List[dict]):
         return {'chunk_pairs_objs': [ex['chunk_pairs_obj'] for ex in batch_examples]}
         
@@ -93,7 +113,7 @@ class ChunkPairs(TargetWrapper):
     (2) If `building` is `False`, `data_entry['chunks']` is known for training but not for evaluation (e.g., joint modeling).
         In this case, `inject_chunks` and `build` should be successively invoked, and the negative samples are generated from injected chunks. 
     """
-    def __init__(self, data_entry: dict, config: SpanRelClassificationDecoderMixin, training: bool=True, building: bool=True):
+    def __init__(self, data_entry: dict, config: SpanRelClassificationDecoderMixin, training: bool=True, building: bool=True, sampling: bool=True):
         super().__init__(training)
         
         self.chunks = data_entry['chunks'] if training or building else []
@@ -101,7 +121,7 @@ class ChunkPairs(TargetWrapper):
         
         self.is_built = False
         if building:
-            self.build(config)
+            self.build(config, sampling=sampling)
         
         
     def inject_chunks(self, chunks: List[tuple]):
@@ -118,7 +138,7 @@ class ChunkPairs(TargetWrapper):
         self.chunks = self.chunks + [ck for ck in chunks if ck not in self.chunks]
         
         
-    def build(self, config: SpanRelClassificationDecoderMixin):
+    def build(self, config: SpanRelClassificationDecoderMixin, sampling: bool=True):
         """Generate negative samples from `self.chunks` and build up tensors. 
         """
         assert not self.is_built
@@ -135,10 +155,27 @@ class ChunkPairs(TargetWrapper):
                                and chunk_pair_distance(head, tail) <= config.max_pair_distance
                                and (head, tail) not in pos_chunk_pairs)]
         
-        if self.training and len(neg_chunk_pairs) > config.num_neg_relations:
+        if self.training:
+            # The candidate chunk-pairs are deterministic and thus can be cached, while the negative chunk-pairs are sampled by `sample_chunk_pairs`
+            # Note: tuples are not traversed in moving or packing the batch
+            self._pos_chunk_pairs, self._neg_chunk_pairs = tuple(pos_chunk_pairs), tuple(neg_chunk_pairs)
+            if sampling:
+                self.sample_chunk_pairs(config)
+        else:
+            self._build_chunk_pairs(pos_chunk_pairs + neg_chunk_pairs, config)
+        
+        
+    def sample_chunk_pairs(self, config: SpanRelClassificationDecoderMixin):
+        """Randomly sample the negative chunk-pairs, which should be re-done on every access in training. 
+        """
+        neg_chunk_pairs = list(self._neg_chunk_pairs)
+        if len(neg_chunk_pairs) > config.num_neg_relations:
             neg_chunk_pairs = random.sample(neg_chunk_pairs, config.num_neg_relations)
+        self._build_chunk_pairs(list(self._pos_chunk_pairs) + neg_chunk_pairs, config)
         
-        self.chunk_pairs = pos_chunk_pairs + neg_chunk_pairs
+        
+    def _build_chunk_pairs(self, chunk_pairs: List[tuple], config: SpanRelClassificationDecoderMixin):
+        self.chunk_pairs = chunk_pairs
         # span_size_ids / ck_label_ids: (num_pairs, 2)
         # Note: size_id = size - 1
         self.span_size_ids = torch.tensor([[h_end-h_start-1, t_end-t_start-1] 
@@ -187,15 +224,21 @@ class SpanRelClassificationDecoderConfig(SingleDecoderConfigBase, SpanRelClassif
         repr_attr_dict = {key: getattr(self, key) for key in ['in_dim', 'in_drop_rates', 'agg_mode', 'criterion']}
         return self._repr_non_config_attrs(repr_attr_dict)
         
-    def build_vocab(self, *partitions):
-        ck_counter = Counter(label for data in partitions for entry in data for label, start, end in entry['chunks'])
-        self.idx2ck_label = [self.ck_none_label] + list(ck_counter.keys())
-        rel_counter = Counter(label for data in partitions for entry in data for label, head, tail in entry['relations'])
-        self.idx2rel_label = [self.rel_none_label] + list(rel_counter.keys())
-        ht_counter = Counter((head[0], tail[0]) for data in partitions for entry in data for label, head, tail in entry['relations'])
-        self.legal_head_tail_types = set(list(ht_counter.keys()))
+    def init_stats(self):
+        return {'ck_counter': Counter(), 'rel_counter': Counter(), 'ht_counter': Counter(), 'dist_counter': Counter()}
+        
+    def update_stats(self, stats: dict, entry: dict):
+        stats['ck_counter'].update(label for label, start, end in entry['chunks'])
+        stats['rel_counter'].update(label for label, head, tail in entry['relations'])
+        stats['ht_counter'].update((head[0], tail[0]) for label, head, tail in entry['relations'])
+        stats['dist_counter'].update(chunk_pair_distance(head, tail) for label, head, tail in entry['relations'])
+        
+    def build_vocab_from_stats(self, stats: dict):
+        self.idx2ck_label = [self.ck_none_label] + list(stats['ck_counter'].keys())
+        self.idx2rel_label = [self.rel_none_label] + list(stats['rel_counter'].keys())
+        self.legal_head_tail_types = set(list(stats['ht_counter'].keys()))
         
-        dist_counter = Counter(chunk_pair_distance(head, tail) for data in partitions for entry in data for label, head, tail in entry['relations'])
+        dist_counter = stats['dist_counter']
         num_pairs = sum(dist_counter.values())
         num_oov_pairs = sum(num for dist, num in dist_counter.items() if dist > self.max_pair_distance)
         if num_oov_pairs > 0:
@@ -238,7 +281,7 @@ class SpanRelClassificationDecoder(DecoderBase, SpanRelClassificationDecoderMixi
         self.hid2logit = torch.nn.Linear(config.in_dim*3+config.ck_size_emb_dim*2+config.ck_label_emb_dim*2, config.rel_voc_dim)
         reinit_layer_(self.hid2logit, 'sigmoid')
         
-        self.criterion = config.instantiate_criterion(reduction='sum')
+        self.criterion = config.instantiate_criterion(reduction='none')
         
         
     def get_logits(self, batch: Batch, full_hidden: torch.Tensor):
@@ -299,11 +342,11 @@ class SpanRelClassificationDecoder(DecoderBase, SpanRelClassificationDecoderMixi
     def forward(self, batch: Batch, full_hidden: torch.Tensor):
         batch_logits = self.get_logits(batch, full_hidden)
         
-        losses = [self.criterion(batch_logits[k], batch.chunk_pairs_objs[k].rel_label_ids) 
-                      if len(batch.chunk_pairs_objs[k].chunk_pairs) > 0
-                      else torch.tensor(0.0, device=full_hidden.device)
-                      for k in range(full_hidden.size(0))]
-        return torch.stack(losses)
+        # The targets may be built on the fly (e.g., in joint modeling), hence padded here instead of in `batchify`
+        # batch_logits: (batch, num_pairs, rel_voc_dim); rel_label_ids: (batch, num_pairs)
+        batch_logits, non_mask = pad_targets(batch_logits)
+        rel_label_ids, _ = pad_targets([chunk_pairs_obj.rel_label_ids for chunk_pairs_obj in batch.chunk_pairs_objs])
+        return self._batched_losses(batch_logits, rel_label_ids, non_mask)
     
     
     def decode(self, batch: Batch, full_hidden: torch.Tensor):
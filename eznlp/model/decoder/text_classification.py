@@ -56,11 +56,14 @@ class TextClassificationDecoderConfig(SingleDecoderConfigBase, TextClassificatio
         repr_attr_dict = {key: getattr(self, key) for key in ['in_dim', 'in_drop_rates', 'agg_mode', 'criterion']}
         return self._repr_non_config_attrs(repr_attr_dict)
         
-    def build_vocab(self, *partitions):
-        counter = Counter()
-        for data in partitions:
-            counter.update([data_entry['label'] for data_entry in data])
-        self.idx2label = list(counter.keys())
+    def init_stats(self):
+        return {'counter': Counter()}
+        
+    def update_stats(self, stats: dict, entry: dict):
+        stats['counter'][entry['label']] += 1
+        
+    def build_vocab_from_stats(self, stats: dict):
+        self.idx2label = list(stats['counter'].keys())
         
     def instantiate(self):
         return TextClassificationDecoder(self)
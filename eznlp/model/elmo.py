@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import List, TYPE_CHECKING
 import torch
-import allennlp.modules
+if TYPE_CHECKING:
+    import allennlp.modules
 
 from ..token import TokenSequence
 from ..config import Config
@@ -37,7 +38,8 @@ class ELMoConfig(Config):
         
     def batchify(self, batch_ex: List[dict]):
         batch_tokenized_raw_text = [ex['tokenized_raw_text'] for ex in batch_ex]
-        return {'char_ids': allennlp.modules.elmo.batch_to_ids(batch_tokenized_raw_text)}
+        from allennlp.modules.elmo import batch_to_ids
+        return {'char_ids': batch_to_ids(batch_tokenized_raw_text)}
         
     def instantiate(self):
         return ELMoEmbedder(self)
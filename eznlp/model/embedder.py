@@ -2,13 +2,15 @@
 from typing import List
 from collections import Counter
 import logging
+import numpy
 import torch
 
 from ..token import TokenSequence
 from ..nn import SinusoidPositionalEncoding
 from ..nn.init import reinit_embedding_, reinit_embedding_by_pretrained_, reinit_layer_
 from ..config import Config
-from ..vocab import Vocab
+from ..vocab import Vocab, FrozenVocab
+from ..statistics import StatsMixin
 from ..vectors import Vectors
 
 logger = logging.getLogger(__name__)
@@ -42,7 +44,7 @@ class VocabMixin(object):
 
 
 
-class OneHotConfig(Config, VocabMixin):
+class OneHotConfig(Config, VocabMixin, StatsMixin):
     """Config of an one-hot embedder.
     """
     def __init__(self, **kwargs):
@@ -53,6 +55,9 @@ class OneHotConfig(Config, VocabMixin):
         self.has_sos = kwargs.pop('has_sos', False)
         self.has_eos = kwargs.pop('has_eos', False)
         self.min_freq = kwargs.pop('min_freq', 1)
+        # `dict`: Python dict-based `Vocab`; `frozen`/`hashed`: numpy array-based `FrozenVocab`, for large vocabularies 
+        self.vocab_backend = kwargs.pop('vocab_backend', 'dict')
+        assert self.vocab_backend.lower() in ('dict', 'frozen', 'hashed')
         
         self.emb_dim = kwargs.pop('emb_dim', 100)
         self.vectors: Vectors = kwargs.pop('vectors', None)
@@ -65,6 +70,8 @@ class OneHotConfig(Config, VocabMixin):
         
         self.freeze = kwargs.pop('freeze', False)
         assert not (self.freeze and self.vectors is None)
+        # Pretrained vectors are looked up by tokens, which a hashed vocabulary does not keep
+        assert not (self.vocab_backend.lower() == 'hashed' and self.vectors is not None)
         
         self.has_positional_emb = kwargs.pop('has_positional_emb', False)
         self.sin_positional_emb = kwargs.pop('sin_positional_emb', False)
@@ -97,22 +104,31 @@ class OneHotConfig(Config, VocabMixin):
             x_list = x_list + ['<eos>']
         return x_list
         
-    def build_vocab(self, *partitions):
-        counter = Counter()
-        for data in partitions:
-            for entry in data:
-                field_seq = self._get_field(entry[self.tokens_key])
-                counter.update(field_seq)
-                if self.max_len is None or len(field_seq) > self.max_len:
-                    self.max_len = len(field_seq)
+    def init_stats(self):
+        return {'counter': Counter(), 'max_len': 0}
         
-        self.vocab = Vocab(counter, min_freq=self.min_freq, specials=self.specials, specials_first=True)
+    def update_stats(self, stats: dict, entry: dict):
+        field_seq = self._get_field(entry[self.tokens_key])
+        stats['counter'].update(field_seq)
+        stats['max_len'] = max(stats['max_len'], len(field_seq))
+        
+    def build_vocab_from_stats(self, stats: dict):
+        if self.max_len is None or stats['max_len'] > self.max_len:
+            self.max_len = stats['max_len']
+        self.vocab = self._build_vocab_from_counter(stats['counter'])
+        
+    def _build_vocab_from_counter(self, counter: Counter):
+        vocab = Vocab(counter, min_freq=self.min_freq, specials=self.specials, specials_first=True)
+        if self.vocab_backend.lower() == 'dict':
+            return vocab
+        else:
+            return vocab.freeze(hashed=(self.vocab_backend.lower() == 'hashed'))
         
         
     def exemplify(self, tokens: TokenSequence):
         # It is generally recommended to return cpu tensors in multi-process loading. 
         # See https://pytorch.org/docs/stable/data.html#single-and-multi-process-data-loading
-        return torch.tensor([self.vocab[x] for x in self._get_field(tokens)], dtype=torch.long)
+        return torch.from_numpy(self.vocab.lookup_array(self._get_field(tokens)))
         
     def batchify(self, batch_ids: List[torch.LongTensor]):
         return torch.nn.utils.rnn.pad_sequence(batch_ids, batch_first=True, padding_value=self.pad_idx)
@@ -194,7 +210,12 @@ class MultiHotConfig(Config):
         self.in_dim = getattr(tokens, self.field)[0].shape[0]
         
     def exemplify(self, tokens: TokenSequence):
-        return torch.tensor(getattr(tokens, self.field), dtype=torch.float)
+        values = getattr(tokens, self.field)
+        if isinstance(values, numpy.ndarray):
+            # Sequence-level features (e.g., `en_shape_features`) are computed as a matrix of (step, in_dim)
+            return torch.from_numpy(values).float()
+        else:
+            return torch.tensor(values, dtype=torch.float)
         
     def batchify(self, batch_values: List[torch.FloatTensor]):
         return torch.nn.utils.rnn.pad_sequence(batch_values, batch_first=True, padding_value=0.0)
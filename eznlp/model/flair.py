@@ -1,13 +1,46 @@
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import List, TYPE_CHECKING
+import inspect
 import torch
-import flair
+if TYPE_CHECKING:
+    import flair
 
 from ..token import TokenSequence
 from ..nn.modules import SequenceGroupAggregating
 from ..config import Config
 
 
+def load_flair_lm(model_file: str, device='cpu'):
+    """Load a `flair.models.LanguageModel` to `device`. 
+
+    Unlike `flair.models.LanguageModel.load_language_model`, the tensors are mapped to `device` explicitly, 
+    instead of the global `flair.device`, which is left untouched. 
+    """
+    import flair
+    load_kwargs = {'weights_only': False} if 'weights_only' in inspect.signature(torch.load).parameters else {}
+    state = torch.load(str(model_file), map_location=device, **load_kwargs)
+    
+    has_decoder = state.get('has_decoder', True)
+    lm_kwargs = {'dictionary': state['dictionary'], 
+                 'is_forward_lm': state['is_forward_lm'], 
+                 'hidden_size': state['hidden_size'], 
+                 'nlayers': state['nlayers'], 
+                 'embedding_size': state['embedding_size'], 
+                 'nout': state['nout'], 
+                 'dropout': state['dropout'], 
+                 'document_delimiter': state.get('document_delimiter', "\n"), 
+                 'recurrent_type': state.get('recurrent_type', 'lstm'), 
+                 'has_decoder': has_decoder}
+    # Older versions of `flair` do not support all the arguments
+    lm_params = inspect.signature(flair.models.LanguageModel.__init__).parameters
+    flair_lm = flair.models.LanguageModel(**{k: v for k, v in lm_kwargs.items() if k in lm_params})
+    flair_lm.load_state_dict(state['state_dict'], strict=has_decoder)
+    flair_lm.eval()
+    flair_lm.to(device)
+    return flair_lm
+
+
+
 class FlairConfig(Config):
     def __init__(self, **kwargs):
         self.flair_lm: flair.models.LanguageModel = kwargs.pop('flair_lm')
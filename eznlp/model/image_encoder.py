@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from typing import List
 import torch
-import torchvision
 
 from ..config import Config
 
@@ -40,6 +39,7 @@ class ImageEncoderConfig(Config):
         
         
     def _read_image(self, img_path: str):
+        import torchvision
         img = torchvision.io.read_image(img_path).float().div(255)
         assert img.dim() == 3
         if img.size(0) == 1 and self.in_channels > 1:
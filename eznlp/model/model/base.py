@@ -27,11 +27,30 @@ class ModelConfigBase(Config):
     def __repr__(self):
         return self._repr_config_attrs(self.__dict__)
         
-    def build_vocabs_and_dims(self, *partitions):
+    def build_vocabs_and_dims(self, *partitions, num_workers: int=0):
         raise NotImplementedError("Not Implemented `build_vocabs_and_dims`")
         
+    def is_stochastic(self, training: bool=True):
+        return self.decoder.is_stochastic(training)
+        
+    def estimate_cost(self, entry: dict):
+        return self.decoder.estimate_cost(entry)
+        
+    def exemplify_static(self, entry: dict, training: bool=True):
+        """The deterministic part of `exemplify`, which is allowed to be computed once and cached. 
+        """
+        raise NotImplementedError("Not Implemented `exemplify_static`")
+        
+    def exemplify_stochastic(self, entry: dict, example: dict, training: bool=True):
+        """The stochastic part of `exemplify`, which should be re-computed on every access. 
+        `example` is the (possibly cached) output of `exemplify_static`, which should not be modified in place. 
+        """
+        return self.decoder.exemplify_stochastic(entry, example, training=training)
+        
     def exemplify(self, entry: dict, training: bool=True):
-        raise NotImplementedError("Not Implemented `exemplify`")
+        example = self.exemplify_static(entry, training=training)
+        example.update(self.exemplify_stochastic(entry, example, training=training))
+        return example
         
     def batchify(self, batch_examples: List[dict]):
         raise NotImplementedError("Not Implemented `batchify`")
@@ -5,6 +5,7 @@ import torch
 from ...wrapper import Batch
 from ...nn.functional import mask2seq_lens
 from ...config import Config, ConfigDict
+from ...statistics import build_vocabs, merge_stats
 from ..embedder import OneHotConfig
 from ..encoder import EncoderConfig
 from ..nested_embedder import SoftLexiconConfig
@@ -70,21 +71,28 @@ class ClassifierConfig(ModelConfigBase):
         full_hid_dim += sum(getattr(self, name).out_dim for name in self._pretrained_names if getattr(self, name) is not None)
         return full_hid_dim
         
-    def build_vocabs_and_dims(self, *partitions):
+    def build_vocabs_and_dims(self, *partitions, num_workers: int=0):
+        # The vocabularies of all embedders and the decoder are built by a single pass over the data
+        components = {}
         if self.ohots is not None:
-            for c in self.ohots.values():
-                c.build_vocab(*partitions)
+            components.update({f"ohots.{f}": c for f, c in self.ohots.items()})
+        if self.nested_ohots is not None:
+            components.update({f"nested_ohots.{f}": c for f, c in self.nested_ohots.items()})
+        components['decoder'] = self.decoder
+        partition_stats = build_vocabs(components, partitions, num_workers=num_workers)
         
         if self.mhots is not None:
             for c in self.mhots.values():
                 c.build_dim(partitions[0][0]['tokens'])
         
         if self.nested_ohots is not None:
-            for c in self.nested_ohots.values():
-                c.build_vocab(*partitions)
+            for f, c in self.nested_ohots.items():
                 if isinstance(c, SoftLexiconConfig):
                     # Skip the last split (assumed to be test set)
-                    c.build_freqs(*partitions[:-1])
+                    stats = c.init_stats()
+                    for p_stats in partition_stats[:-1]:
+                        stats = merge_stats(stats, p_stats[f"nested_ohots.{f}"])
+                    c.build_freqs_from_stats(stats)
         
         if self.intermediate1 is not None:
             self.intermediate1.in_dim = self.full_emb_dim
@@ -95,10 +103,8 @@ class ClassifierConfig(ModelConfigBase):
         else:
             self.decoder.in_dim = self.full_hid_dim
         
-        self.decoder.build_vocab(*partitions)
-        
         
-    def exemplify(self, data_entry: dict, training: bool=True):
+    def exemplify_static(self, data_entry: dict, training: bool=True):
         example = {}
         
         if self.ohots is not None:
@@ -114,7 +120,7 @@ class ClassifierConfig(ModelConfigBase):
             if getattr(self, name) is not None:
                 example[name] = getattr(self, name).exemplify(data_entry['tokens'])
         
-        example.update(self.decoder.exemplify(data_entry, training=training))
+        example.update(self.decoder.exemplify_static(data_entry, training=training))
         return example
         
         
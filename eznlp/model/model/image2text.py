@@ -2,6 +2,7 @@
 from typing import List
 
 from ...wrapper import Batch
+from ...statistics import build_vocabs
 from ..embedder import OneHotConfig
 from ..image_encoder import ImageEncoderConfig
 from ..decoder import GeneratorConfig
@@ -24,16 +25,21 @@ class Image2TextConfig(ModelConfigBase):
         self.decoder = kwargs.pop('decoder', GeneratorConfig(embedding=OneHotConfig(tokens_key='trg_tokens', field='text', has_sos=True, has_eos=True)))
         super().__init__(**kwargs)
         
-    def build_vocabs_and_dims(self, *partitions):
-        self.decoder.build_vocab(*partitions)
+    def build_vocabs_and_dims(self, *partitions, num_workers: int=0):
+        build_vocabs({'decoder': self.decoder}, partitions, num_workers=num_workers)
         self.decoder.in_dim = self.encoder.out_dim
         
-    def exemplify(self, entry: dict, training: bool=True):
+    def exemplify_static(self, entry: dict, training: bool=True):
         example = {}
-        example.update(self.encoder.exemplify(entry, training=training))
-        example.update(self.decoder.exemplify(entry, training=training))
+        example.update(self.decoder.exemplify_static(entry, training=training))
         return example
         
+    def exemplify_stochastic(self, entry: dict, example: dict, training: bool=True):
+        # `transforms` may include random augmentation
+        stochastic_example = self.encoder.exemplify(entry, training=training)
+        stochastic_example.update(super().exemplify_stochastic(entry, example, training=training))
+        return stochastic_example
+        
     def batchify(self, batch_examples: List[dict]):
         batch = {}
         batch.update(self.encoder.batchify(batch_examples))
@@ -2,6 +2,7 @@
 from typing import List
 
 from ...wrapper import Batch
+from ...statistics import build_vocabs
 from ..embedder import OneHotConfig
 from ..encoder import EncoderConfig
 from ..decoder import GeneratorConfig
@@ -26,16 +27,15 @@ class Text2TextConfig(ModelConfigBase):
         self.decoder = kwargs.pop('decoder', GeneratorConfig(embedding=OneHotConfig(tokens_key='trg_tokens', field='text', has_sos=True, has_eos=True)))
         super().__init__(**kwargs)
         
-    def build_vocabs_and_dims(self, *partitions):
-        self.embedder.build_vocab(*partitions)
-        self.decoder.build_vocab(*partitions)
+    def build_vocabs_and_dims(self, *partitions, num_workers: int=0):
+        build_vocabs({'embedder': self.embedder, 'decoder': self.decoder}, partitions, num_workers=num_workers)
         self.encoder.in_dim = self.embedder.out_dim
         self.decoder.in_dim = self.encoder.out_dim
         
-    def exemplify(self, entry: dict, training: bool=True):
+    def exemplify_static(self, entry: dict, training: bool=True):
         example = {}
         example['tok_ids'] = self.embedder.exemplify(entry['tokens'])
-        example.update(self.decoder.exemplify(entry, training=training))
+        example.update(self.decoder.exemplify_static(entry, training=training))
         return example
         
     def batchify(self, batch_examples: List[dict]):
@@ -4,7 +4,6 @@ from collections import Counter
 import torch
 
 from ..token import TokenSequence
-from ..vocab import Vocab
 from ..nn.modules import SequencePooling
 from ..nn.functional import seq_lens2mask
 from .embedder import OneHotConfig, OneHotEmbedder
@@ -54,22 +53,17 @@ class NestedOneHotConfig(OneHotConfig):
                 yield from tok_field
         
         
-    def build_vocab(self, *partitions):
-        counter = Counter()
-        for data in partitions:
-            for data_entry in data:
-                for inner_seq in self._inner_sequences(data_entry[self.tokens_key]):
-                    counter.update(inner_seq)
-                    if self.max_len is None or len(inner_seq) > self.max_len:
-                        self.max_len = len(inner_seq)
+    def init_stats(self):
+        return {'counter': Counter(), 'max_len': 0}
         
-        self.vocab = Vocab(counter, min_freq=self.min_freq, specials=self.specials, specials_first=True)
+    def update_stats(self, stats: dict, entry: dict):
+        for inner_seq in self._inner_sequences(entry[self.tokens_key]):
+            stats['counter'].update(inner_seq)
+            stats['max_len'] = max(stats['max_len'], len(inner_seq))
         
         
     def exemplify(self, tokens: TokenSequence):
-        inner_ids_list = []
-        for inner_seq in self._inner_sequences(tokens):
-            inner_ids_list.append(torch.tensor([self.vocab[x] for x in inner_seq]))
+        inner_ids_list = [torch.from_numpy(inner_ids) for inner_ids in self.vocab.lookup_batch(list(self._inner_sequences(tokens)))]
         
         # inner_ids: (step*num_channels, inner_step)
         return {'inner_ids': inner_ids_list}
@@ -166,12 +160,14 @@ class SoftLexiconConfig(NestedOneHotConfig):
         In addition, note that the frequency of `w` does not increase if `w` is 
         covered by another sub-sequence that matches the lexicon
         """
-        counter = Counter()
+        stats = self.init_stats()
         for data in partitions:
-            for data_entry in data:
-                for inner_seq in self._inner_sequences(data_entry[self.tokens_key]):
-                    counter.update(inner_seq)
+            for entry in data:
+                self.update_stats(stats, entry)
+        self.build_freqs_from_stats(stats)
         
+    def build_freqs_from_stats(self, stats: dict):
+        counter = stats['counter']
         # NOTE: Set the minimum frequecy as 1, to avoid OOV tokens being ignored
         self.freqs = {tok: 1 for tok in self.vocab.itos}
         self.freqs.update(counter)
@@ -29,23 +29,21 @@ def reinit_embedding_by_pretrained_(embedding: torch.nn.Embedding,
     assert embedding.weight.size(1) == vectors.emb_dim
     uniform_range = (3 / embedding.weight.size(1)) ** 0.5
     
-    oov = []
-    acc_vec_abs = 0
-    for idx, tok in enumerate(itos):
-        pretrained_vec = vectors.lookup(tok)
-        if pretrained_vec is not None:
-            acc_vec_abs += pretrained_vec.abs().mean().item()
-            embedding.weight.data[idx].copy_(pretrained_vec)
-        else:
-            oov.append(tok)
-            if oov_init.lower() == 'zeros':
-                torch.nn.init.zeros_(embedding.weight.data[idx])
-            elif oov_init.lower() == 'uniform':
-                torch.nn.init.uniform_(embedding.weight.data[idx], -uniform_range, uniform_range)
+    # Look up all tokens at once, and then copy the pretrained vectors by one gather
+    indices = torch.from_numpy(vectors.lookup_indices(itos))
+    is_found = indices >= 0
+    oov = [tok for tok, found in zip(itos, is_found.tolist()) if not found]
+    
+    pretrained_vecs = vectors.vectors[indices[is_found]].to(embedding.weight.device)
+    embedding.weight.data[is_found] = pretrained_vecs.to(embedding.weight.dtype)
+    if oov_init.lower() == 'zeros':
+        embedding.weight.data[~is_found] = 0
+    elif oov_init.lower() == 'uniform':
+        embedding.weight.data[~is_found] = torch.empty(len(oov), embedding.weight.size(1), device=embedding.weight.device).uniform_(-uniform_range, uniform_range)
     
     if embedding.padding_idx is not None:
         torch.nn.init.zeros_(embedding.weight.data[embedding.padding_idx])
-    ave_vec_abs = acc_vec_abs / (len(itos) - len(oov))
+    ave_vec_abs = pretrained_vecs.abs().mean(dim=1).sum().item() / (len(itos) - len(oov))
     
     if oov_init.lower() == 'zeros':
         oov_vec_abs = 0.0
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
-import transformers
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    import transformers
 
 from ..config import Config
 
@@ -1,8 +1,9 @@
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import List, TYPE_CHECKING
 import random
 import torch
-import transformers
+if TYPE_CHECKING:
+    import transformers
 
 from ..nn.functional import seq_lens2mask
 from .base import PreTrainingConfig
@@ -26,6 +27,7 @@ class MaskedLMConfig(PreTrainingConfig):
         
         # Sentence pair task: None/NSP/SOP
         self.paired_task = kwargs.pop('paired_task', 'None')
+        import transformers
         if self.paired_task.lower() == 'none':
             assert isinstance(self.bert_like, transformers.BertForMaskedLM)
         else:
@@ -34,6 +36,12 @@ class MaskedLMConfig(PreTrainingConfig):
         super().__init__(**kwargs)
         
         
+    def __getstate__(self):
+        # Do not pickle the (large) model, e.g., to `DataLoader` workers
+        state = self.__dict__.copy()
+        state['bert_like'] = None
+        return state
+        
     @property
     def mlm_label_mask_id(self):
         # transformers/models/bert/modeling_bert.py/BertForPreTraining
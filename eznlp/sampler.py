@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+from typing import List
+import random
+import torch
+
+
+class LengthBucketBatchSampler(torch.utils.data.Sampler):
+    """A batch sampler yielding batches of similar-length sequences, to reduce the padding waste.
+    
+    In each epoch, the indices are randomly shuffled and split into buckets of `batch_size * num_batches_per_bucket`;
+    the indices are sorted by length within each bucket and then split into batches; the batches are finally shuffled.
+    Hence, the batches are different across epochs, while the sequences in a batch are of similar lengths.
+    
+    Parameters
+    ----------
+    lengths: List[int]
+        The lengths of all sequences in the dataset (e.g., `Dataset.seq_lens`).
+    shuffle: bool
+        If False, the indices are globally sorted by length and the batches are yielded in order.
+    
+    Examples
+    --------
+    >>> sampler = LengthBucketBatchSampler(train_set.seq_lens, batch_size=32)
+    >>> train_loader = torch.utils.data.DataLoader(train_set, batch_sampler=sampler, collate_fn=train_set.collate)
+    """
+    def __init__(self, lengths: List[int], batch_size: int, num_batches_per_bucket: int=50, shuffle: bool=True, drop_last: bool=False, seed: int=None):
+        assert batch_size > 0 and num_batches_per_bucket > 0
+        self.lengths = list(lengths)
+        self.batch_size = batch_size
+        self.bucket_size = batch_size * num_batches_per_bucket
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.rng = random.Random(seed)
+        
+        
+    def _num_batches(self, num_indices: int):
+        if self.drop_last:
+            return num_indices // self.batch_size
+        else:
+            return (num_indices + self.batch_size - 1) // self.batch_size
+        
+    def __len__(self):
+        if self.shuffle:
+            return sum(self._num_batches(min(self.bucket_size, len(self.lengths)-start))
+                           for start in range(0, len(self.lengths), self.bucket_size))
+        else:
+            return self._num_batches(len(self.lengths))
+        
+        
+    def _batches_from_sorted(self, indices: List[int]):
+        for start in range(0, len(indices), self.batch_size):
+            batch = indices[start:start+self.batch_size]
+            if len(batch) == self.batch_size or not self.drop_last:
+                yield batch
+        
+        
+    def __iter__(self):
+        if not self.shuffle:
+            indices = sorted(range(len(self.lengths)), key=lambda i: self.lengths[i])
+            yield from self._batches_from_sorted(indices)
+            return
+        
+        indices = list(range(len(self.lengths)))
+        self.rng.shuffle(indices)
+        
+        batches = []
+        for start in range(0, len(indices), self.bucket_size):
+            # `sorted` is stable, so the ties remain randomly ordered
+            bucket = sorted(indices[start:start+self.bucket_size], key=lambda i: self.lengths[i])
+            batches.extend(self._batches_from_sorted(bucket))
+        
+        self.rng.shuffle(batches)
+        yield from batches
+
+
+
+class TokenBudgetBatchSampler(LengthBucketBatchSampler):
+    """A batch sampler packing examples up to a budget of computational cost. 
+    
+    The cost of a batch is estimated as the maximum cost of its examples multiplied by the batch size (i.e., padded), 
+    where the cost of each example is estimated by the decoder (e.g., L for sequence tagging, L^2 for boundary selection). 
+    Hence, short sequences are packed into large batches, while long sequences are packed into small batches. 
+    An example exceeding the budget forms a batch by itself. 
+    
+    Parameters
+    ----------
+    costs: List[int]
+        The estimated costs of all examples in the dataset (e.g., `Dataset.costs`). 
+    max_cost: int
+        The cost budget of a batch. 
+    bucket_size: int
+        The number of examples in a bucket. 
+    
+    Examples
+    --------
+    >>> sampler = TokenBudgetBatchSampler(train_set.costs, max_cost=4096)
+    >>> train_loader = torch.utils.data.DataLoader(train_set, batch_sampler=sampler, collate_fn=train_set.collate)
+    """
+    def __init__(self, costs: List[int], max_cost: int, bucket_size: int=1000, shuffle: bool=True, seed: int=None):
+        assert max_cost > 0 and bucket_size > 0
+        self.lengths = list(costs)
+        self.max_cost = max_cost
+        self.bucket_size = bucket_size
+        self.shuffle = shuffle
+        self.drop_last = False
+        self.rng = random.Random(seed)
+        # The batches of the next epoch, which are generated in advance if `__len__` is invoked
+        self._next_batches = None
+        
+        
+    def _batches_from_sorted(self, indices: List[int]):
+        batch, batch_max_cost = [], 0
+        for i in indices:
+            curr_max_cost = max(batch_max_cost, self.lengths[i])
+            if len(batch) > 0 and curr_max_cost * (len(batch)+1) > self.max_cost:
+                yield batch
+                batch, curr_max_cost = [], self.lengths[i]
+            batch.append(i)
+            batch_max_cost = curr_max_cost
+        
+        if len(batch) > 0:
+            yield batch
+        
+        
+    def __len__(self):
+        # The number of batches varies across epochs if shuffled
+        if self._next_batches is None:
+            self._next_batches = list(super().__iter__())
+        return len(self._next_batches)
+        
+    def __iter__(self):
+        if self._next_batches is None:
+            batches = list(super().__iter__())
+        else:
+            batches = self._next_batches
+            self._next_batches = None
+        yield from batches
+
+
+
+class ShardedRandomSampler(torch.utils.data.Sampler):
+    """A sampler over the local shard of data in distributed training, where each process holds a different shard 
+    (e.g., read by `RawTextIO.read` with `rank` and `world_size`). 
+    
+    The indices are reshuffled in every epoch, deterministically given `seed` and the epoch set by `set_epoch`. 
+    All processes should yield the same number of samples, otherwise the distributed training would hang; 
+    hence, the indices are truncated or cyclically padded to `num_samples`. 
+    
+    Parameters
+    ----------
+    num_local: int
+        The number of examples in the local shard. 
+    num_samples: int
+        The number of samples in an epoch, typically the minimum `num_local` across processes. 
+    """
+    def __init__(self, num_local: int, num_samples: int=None, shuffle: bool=True, seed: int=0):
+        assert num_local > 0
+        self.num_local = num_local
+        self.num_samples = num_local if num_samples is None else num_samples
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        
+        
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+        
+    def __len__(self):
+        return self.num_samples
+        
+    def __iter__(self):
+        if self.shuffle:
+            generator = torch.Generator()
+            generator.manual_seed(self.seed + self.epoch)
+            indices = torch.randperm(self.num_local, generator=generator).tolist()
+        else:
+            indices = list(range(self.num_local))
+        
+        if self.num_samples > self.num_local:
+            indices = (indices * (self.num_samples // self.num_local + 1))[:self.num_samples]
+        else:
+            indices = indices[:self.num_samples]
+        
+        yield from indices
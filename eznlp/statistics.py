@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+from typing import List, Dict
+from collections import Counter
+import multiprocessing
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def merge_stats(stats, other):
+    """Merge `other` into `stats` (inplace for mutable values), and return the merged statistics. 
+    
+    `Counter`s are summed (preserving the first-seen order of keys), `set`s are united, `bool`s are or-ed, 
+    `int`s take the maximum, and `dict`s and `list`s are merged element-wise. 
+    """
+    if isinstance(stats, Counter):
+        stats.update(other)
+        return stats
+    elif isinstance(stats, set):
+        stats |= other
+        return stats
+    elif isinstance(stats, bool):
+        return stats or other
+    elif isinstance(stats, int):
+        return max(stats, other)
+    elif isinstance(stats, dict):
+        for key, value in other.items():
+            stats[key] = merge_stats(stats[key], value) if key in stats else value
+        return stats
+    elif isinstance(stats, list):
+        assert len(stats) == len(other)
+        for k, value in enumerate(other):
+            stats[k] = merge_stats(stats[k], value)
+        return stats
+    else:
+        raise TypeError(f"Invalid type of statistics: {type(stats)}")
+
+
+
+class StatsMixin(object):
+    """The protocol of configs whose vocabularies (or other data-dependent attributes) are built by
+    statistics collected over data entries. 
+    
+    The statistics should be mergeable by `merge_stats`, so that they can be collected in a single pass
+    (shared by all components of a model) and in parallel over data shards. 
+    """
+    def init_stats(self):
+        return {}
+        
+    def update_stats(self, stats: dict, entry: dict):
+        raise NotImplementedError("Not Implemented `update_stats`")
+        
+    def build_vocab_from_stats(self, stats: dict):
+        raise NotImplementedError("Not Implemented `build_vocab_from_stats`")
+        
+    def build_vocab(self, *partitions):
+        stats = self.init_stats()
+        for data in partitions:
+            for entry in data:
+                self.update_stats(stats, entry)
+        self.build_vocab_from_stats(stats)
+
+
+
+def _collect_shard_stats(components: Dict[str, StatsMixin], entries):
+    shard_stats = {name: c.init_stats() for name, c in components.items()}
+    for entry in entries:
+        for name, c in components.items():
+            c.update_stats(shard_stats[name], entry)
+    return shard_stats
+
+
+# The components and partitions are passed to the forked workers by inheritance, instead of pickling
+_worker_args = None
+
+def _collect_shard_stats_in_worker(shard: tuple):
+    components, partitions = _worker_args
+    k, start, end = shard
+    return _collect_shard_stats(components, (partitions[k][i] for i in range(start, end)))
+
+
+def collect_stats(components: Dict[str, StatsMixin], partitions: List[List[dict]], num_workers: int=0, shard_size: int=2000):
+    """Collect the statistics of all `components` in a single pass over `partitions`. 
+    
+    Parameters
+    ----------
+    components: Dict[str, StatsMixin]
+        The configs to collect statistics for. 
+    partitions: List[List[dict]]
+        The data partitions (e.g., train/dev/test splits). 
+    num_workers: int
+        If positive, the partitions are split into shards of `shard_size` entries, which are processed
+        by a pool of forked processes. The shard statistics are merged in order, hence the results are
+        identical to those of a sequential pass. 
+    
+    Returns
+    -------
+    List[Dict[str, dict]]
+        The statistics of each partition. 
+    """
+    global _worker_args
+    if num_workers > 0 and 'fork' not in multiprocessing.get_all_start_methods():
+        logger.warning("The `fork` start method is unavailable, statistics are collected sequentially")
+        num_workers = 0
+    
+    if num_workers <= 0:
+        return [_collect_shard_stats(components, data) for data in partitions]
+    
+    shards = [(k, start, min(start+shard_size, len(data))) for k, data in enumerate(partitions) for start in range(0, len(data), shard_size)]
+    _worker_args = (components, partitions)
+    try:
+        with multiprocessing.get_context('fork').Pool(num_workers) as pool:
+            list_shard_stats = pool.map(_collect_shard_stats_in_worker, shards, chunksize=1)
+    finally:
+        _worker_args = None
+    
+    partition_stats = [{name: c.init_stats() for name, c in components.items()} for _ in partitions]
+    for (k, *_), shard_stats in zip(shards, list_shard_stats):
+        partition_stats[k] = merge_stats(partition_stats[k], shard_stats)
+    return partition_stats
+
+
+def build_vocabs(components: Dict[str, StatsMixin], partitions: List[List[dict]], num_workers: int=0):
+    """Build the vocabularies of all `components` with statistics collected in a single pass. 
+    
+    Returns
+    -------
+    List[Dict[str, dict]]
+        The statistics of each partition, which may be re-used (e.g., for statistics over a subset of partitions). 
+    """
+    partition_stats = collect_stats(components, partitions, num_workers=num_workers)
+    stats = {name: c.init_stats() for name, c in components.items()}
+    for p_stats in partition_stats:
+        stats = merge_stats(stats, p_stats)
+    
+    for name, c in components.items():
+        c.build_vocab_from_stats(stats[name])
+    return partition_stats
@@ -1,12 +1,13 @@
 # -*- coding: utf-8 -*-
 from typing import List, Iterable
-from collections import OrderedDict
-from functools import cached_property
+from collections import OrderedDict, deque
+from functools import cached_property, lru_cache, partial
 import string
 import re
-import hanziconv
-import spacy
-import jieba
+import numbers
+import threading
+import multiprocessing
+import sys
 import numpy
 
 
@@ -177,20 +178,184 @@ _number_normalizers = {'none': lambda x: x,
                        'zeros': lambda x: digit_re.sub('0', x)}
 
 
-def _pipeline(*normalizers):
-    def pipeline_normalizer(x):
-        for f in normalizers:
-            x = f(x)
-        return x
+def _normalize_text_uncached(raw_text: str, case_mode='None', number_mode='None', to_half=True, to_zh_simplified=False, post_text_normalizer=None):
+    text = _case_normalizers[case_mode.lower()](raw_text)
+    text = _number_normalizers[number_mode.lower()](text)
+    if to_half:
+        text = Full2Half.full2half(text)
+    if to_zh_simplified:
+        import hanziconv
+        text = hanziconv.HanziConv.toSimplified(text)
+    if callable(post_text_normalizer):
+        text = post_text_normalizer(text)
+    return text
+
+
+# Corpora are Zipfian, so each distinct (raw_text, settings) is normalized once and the resulting string is shared
+TEXT_NORMALIZATION_CACHE_SIZE = 2**18
+_normalize_text_cached = lru_cache(maxsize=TEXT_NORMALIZATION_CACHE_SIZE)(_normalize_text_uncached)
+
+def _normalize_text(raw_text: str, case_mode='None', number_mode='None', to_half=True, to_zh_simplified=False, post_text_normalizer=None):
+    try:
+        return _normalize_text_cached(raw_text, case_mode, number_mode, to_half, to_zh_simplified, post_text_normalizer)
+    except TypeError:
+        # Unhashable `post_text_normalizer`
+        return _normalize_text_uncached(raw_text, case_mode, number_mode, to_half, to_zh_simplified, post_text_normalizer)
+
+
+def text_normalization_cache_info():
+    """Return the statistics (`hits`, `misses`, `maxsize`, `currsize`) of the text normalization cache, 
+    which is shared by all `Token` constructions (hence all IO readers). 
+    """
+    return _normalize_text_cached.cache_info()
+
+
+def set_text_normalization_cache_size(maxsize: int=TEXT_NORMALIZATION_CACHE_SIZE):
+    """Reset the text normalization cache with a new `maxsize`. 
+    `maxsize=0` disables the cache; `maxsize=None` makes it unbounded. 
+    """
+    global _normalize_text_cached
+    _normalize_text_cached = lru_cache(maxsize=maxsize)(_normalize_text_uncached)
+
+
+def clear_text_normalization_cache():
+    _normalize_text_cached.cache_clear()
+
+
+def _en_pattern(raw_text: str):
+    feature = upper_re.sub('A', raw_text)
+    feature = lower_re.sub('a', feature)
+    feature = digit_re.sub('0', feature)
+    return feature
+
+
+def _en_pattern_sum(raw_text: str):
+    feature = _en_pattern(raw_text)
+    feature = re.sub('A+', 'A', feature)
+    feature = re.sub('a+', 'a', feature)
+    feature = re.sub('0+', '0', feature)
+    return feature
+
+
+def _en_shape_features(raw_text: str):
+    return numpy.array([criterion(raw_text) for criterion in en_shape2criterion.values()])
+
+
+# Sequence-level (vectorized) versions of the above features, operating on all tokens in one pass
+_en_pattern_table = {c: 'A' for c in range(ord('A'), ord('Z')+1)}
+_en_pattern_table.update({c: 'a' for c in range(ord('a'), ord('z')+1)})
+_en_pattern_table.update({c: '0' for c in range(ord('0'), ord('9')+1)})
+_en_pattern_sum_re = re.compile(r'([Aa0])\1+')
+_punct_table = numpy.zeros(256, dtype=bool)
+_punct_table[[ord(p) for p in string.punctuation]] = True
+
+
+def _find_separator(text: str):
+    for sep in ('\n', '\x00', '\x01', '\x02', '\x03'):
+        if sep not in text:
+            return sep
+    return None
+
+
+def _en_patterns(raw_texts: List[str]):
+    joined = "".join(raw_texts)
+    table = _en_pattern_table
+    if not joined.isascii():
+        # `\d` matches any Unicode decimal digit
+        table = dict(table)
+        table.update({ord(c): '0' for c in set(joined) if not c.isascii() and c.isdecimal()})
     
-    return pipeline_normalizer
+    sep = _find_separator(joined)
+    if sep is None:
+        return [tok_text.translate(table) for tok_text in raw_texts]
+    return sep.join(raw_texts).translate(table).split(sep) if len(raw_texts) > 0 else []
 
 
-class Token(object):
-    """A token at the modeling level (e.g., word level for English text, or character level for Chinese text). 
+def _en_pattern_sums(raw_texts: List[str]):
+    sep = _find_separator("".join(raw_texts))
+    if sep is None or len(raw_texts) == 0:
+        return [_en_pattern_sum_re.sub(r'\1', pattern) for pattern in _en_patterns(raw_texts)]
+    return _en_pattern_sum_re.sub(r'\1', sep.join(_en_patterns(raw_texts))).split(sep)
+
+
+def _en_shape_feature_matrix(raw_texts: List[str]):
+    """Compute `en_shape_features` of all tokens, returning a boolean matrix of (num_tokens, num_features). 
+    """
+    if len(raw_texts) == 0:
+        return numpy.zeros((0, len(en_shape2criterion)), dtype=bool)
     
-    `Token` provides access to lower-level attributes (prefixes, suffixes). 
+    tok_lens = numpy.array([len(tok_text) for tok_text in raw_texts], dtype=numpy.int64)
+    ends = numpy.cumsum(tok_lens)
+    starts = ends - tok_lens
+    seconds = numpy.minimum(starts+1, ends)
+    
+    joined = "".join(raw_texts)
+    codes = numpy.frombuffer(joined.encode('utf-32-le', errors='surrogatepass'), dtype=numpy.uint32).astype(numpy.int64)
+    is_digit = (codes >= ord('0')) & (codes <= ord('9'))
+    if not joined.isascii():
+        non_ascii_digits = [ord(c) for c in set(joined) if not c.isascii() and c.isdecimal()]
+        if len(non_ascii_digits) > 0:
+            is_digit |= numpy.isin(codes, non_ascii_digits)
+    
+    # char_masks: (6, num_chars) -> ascii, non_ascii, upper, lower, digit, punct
+    char_masks = numpy.stack([codes <= 0xff, 
+                              codes > 0xff, 
+                              (codes >= ord('A')) & (codes <= ord('Z')), 
+                              (codes >= ord('a')) & (codes <= ord('z')), 
+                              is_digit, 
+                              _punct_table[numpy.minimum(codes, 255)] & (codes < 128)])
+    cum_counts = numpy.zeros((char_masks.shape[0], len(codes)+1), dtype=numpy.int64)
+    cum_counts[:, 1:] = numpy.cumsum(char_masks, axis=1)
+    
+    # counts: (6, num_tokens)
+    counts = cum_counts[:, ends] - cum_counts[:, starts]
+    init_counts = cum_counts[:, seconds] - cum_counts[:, starts]
+    noninit_counts = cum_counts[:, ends] - cum_counts[:, seconds]
+    
+    last_codes = codes[numpy.maximum(ends-1, 0)]
+    last2_codes = codes[numpy.maximum(ends-2, 0)]
+    features = {'any_ascii': counts[0] > 0, 
+                'any_non_ascii': counts[1] > 0, 
+                'any_upper': counts[2] > 0, 
+                'any_lower': counts[3] > 0, 
+                'any_digit': counts[4] > 0, 
+                'any_punct': counts[5] > 0, 
+                'init_upper': init_counts[2] > 0, 
+                'init_lower': init_counts[3] > 0, 
+                'init_digit': init_counts[4] > 0, 
+                'init_punct': init_counts[5] > 0, 
+                'any_noninit_upper': noninit_counts[2] > 0, 
+                'any_noninit_lower': noninit_counts[3] > 0, 
+                'any_noninit_digit': noninit_counts[4] > 0, 
+                'any_noninit_punct': noninit_counts[5] > 0, 
+                'typical_title': (tok_lens >= 2) & (init_counts[2] > 0) & (noninit_counts[3] == tok_lens-1), 
+                'typical_upper': (tok_lens >= 2) & (counts[2] == tok_lens), 
+                'typical_lower': (tok_lens >= 2) & (counts[3] == tok_lens), 
+                'apostrophe_end': ((tok_lens >= 1) & (last_codes == ord("'"))) | 
+                                  ((tok_lens >= 2) & (last2_codes == ord("'")) & ((last_codes == ord('s')) | (last_codes == ord('S'))))}
+    return numpy.stack([features[name] for name in en_shape2criterion.keys()], axis=1)
+
+
+# Token-level features derived from `raw_text`
+_raw_text_features = {'prefix_2': lambda x: x[:2], 
+                      'prefix_3': lambda x: x[:3], 
+                      'prefix_4': lambda x: x[:4], 
+                      'prefix_5': lambda x: x[:5], 
+                      'suffix_2': lambda x: x[-2:], 
+                      'suffix_3': lambda x: x[-3:], 
+                      'suffix_4': lambda x: x[-4:], 
+                      'suffix_5': lambda x: x[-5:], 
+                      'num_mark': lambda x: _text_to_num_mark(x, return_nan_mark=True), 
+                      'en_pattern': _en_pattern, 
+                      'en_pattern_sum': _en_pattern_sum, 
+                      'en_shape_features': _en_shape_features}
+
+
+class _BaseToken(object):
+    """Shared interface of `Token` and `CompactToken`, providing access to lower-level attributes (prefixes, suffixes). 
     """
+    __slots__ = ()
+    
     _en_shape_feature_names = list(en_shape2criterion.keys())
     
     _basic_ohot_fields = ['text', 'num_mark', 
@@ -199,27 +364,8 @@ class Token(object):
                           'en_pattern', 'en_pattern_sum']
     _basic_mhot_fields = ['en_shape_features']
     
-    def __init__(self, raw_text: str, pre_text_normalizer=None, 
-                 case_mode='None', number_mode='None', to_half=True, to_zh_simplified=False, 
-                 post_text_normalizer=None, **kwargs):
-        self.raw_text = raw_text
-        if callable(pre_text_normalizer):
-            self.raw_text = pre_text_normalizer(self.raw_text)
-            
-        pipeline_normalizer = _pipeline(_case_normalizers[case_mode.lower()], 
-                                        _number_normalizers[number_mode.lower()], 
-                                        lambda x: Full2Half.full2half(x) if to_half else x, 
-                                        lambda x: hanziconv.HanziConv.toSimplified(x) if to_zh_simplified else x)
-        self.text = pipeline_normalizer(self.raw_text)
-        if callable(post_text_normalizer):
-            self.text = post_text_normalizer(self.text)
-        
-        for k, v in kwargs.items():
-            setattr(self, k, v)
-        
-
     def __eq__(self, other):
-        return isinstance(other, Token) and self.raw_text == other.raw_text and self.text == other.text
+        return isinstance(other, _BaseToken) and self.raw_text == other.raw_text and self.text == other.text
         
     def __len__(self):
         return len(self.raw_text)
@@ -265,29 +411,133 @@ class Token(object):
         
     @property
     def en_pattern(self):
-        feature = upper_re.sub('A', self.raw_text)
-        feature = lower_re.sub('a', feature)
-        feature = digit_re.sub('0', feature)
-        return feature
+        return _en_pattern(self.raw_text)
     
     @property
     def en_pattern_sum(self):
-        feature = self.en_pattern
-        feature = re.sub('A+', 'A', feature)
-        feature = re.sub('a+', 'a', feature)
-        feature = re.sub('0+', '0', feature)
-        return feature
+        return _en_pattern_sum(self.raw_text)
         
     @property
     def en_shape_features(self):
-        return numpy.array([criterion(self.raw_text) for criterion in en_shape2criterion.values()])
+        return _en_shape_features(self.raw_text)
         
     @property
     def zh_shape_features(self):
         return None
+
+
+
+class Token(_BaseToken):
+    """A token at the modeling level (e.g., word level for English text, or character level for Chinese text). 
+    
+    `Token` provides access to lower-level attributes (prefixes, suffixes). 
+    """
+    def __init__(self, raw_text: str, pre_text_normalizer=None, 
+                 case_mode='None', number_mode='None', to_half=True, to_zh_simplified=False, 
+                 post_text_normalizer=None, **kwargs):
+        self.raw_text = raw_text
+        if callable(pre_text_normalizer):
+            self.raw_text = pre_text_normalizer(self.raw_text)
+            
+        self.text = _normalize_text(self.raw_text, case_mode=case_mode, number_mode=number_mode, 
+                                    to_half=to_half, to_zh_simplified=to_zh_simplified, 
+                                    post_text_normalizer=post_text_normalizer)
+        
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+        
+    @property
+    def _field_names(self):
+        return list(self.__dict__.keys())
+
+
+
+@lru_cache(maxsize=None)
+def _get_text_normalizer(case_mode='None', number_mode='None', to_half=True, to_zh_simplified=False, post_text_normalizer=None):
+    return partial(_normalize_text, case_mode=case_mode, number_mode=number_mode, 
+                   to_half=to_half, to_zh_simplified=to_zh_simplified, 
+                   post_text_normalizer=post_text_normalizer)
+
+
+_text_normalizer_kwargs = ('pre_text_normalizer', 'case_mode', 'number_mode', 'to_half', 'to_zh_simplified', 'post_text_normalizer')
+
+
+class CompactToken(_BaseToken):
+    """A memory-lean variant of `Token`, which uses `__slots__` instead of a per-instance `__dict__`. 
     
+    `CompactToken` keeps a reference to a text normalizer shared by all tokens with the same settings, 
+    and normalizes `text` lazily on first access. 
     
+    Additional tags (e.g., `pos_tag`, `start`) must be declared beforehand via `CompactToken.with_tags`. 
+    
+    Examples
+    --------
+    >>> token_cls = CompactToken.with_tags('pos_tag')
+    >>> tok = token_cls("Hello", case_mode='Lower', pos_tag='UH')
+    """
+    __slots__ = ('raw_text', '_text', '_text_normalizer')
+    _tag_names = ()
     
+    def __init__(self, raw_text: str, pre_text_normalizer=None, 
+                 case_mode='None', number_mode='None', to_half=True, to_zh_simplified=False, 
+                 post_text_normalizer=None, **kwargs):
+        if callable(pre_text_normalizer):
+            raw_text = pre_text_normalizer(raw_text)
+        self.raw_text = raw_text
+        self._text_normalizer = _get_text_normalizer(case_mode, number_mode, to_half, to_zh_simplified, post_text_normalizer)
+        
+        for k, v in kwargs.items():
+            if k not in self._tag_names:
+                raise AttributeError(f"Undeclared tag `{k}` for {self.__class__.__name__}; declare it via `CompactToken.with_tags`")
+            setattr(self, k, v)
+        
+        
+    @property
+    def text(self):
+        try:
+            return self._text
+        except AttributeError:
+            self._text = self._text_normalizer(self.raw_text)
+            self._text_normalizer = None
+            return self._text
+        
+    @text.setter
+    def text(self, text: str):
+        self._text = text
+        
+    @property
+    def _field_names(self):
+        return ['raw_text', 'text'] + [name for name in self._tag_names if hasattr(self, name)]
+        
+        
+    def __reduce__(self):
+        state = {name: getattr(self, name) for name in ('raw_text', 'text') + self._tag_names if hasattr(self, name)}
+        return (_rebuild_compact_token, (self._tag_names, state))
+        
+        
+    @classmethod
+    def with_tags(cls, *tag_names):
+        """Return a `CompactToken` class with slots declared for `tag_names`. The classes are cached and shared. 
+        """
+        tag_names = tuple(dict.fromkeys(tag_names))
+        if len(tag_names) == 0:
+            return CompactToken
+        if tag_names not in _compact_token_classes:
+            _compact_token_classes[tag_names] = type('CompactToken', (CompactToken, ), {'__slots__': tag_names, '_tag_names': tag_names})
+        return _compact_token_classes[tag_names]
+
+
+_compact_token_classes = {}
+
+def _rebuild_compact_token(tag_names: tuple, state: dict):
+    token_cls = CompactToken.with_tags(*tag_names)
+    tok = token_cls.__new__(token_cls)
+    for name, value in state.items():
+        setattr(tok, name, value)
+    return tok
+
+
+
 class TokenSequence(object):
     """A wrapper of token list, providing sequential attribute access to all tokens. 
     
@@ -360,7 +610,7 @@ class TokenSequence(object):
         if sep_width is None:
             sep_width = len(self.token_sep)
         
-        token_lens = numpy.array([len(tok) for tok in self.token_list])
+        token_lens = numpy.array([len(tok_text) for tok_text in self.raw_text])
         self.end = numpy.cumsum(token_lens + sep_width) - sep_width
         self.start = self.end - token_lens
         
@@ -368,16 +618,21 @@ class TokenSequence(object):
     def _assert_for_softwords(self, tokenize_callback):
         assert self.token_sep == ""
         assert hasattr(tokenize_callback, '__self__')
-        assert isinstance(tokenize_callback.__self__, (jieba.Tokenizer, LexiconTokenizer))
+        assert _is_jieba_method(tokenize_callback) or isinstance(tokenize_callback.__self__, LexiconTokenizer)
         assert tokenize_callback.__name__.startswith('tokenize')
         
         
-    def build_softwords(self, tokenize_callback, **kwargs):
+    def build_softwords(self, tokenize_callback, words: List[tuple]=None, **kwargs):
+        """`words` are the matched `(word_text, word_start, word_end)` if already tokenized by `tokenize_callback` 
+        (see `LexiconTokenizer.batch_build_softwords`). 
+        """
         self._assert_for_softwords(tokenize_callback)
+        if words is None:
+            words = tokenize_callback(self.token_sep.join(self.raw_text), **kwargs)
         
-        self.softword = [numpy.zeros(len(self._softword_idx2tag), dtype=bool) for tok in self.token_list]
+        self.softword = [numpy.zeros(len(self._softword_idx2tag), dtype=bool) for _ in range(len(self))]
         
-        for word_text, word_start, word_end in tokenize_callback(self.token_sep.join(self.raw_text), **kwargs):
+        for word_text, word_start, word_end in words:
             if word_end - word_start == 1:
                 self.softword[word_start][self._softword_tag2idx['S']] = True
             else:
@@ -387,12 +642,14 @@ class TokenSequence(object):
                     self.softword[k][self._softword_tag2idx['M']] = True
                     
                     
-    def build_softlexicons(self, tokenize_callback, **kwargs):
+    def build_softlexicons(self, tokenize_callback, words: List[tuple]=None, **kwargs):
         self._assert_for_softwords(tokenize_callback)
+        if words is None:
+            words = tokenize_callback(self.token_sep.join(self.raw_text), **kwargs)
         
-        self.softlexicon = [[[] for t in self._softword_idx2tag] for tok in self.token_list]
+        self.softlexicon = [[[] for t in self._softword_idx2tag] for _ in range(len(self))]
         
-        for word_text, word_start, word_end in tokenize_callback(self.token_sep.join(self.raw_text), **kwargs):
+        for word_text, word_start, word_end in words:
             if word_end - word_start == 1:
                 self.softlexicon[word_start][self._softword_tag2idx['S']].append(word_text)
             else:
@@ -408,6 +665,21 @@ class TokenSequence(object):
                     word_set.append(self.none_token)
                     
                     
+    @property
+    def en_pattern(self):
+        return _en_patterns(self.raw_text)
+    
+    @property
+    def en_pattern_sum(self):
+        return _en_pattern_sums(self.raw_text)
+    
+    @property
+    def en_shape_features(self):
+        """Return `en_shape_features` of all tokens as a boolean matrix of (num_tokens, num_features). 
+        """
+        return _en_shape_feature_matrix(self.raw_text)
+    
+    
     @cached_property
     def bigram(self):
         unigram = self.text
@@ -420,7 +692,8 @@ class TokenSequence(object):
         
     
     def spans_within_max_length(self, max_len: int):
-        total_len = len(self.token_list)
+        total_len = len(self)
+        tokenized_text = self.text
         slice_start = 0
         
         while True:
@@ -429,10 +702,10 @@ class TokenSequence(object):
                 break
             else:
                 slice_end = slice_start + max_len
-                while not self.token_list[slice_end-1].text in ('.', '?', '!', ';'):
+                while not tokenized_text[slice_end-1] in ('.', '?', '!', ';'):
                     slice_end -= 1
                     if slice_end <= slice_start:
-                        raise ValueError(f"Cannot find proper slices in {self.token_list[slice_start:slice_start+max_len]}")
+                        raise ValueError(f"Cannot find proper slices in {self[slice_start:slice_start+max_len]}")
                 yield slice(slice_start, slice_end)
                 slice_start = slice_end
                 
@@ -462,23 +735,39 @@ class TokenSequence(object):
     
     @classmethod
     def from_tokenized_text(cls, tokenized_text: List[str], additional_tags=None, additional_tok2tags=None, 
-                            token_sep=" ", pad_token="<pad>", none_token="<none>", **kwargs):
+                            token_sep=" ", pad_token="<pad>", none_token="<none>", columnar: bool=False, compact: bool=False, **kwargs):
         """Build `TokenSequence` from tokenized text. 
         
         Parameters
         ----------
         tokenized_text: List[str]
             A list of tokenized text. 
+        columnar: bool
+            If True, build a `ColumnarTokenSequence`, which stores each token field as a column. 
+        compact: bool
+            If True, build the sequence with `CompactToken`, which uses `__slots__` and normalizes text lazily. 
         """
-        token_list = [Token(tok_text, **kwargs) for tok_text in tokenized_text]
-        tokens = cls(token_list, token_sep=token_sep, pad_token=pad_token, none_token=none_token)
+        if columnar or issubclass(cls, ColumnarTokenSequence):
+            tokens = ColumnarTokenSequence.from_columns(tokenized_text, token_sep=token_sep, pad_token=pad_token, none_token=none_token, **kwargs)
+        elif compact:
+            tag_names = [k for k in kwargs.keys() if k not in _text_normalizer_kwargs]
+            if additional_tags is not None:
+                tag_names.extend(additional_tags.keys())
+            if additional_tok2tags is not None:
+                tag_names.extend(tag_name for tag_name, _ in additional_tok2tags)
+            token_cls = CompactToken.with_tags(*tag_names)
+            token_list = [token_cls(tok_text, **kwargs) for tok_text in tokenized_text]
+            tokens = cls(token_list, token_sep=token_sep, pad_token=pad_token, none_token=none_token)
+        else:
+            token_list = [Token(tok_text, **kwargs) for tok_text in tokenized_text]
+            tokens = cls(token_list, token_sep=token_sep, pad_token=pad_token, none_token=none_token)
         tokens.attach_additional_tags(additional_tags=additional_tags, additional_tok2tags=additional_tok2tags)
         return tokens
     
     
     @classmethod
     def from_raw_text(cls, raw_text: str, tokenize_callback=None, additional_tok2tags=None, 
-                      token_sep=" ", pad_token="<pad>", none_token="<none>", **kwargs):
+                      token_sep=" ", pad_token="<pad>", none_token="<none>", columnar: bool=False, compact: bool=False, **kwargs):
         """Build `TokenSequence` from raw text. 
         
         Parameters
@@ -489,42 +778,365 @@ class TokenSequence(object):
             (1) `None`, "space": split text by space. 
             (2) "char": split text into characters. 
             (3) spacy.language.Language, jieba.Tokenizer.cut, jieba.Tokenizer.tokenize: split text by given tokenize method. 
+        columnar: bool
+            If True, build a `ColumnarTokenSequence`, which stores each token field as a column. 
+        compact: bool
+            If True, build the sequence with `CompactToken`, which uses `__slots__` and normalizes text lazily. 
         """
-        if tokenize_callback is None or (isinstance(tokenize_callback, str) and tokenize_callback.lower().startswith('space')):
-            token_list = [Token(tok_text, **kwargs) for tok_text in raw_text.split()]
-        elif isinstance(tokenize_callback, str) and tokenize_callback.lower().startswith('char'):
-            token_list = [Token(tok_text, start=k, end=k+1, **kwargs) for k, tok_text in enumerate(raw_text)]
-        elif isinstance(tokenize_callback, spacy.language.Language):
-            token_list = [Token(tok.text, start=tok.idx, end=tok.idx+len(tok.text), **kwargs) for tok in tokenize_callback(raw_text)]
-        elif hasattr(tokenize_callback, '__self__') and isinstance(tokenize_callback.__self__, jieba.Tokenizer):
-            if tokenize_callback.__name__.startswith('tokenize'):
-                token_list = [Token(tok_text, start=tok_start, end=tok_end, **kwargs) for tok_text, tok_start, tok_end in tokenize_callback(raw_text)]
-            elif tokenize_callback.__name__.startswith('cut'):
-                token_list = [Token(tok_text, **kwargs) for tok_text in tokenize_callback(raw_text)]
-            else:
-                raise ValueError(f"Invalid method of `jieba.Tokenizer`: {tokenize_callback}")
+        tokenized_text, boundaries = _tokenize_raw_text(raw_text, tokenize_callback)
+        return cls._from_tokenized_with_boundaries(tokenized_text, boundaries, additional_tok2tags=additional_tok2tags, 
+                                                   token_sep=token_sep, pad_token=pad_token, none_token=none_token, 
+                                                   columnar=columnar, compact=compact, **kwargs)
+    
+    
+    @classmethod
+    def from_raw_texts(cls, raw_texts: List[str], tokenize_callback=None, additional_tok2tags=None, 
+                       token_sep=" ", pad_token="<pad>", none_token="<none>", columnar: bool=False, compact: bool=False, 
+                       num_workers: int=1, batch_size: int=1000, **kwargs):
+        """Build a list of `TokenSequence` from a list of raw texts, tokenizing the texts in batches. 
+        
+        Parameters
+        ----------
+        raw_texts: List[str]
+            A list of raw texts. 
+        tokenize_callback: `None`, str or callable
+            The same as in `TokenSequence.from_raw_text`. 
+        num_workers: int
+            The number of processes for tokenization. 
+            (1) spacy.language.Language: passed to `nlp.pipe` as `n_process`. 
+            (2) jieba.Tokenizer.cut, jieba.Tokenizer.tokenize: the size of process pool. 
+            (3) Otherwise, ignored. 
+        batch_size: int
+            The number of texts in a batch (for spaCy) or a task chunk (for jieba). 
+        """
+        if _is_spacy_language(tokenize_callback):
+            all_tokenized = [_tokenize_spacy_doc(doc) for doc in tokenize_callback.pipe(raw_texts, n_process=num_workers, batch_size=batch_size)]
+        elif num_workers > 1 and _is_jieba_method(tokenize_callback):
+            all_tokenized = _tokenize_by_jieba_in_parallel(raw_texts, tokenize_callback, num_workers=num_workers, batch_size=batch_size)
         else:
-            raise ValueError(f"Invalid `tokenize_callback`: {tokenize_callback}")
+            all_tokenized = [_tokenize_raw_text(raw_text, tokenize_callback) for raw_text in raw_texts]
         
-        tokens = cls(token_list, token_sep=token_sep, pad_token=pad_token, none_token=none_token)
-        tokens.attach_additional_tags(additional_tok2tags=additional_tok2tags)
-        return tokens
+        return [cls._from_tokenized_with_boundaries(tokenized_text, boundaries, additional_tok2tags=additional_tok2tags, 
+                                                    token_sep=token_sep, pad_token=pad_token, none_token=none_token, 
+                                                    columnar=columnar, compact=compact, **kwargs) for tokenized_text, boundaries in all_tokenized]
+    
+    
+    @classmethod
+    def _from_tokenized_with_boundaries(cls, tokenized_text: List[str], boundaries=None, **kwargs):
+        if boundaries is not None:
+            additional_tags = {'start': [tok_start for tok_start, _ in boundaries], 
+                               'end': [tok_end for _, tok_end in boundaries]}
+        else:
+            additional_tags = None
+        return cls.from_tokenized_text(tokenized_text, additional_tags=additional_tags, **kwargs)
+
+
+
+# NOTE: spaCy and jieba are heavy to import; a callback can only be an instance of them if they have been imported
+def _is_spacy_language(tokenize_callback):
+    return 'spacy' in sys.modules and isinstance(tokenize_callback, sys.modules['spacy'].language.Language)
+
+
+def _is_jieba_method(tokenize_callback):
+    return 'jieba' in sys.modules and hasattr(tokenize_callback, '__self__') and isinstance(tokenize_callback.__self__, sys.modules['jieba'].Tokenizer)
+
+
+def _tokenize_spacy_doc(doc):
+    return [tok.text for tok in doc], [(tok.idx, tok.idx+len(tok.text)) for tok in doc]
+
+
+def _tokenize_raw_text(raw_text: str, tokenize_callback=None):
+    """Tokenize `raw_text`, returning the tokenized text and the token boundaries (`None` if unavailable). 
+    """
+    if tokenize_callback is None or (isinstance(tokenize_callback, str) and tokenize_callback.lower().startswith('space')):
+        return raw_text.split(), None
+    elif isinstance(tokenize_callback, str) and tokenize_callback.lower().startswith('char'):
+        return list(raw_text), [(k, k+1) for k in range(len(raw_text))]
+    elif _is_spacy_language(tokenize_callback):
+        return _tokenize_spacy_doc(tokenize_callback(raw_text))
+    elif _is_jieba_method(tokenize_callback):
+        if tokenize_callback.__name__.startswith('tokenize'):
+            tokenized = list(tokenize_callback(raw_text))
+            return [tok_text for tok_text, *_ in tokenized], [(tok_start, tok_end) for _, tok_start, tok_end in tokenized]
+        elif tokenize_callback.__name__.startswith('cut'):
+            return list(tokenize_callback(raw_text)), None
+        else:
+            raise ValueError(f"Invalid method of `jieba.Tokenizer`: {tokenize_callback}")
+    else:
+        raise ValueError(f"Invalid `tokenize_callback`: {tokenize_callback}")
+
+
+# `jieba.Tokenizer` holds a lock and is not picklable, so each worker rebuilds it from the (initialized) state
+_worker_jieba_tokenizer = None
+
+def _init_jieba_worker(state: dict):
+    import jieba
+    global _worker_jieba_tokenizer
+    _worker_jieba_tokenizer = jieba.Tokenizer.__new__(jieba.Tokenizer)
+    _worker_jieba_tokenizer.__dict__.update(state)
+    _worker_jieba_tokenizer.lock = threading.RLock()
+
+
+def _tokenize_by_jieba_worker(method_name: str, raw_texts: List[str]):
+    tokenize_callback = getattr(_worker_jieba_tokenizer, method_name)
+    return [_tokenize_raw_text(raw_text, tokenize_callback) for raw_text in raw_texts]
+
+
+def _tokenize_by_jieba_in_parallel(raw_texts: List[str], tokenize_callback, num_workers: int=1, batch_size: int=1000):
+    tokenizer = tokenize_callback.__self__
+    tokenizer.check_initialized()
+    state = {k: v for k, v in tokenizer.__dict__.items() if k != 'lock'}
+    
+    chunks = [raw_texts[k:k+batch_size] for k in range(0, len(raw_texts), batch_size)]
+    with multiprocessing.Pool(num_workers, initializer=_init_jieba_worker, initargs=(state, )) as pool:
+        chunk_results = pool.starmap(_tokenize_by_jieba_worker, [(tokenize_callback.__name__, chunk) for chunk in chunks])
+    return [tokenized for chunk_result in chunk_results for tokenized in chunk_result]
+
+
+
+class ColumnarTokenSequence(TokenSequence):
+    """A struct-of-arrays variant of `TokenSequence`, storing each token field once as a column. 
+    
+    `ColumnarTokenSequence` avoids creating a `Token` object per token, and returns the 
+    stored column directly on attribute access (e.g., `tokens.text`, `tokens.raw_text`). 
+    Features derived from `raw_text` (e.g., `prefix_3`, `en_pattern`) are computed on access. 
+    
+    Notes
+    -----
+    (1) The returned columns are shared with the object; do NOT modify them inplace. 
+    (2) Integer columns (e.g., `start`, `end`) are stored as `numpy.ndarray`. 
+    """
+    def __init__(self, columns: dict, token_sep=" ", pad_token="<pad>", none_token="<none>"):
+        assert isinstance(columns, dict) and 'raw_text' in columns and 'text' in columns
+        assert len({len(col) for col in columns.values()}) == 1
+        self.columns = columns
+        self.token_sep = token_sep
+        self.pad_token = pad_token
+        self.none_token = none_token
+        
+    def __getattr__(self, name):
+        # Avoid infinite recursion before `columns` is set (e.g., in unpickling)
+        if name == 'columns' or name.startswith('__'):
+            raise AttributeError(f"{self.__class__.__name__} has no attribute {name}")
+        elif name in self.columns:
+            return self.columns[name]
+        elif name in _raw_text_features:
+            return [_raw_text_features[name](tok_text) for tok_text in self.columns['raw_text']]
+        elif len(self) == 0:
+            return []
+        else:
+            raise AttributeError(f"{self.__class__.__name__} has no attribute {name}")
+
+    def __setattr__(self, name, value):
+        # Token-level fields (e.g., `start`, `softword`) set on the sequence are stored as columns
+        if name in ('columns', 'token_sep', 'pad_token', 'none_token'):
+            super().__setattr__(name, value)
+        else:
+            assert len(value) == len(self)
+            self.columns[name] = value if isinstance(value, numpy.ndarray) else _as_column(value)
+
+
+    def __eq__(self, other):
+        return (isinstance(other, ColumnarTokenSequence) and 
+                self.token_sep == other.token_sep and 
+                self.pad_token == other.pad_token and 
+                self.none_token == other.none_token and 
+                self.columns['raw_text'] == other.columns['raw_text'] and 
+                self.columns['text'] == other.columns['text'])
+        
+    def __len__(self):
+        return len(self.columns['raw_text'])
+        
+    def __repr__(self):
+        return repr(self.columns['raw_text'])
+        
+    def __getstate__(self):
+        return {'columns': self.columns, 
+                'token_sep': self.token_sep, 
+                'pad_token': self.pad_token, 
+                'none_token': self.none_token}
+        
+    @property
+    def token_list(self):
+        return [self[i] for i in range(len(self))]
+        
+        
+    def __getitem__(self, i):
+        if isinstance(i, numbers.Integral):
+            i = int(i)
+            tok = Token.__new__(Token)
+            tok.__dict__.update({key: col[i].item() if isinstance(col, numpy.ndarray) else col[i] for key, col in self.columns.items()})
+            return tok
+        elif isinstance(i, slice):
+            return ColumnarTokenSequence({key: col[i] for key, col in self.columns.items()}, 
+                                         token_sep=self.token_sep, 
+                                         pad_token=self.pad_token, 
+                                         none_token=self.none_token)
+        else:
+            raise TypeError(f"Invalid subscript type of {i}")
+        
+    def __add__(self, other):
+        assert isinstance(other, TokenSequence)
+        assert other.token_sep == self.token_sep
+        assert other.pad_token == self.pad_token
+        assert other.none_token == self.none_token
+        if not isinstance(other, ColumnarTokenSequence):
+            other = ColumnarTokenSequence.from_token_list(other.token_list, token_sep=other.token_sep, pad_token=other.pad_token, none_token=other.none_token)
+        assert other.columns.keys() == self.columns.keys()
+        return ColumnarTokenSequence({key: _concat_columns(col, other.columns[key]) for key, col in self.columns.items()}, 
+                                     token_sep=self.token_sep, 
+                                     pad_token=self.pad_token, 
+                                     none_token=self.none_token)
+        
+        
+    def attach_additional_tags(self, additional_tags: dict=None, additional_tok2tags: list=None):
+        if additional_tags is not None:
+            for tag_name, tags in additional_tags.items():
+                assert len(tags) == len(self)
+                self.columns[tag_name] = _as_column(tags)
+                
+        if additional_tok2tags is not None:
+            for tag_name, tok2tag in additional_tok2tags:
+                self.columns[tag_name] = _as_column([tok2tag.get(tok_text, tok2tag['<unk>']) for tok_text in self.columns['text']])
+                
+        return self
+        
+        
+    @classmethod
+    def from_columns(cls, raw_text: List[str], token_sep=" ", pad_token="<pad>", none_token="<none>", 
+                     pre_text_normalizer=None, case_mode='None', number_mode='None', to_half=True, to_zh_simplified=False, 
+                     post_text_normalizer=None, **kwargs):
+        """Build `ColumnarTokenSequence` from a column of raw text, with the same normalization as `Token`. 
+        
+        Parameters
+        ----------
+        raw_text: List[str]
+            A list of tokenized raw text. 
+        kwargs: 
+            Tags shared by all tokens, following `Token`. 
+        """
+        raw_text = list(raw_text)
+        if callable(pre_text_normalizer):
+            raw_text = [pre_text_normalizer(tok_text) for tok_text in raw_text]
+        text = [_normalize_text(tok_text, case_mode=case_mode, number_mode=number_mode, 
+                                to_half=to_half, to_zh_simplified=to_zh_simplified, 
+                                post_text_normalizer=post_text_normalizer) for tok_text in raw_text]
+        
+        columns = {'raw_text': raw_text, 'text': text}
+        columns.update({k: _as_column([v]*len(raw_text)) for k, v in kwargs.items()})
+        return cls(columns, token_sep=token_sep, pad_token=pad_token, none_token=none_token)
+        
+        
+    @classmethod
+    def from_token_list(cls, token_list: List[Token], token_sep=" ", pad_token="<pad>", none_token="<none>"):
+        keys = token_list[0]._field_names if len(token_list) > 0 else ['raw_text', 'text']
+        columns = {key: _as_column([getattr(tok, key) for tok in token_list]) for key in keys}
+        return cls(columns, token_sep=token_sep, pad_token=pad_token, none_token=none_token)
+
+
+
+def _as_column(values: list):
+    if len(values) > 0 and all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return numpy.array(values, dtype=numpy.int64)
+    else:
+        return list(values)
+
+
+def _concat_columns(col1, col2):
+    if isinstance(col1, numpy.ndarray) and isinstance(col2, numpy.ndarray):
+        return numpy.concatenate([col1, col2])
+    else:
+        return list(col1) + list(col2)
 
 
 
 class LexiconTokenizer(object):
+    """Match all words of `lexicon` in text, yielding `(word_text, word_start, word_end)` ordered by start and then end. 
+    
+    The lexicon is compiled into an Aho-Corasick automaton, so that all words are matched in a single pass over 
+    the text, instead of probing all substrings up to `max_len`. 
+    """
     def __init__(self, lexicon: Iterable[str], max_len: int=10, return_singleton: bool=False):
         self.lexicon = set(lexicon)
         self.max_len = max_len
         self.return_singleton = return_singleton
+        self._build_automaton()
+        
+        
+    def _build_automaton(self):
+        # `_goto[s]` maps a character to the next state; `_fail[s]` is the state of the longest proper suffix of 
+        # state `s` in the trie; `_out[s]` holds the lengths of the words ending at state `s` in descending order
+        goto, out = [{}], [[]]
+        for word in self.lexicon:
+            if 0 < len(word) <= self.max_len:
+                state = 0
+                for c in word:
+                    if c not in goto[state]:
+                        goto[state][c] = len(goto)
+                        goto.append({})
+                        out.append([])
+                    state = goto[state][c]
+                out[state].append(len(word))
+        
+        # Build the failure links in breadth-first order, where the suffix states are shallower than the current ones
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while len(queue) > 0:
+            state = queue.popleft()
+            for c, next_state in goto[state].items():
+                suffix_state = fail[state]
+                while suffix_state > 0 and c not in goto[suffix_state]:
+                    suffix_state = fail[suffix_state]
+                fail[next_state] = goto[suffix_state].get(c, 0)
+                out[next_state] = out[next_state] + out[fail[next_state]]
+                queue.append(next_state)
+        
+        self._goto, self._fail, self._out = goto, fail, out
+        
+        
+    def _match(self, text: str):
+        goto, fail, out = self._goto, self._fail, self._out
+        return_singleton = self.return_singleton and self.max_len >= 1
+        
+        spans = []
+        state = 0
+        for word_end, c in enumerate(text, 1):
+            next_state = goto[state].get(c)
+            while next_state is None and state > 0:
+                state = fail[state]
+                next_state = goto[state].get(c)
+            state = 0 if next_state is None else next_state
+            word_lens = out[state]
+            # A single-character word, if matched, is the last in `word_lens`
+            if return_singleton and (not word_lens or word_lens[-1] != 1):
+                spans.append((word_end-1, word_end))
+            for word_len in word_lens:
+                spans.append((word_end-word_len, word_end))
+        # The words are found in the order of ends, and re-ordered by starts and then ends
+        spans.sort()
+        return [(text[word_start:word_end], word_start, word_end) for word_start, word_end in spans]
+        
         
     def tokenize(self, text: str):
-        L = len(text)
-        for word_start in range(L):
-            for word_end in range(word_start+1, min(word_start+self.max_len, L)+1):
-                word_text = text[word_start:word_end]
-                if (self.return_singleton and word_end-word_start==1) or (word_text in self.lexicon):
-                    yield (word_text, word_start, word_end)
+        yield from self._match(text)
+                    
+                    
+    def batch_tokenize(self, texts: List[str]):
+        """Match many texts at once, returning a list of matched words for each text. 
+        """
+        return [self._match(text) for text in texts]
+        
+        
+    def batch_build_softwords(self, batch_tokens: List[TokenSequence], softword: bool=True, softlexicon: bool=True):
+        """Build `softword` and/or `softlexicon` for many `TokenSequence`s, with the texts matched by `batch_tokenize` 
+        once for both. 
+        """
+        batch_words = self.batch_tokenize([tokens.token_sep.join(tokens.raw_text) for tokens in batch_tokens])
+        for tokens, words in zip(batch_tokens, batch_words):
+            if softword:
+                tokens.build_softwords(self.tokenize, words=words)
+            if softlexicon:
+                tokens.build_softlexicons(self.tokenize, words=words)
 
 
 
@@ -534,6 +1146,7 @@ def custom_spacy_tokenizer(nlp, custom_prefixes=None, custom_suffixes=None, cust
     https://spacy.io/usage/linguistic-features#tokenization
     http://www.longest.io/2018/01/27/spacy-custom-tokenization.html
     """
+    import spacy
     if custom_prefixes is None:
         prefix_search = nlp.tokenizer.prefix_search
     else:
@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 import logging
-import nltk
 
 from ..metrics import precision_recall_f1_report
 from ..dataset import Dataset
@@ -119,5 +118,6 @@ def evaluate_generation(trainer: Trainer, dataset: Dataset, batch_size: int=32,
     set_trg_pred = trainer.predict(dataset, batch_size=batch_size, beam_size=beam_size)
     set_trg_gold = [[tokens.text for tokens in ex['full_trg_tokens']] for ex in dataset.data]
     
+    import nltk
     bleu4 = nltk.translate.bleu_score.corpus_bleu(list_of_references=set_trg_gold, hypotheses=set_trg_pred)
     logger.info(f"Beam Size: {beam_size} | BLEU-4: {bleu4*100:2.3f}%")
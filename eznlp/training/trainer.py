@@ -112,10 +112,22 @@ class Trainer(object):
             self.scheduler.step()
         
         
-    def predict(self, dataset: Dataset, batch_size: int=32, beam_size: int=1):
+    def predict(self, dataset: Dataset, batch_size: int=32, beam_size: int=1, sort_by_length: bool=False):
+        """
+        Parameters
+        ----------
+        sort_by_length: bool
+            If True, the sequences are predicted in the order of lengths (to reduce the padding waste), 
+            while the results are restored to the original order. 
+        """
         assert self.num_metrics == 1 or beam_size <= 1
         
-        dataloader = torch.utils.data.DataLoader(dataset, batch_size=batch_size, shuffle=False, collate_fn=dataset.collate)
+        if sort_by_length:
+            seq_lens = dataset.seq_lens
+            order = sorted(range(len(seq_lens)), key=lambda i: seq_lens[i])
+        else:
+            order = list(range(len(dataset)))
+        dataloader = torch.utils.data.DataLoader(dataset, batch_size=batch_size, sampler=order, collate_fn=dataset.collate)
         
         self.model.eval()
         set_y_pred = [[] for k in range(self.num_metrics)]
@@ -134,6 +146,14 @@ class Trainer(object):
                     batch_y_pred = self.model.beam_search(beam_size, batch)
                     set_y_pred[0].extend(batch_y_pred)
         
+        if sort_by_length:
+            # Restore the original order
+            for k in range(len(set_y_pred)):
+                restored_y_pred = [None] * len(order)
+                for i, y_pred in zip(order, set_y_pred[k]):
+                    restored_y_pred[i] = y_pred
+                set_y_pred[k] = restored_y_pred
+        
         if self.num_metrics == 1:
             return set_y_pred[0]
         else:
@@ -255,6 +275,11 @@ class Trainer(object):
         t0 = time.time()
         
         while eidx < num_epochs:
+            # Reshuffle the (distributed) sampler in every epoch
+            for sampler in (getattr(train_loader, 'sampler', None), getattr(train_loader, 'batch_sampler', None)):
+                if hasattr(sampler, 'set_epoch'):
+                    sampler.set_epoch(eidx)
+            
             for batch in train_loader:
                 batch = batch.to(self.device, non_blocking=self.non_blocking)
                 with torch.cuda.amp.autocast(enabled=self.use_amp):
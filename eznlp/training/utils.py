@@ -4,7 +4,6 @@ import logging
 import subprocess
 import torch
 import numpy
-import matplotlib
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +70,7 @@ class LRLambda(object):
         x = numpy.arange(0, num_total_steps, num_total_steps//200)
         y = numpy.array([lr_lambda(xi) for xi in x])
         
+        import matplotlib.pyplot
         fig, ax = matplotlib.pyplot.subplots(figsize=(8, 3))
         ax.plot(x, y)
         matplotlib.pyplot.show()
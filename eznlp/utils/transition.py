@@ -3,7 +3,6 @@ from typing import List
 import os
 import re
 from collections import Counter
-import pandas
 
 from ..token import zh_char_re, zh_punct_re
 
@@ -30,6 +29,7 @@ class ChunksTagsTranslator(object):
         
         dirname = os.path.dirname(__file__)
         sheet_name = 'BIOES' if scheme in ('BMES', 'BILOU') else scheme
+        import pandas
         trans = pandas.read_excel(f"{dirname}/transition.xlsx", sheet_name=sheet_name, 
                                   usecols=['from_tag', 'to_tag', 'legal', 'end_of_chunk', 'start_of_chunk'])
         
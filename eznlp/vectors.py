@@ -1,10 +1,16 @@
 # -*- coding: utf-8 -*-
 from typing import Union, List
 import os
+import mmap
+import multiprocessing
 import tqdm
 import logging
+import numpy
 import torch
 
+from .vocab import _hash_tokens
+from .token import Full2Half, digit_re
+
 logger = logging.getLogger(__name__)
 
 
@@ -13,53 +19,281 @@ def _parse_line(line: bytes):
     return w, [float(v) for v in vector]
 
 
-def _infer_shape(path: str, skiprows: List[int]):
-    vec_dim = None
+def _parse_lines(lines: List[bytes], vec_dim: int, encoding: str):
+    """Parse lines in format of `word v1 v2 ... vd`, with the vectors converted in bulk. 
+    
+    If any line is bad (e.g., with a mismatched dimension), the lines are re-parsed one by one, and the bad ones are skipped. 
+    """
+    lines = [line.rstrip() for line in lines]
+    lines = [line for line in lines if len(line) > 0]
+    if len(lines) == 0:
+        return [], numpy.empty((0, vec_dim), dtype=numpy.float32), 0
+    
+    try:
+        words, _, rests = zip(*[line.partition(b" ") for line in lines])
+        # Words never contain line breaks, so they are decoded at once
+        words = b"\n".join(words).decode(encoding).split("\n")
+        vectors = numpy.loadtxt(rests, dtype=numpy.float32, delimiter=" ", comments=None, ndmin=2)
+        if vectors.shape[1] != vec_dim:
+            raise ValueError(f"Vector dimension {vectors.shape[1]} does not match {vec_dim}")
+        return words, vectors, 0
+    except (ValueError, UnicodeDecodeError):
+        pass
+    
+    words, vectors, num_bad_lines = [], [], 0
+    for line in lines:
+        try:
+            w, vector = _parse_line(line)
+            words.append(w.decode(encoding))
+            assert len(vector) == vec_dim
+            vectors.append(vector)
+        except KeyboardInterrupt as e:
+            raise e
+        except:
+            if len(words) > len(vectors):
+                words.pop()
+            num_bad_lines += 1
+            logger.warning(f"Bad line detected: {line}")
+    return words, numpy.array(vectors, dtype=numpy.float32).reshape(-1, vec_dim), num_bad_lines
+
+
+def _parse_chunk(args: tuple):
+    path, start, end, vec_dim, encoding = args
     with open(path, 'rb') as f:
-        for i, line in enumerate(f):
-            if i in skiprows:
-                continue
-            if vec_dim is None:
-                w, vector = _parse_line(line)
-                vec_dim = len(vector)
+        f.seek(start)
+        lines = f.read(end - start).split(b"\n")
+    return _parse_lines(lines, vec_dim, encoding)
+
+
+def _is_word2vec_header(line: bytes):
+    fields = line.split()
+    return len(fields) == 2 and all(field.isdigit() for field in fields)
+
+
+def _chunk_boundaries(f, start: int, file_size: int, chunk_size: int):
+    """Split the bytes from `start` to `file_size` into chunks of about `chunk_size` bytes, aligned to line boundaries. 
+    """
+    boundaries = [start]
+    while boundaries[-1] < file_size:
+        f.seek(boundaries[-1] + chunk_size)
+        f.readline()
+        boundaries.append(min(f.tell(), file_size))
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _load_from_text_file(path: str, encoding: str, skiprows: List[int], verbose=False, num_workers: int=0, chunk_size: int=2**24):
+    file_size = os.path.getsize(path)
+    
+    # Parse the leading lines (covering `skiprows` and a possible word2vec header) in the main process, to infer the dimension
+    head_lines = []
+    with open(path, 'rb') as f:
+        i = 0
+        for line in iter(f.readline, b""):
+            if i not in skiprows and not (i == 0 and _is_word2vec_header(line)):
+                head_lines.append(line)
+            i += 1
+            if i > max(skiprows, default=-1) and len(head_lines) > 0:
+                break
+        data_start = f.tell()
+        vec_dim = len(_parse_line(head_lines[0])[1]) if len(head_lines) > 0 else 0
+        ranges = _chunk_boundaries(f, data_start, file_size, chunk_size)
+    
+    words, vectors, num_bad_lines = _parse_lines(head_lines, vec_dim, encoding)
+    words, vectors = [words], [vectors]
+    chunk_args = [(path, start, end, vec_dim, encoding) for start, end in ranges]
+    with tqdm.tqdm(total=file_size, disable=not verbose, ncols=100, desc="Loading vectors", unit='B', unit_scale=True) as pbar:
+        pbar.update(data_start)
+        if num_workers > 0:
+            with multiprocessing.Pool(num_workers) as pool:
+                results = pool.imap(_parse_chunk, chunk_args)
+                for (start, end), (c_words, c_vectors, c_num_bad_lines) in zip(ranges, results):
+                    words.append(c_words)
+                    vectors.append(c_vectors)
+                    num_bad_lines += c_num_bad_lines
+                    pbar.update(end - start)
+        else:
+            for (start, end), args in zip(ranges, chunk_args):
+                c_words, c_vectors, c_num_bad_lines = _parse_chunk(args)
+                words.append(c_words)
+                vectors.append(c_vectors)
+                num_bad_lines += c_num_bad_lines
+                pbar.update(end - start)
+    
+    if num_bad_lines > 0:
+        logger.warning(f"Totally {num_bad_lines} bad lines exist and were skipped")
+    return [w for c_words in words for w in c_words], numpy.concatenate(vectors, axis=0)
+
+
+def _load_from_binary_file(path: str, encoding: str, verbose=False):
+    """Load vectors in the binary format of word2vec, i.e., a header line of `num_words vec_dim`, followed by 
+    entries of `word` + space + `vec_dim` float32 values (optionally with a line break). 
+    """
+    with open(path, 'rb') as f:
+        num_words, vec_dim = (int(field) for field in f.readline().split())
+        pos = f.tell()
+        row_bytes = vec_dim * 4
+        words = []
+        vectors = numpy.empty((num_words, vec_dim), dtype=numpy.float32)
+        vector_bytes = memoryview(vectors).cast('B')
+        # Memory-map the file instead of reading it at once, so that only the pages being copied are resident
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as raw, memoryview(raw) as buf:
+            for i in tqdm.trange(num_words, disable=not verbose, ncols=100, desc="Loading vectors", mininterval=1):
+                sep = raw.find(b" ", pos)
+                if sep < 0:
+                    raise ValueError(f"Invalid binary vectors file {path}: {i} of {num_words} words found")
+                words.append(raw[pos:sep].lstrip(b"\n"))
+                vector_bytes[i*row_bytes:(i+1)*row_bytes] = buf[sep+1:sep+1+row_bytes]
+                pos = sep + 1 + row_bytes
     
-    return i+1, vec_dim
+    words = b"\n".join(words).decode(encoding).split("\n")
+    return words, vectors
 
 
-def _load_from_file(path: str, encoding=None, skiprows: Union[int, List[int]]=None, verbose=False):
+def _load_from_file(path: str, encoding=None, skiprows: Union[int, List[int]]=None, verbose=False, 
+                    binary: bool=None, num_workers: int=0, chunk_size: int=2**24):
+    """Load vectors from a text file (GloVe or word2vec text format) in a single pass, or from a word2vec binary file. 
+    
+    Parameters
+    ----------
+    binary: bool
+        Whether the file is in word2vec binary format; inferred from the `.bin` extension if None. 
+    num_workers: int
+        If positive, the text file is split into chunks of about `chunk_size` bytes, parsed by a process pool. 
+    """
     logger.info(f"Loading vectors from {path}")
+    encoding = 'utf-8' if encoding is None else encoding
     if skiprows is None:
         skiprows = []
     elif isinstance(skiprows, int):
         skiprows = [skiprows]
     assert all(isinstance(row, int) for row in skiprows)
     
-    words, vectors = [], []
-    num_lines, vec_dim = _infer_shape(path, skiprows)
-    with open(path, 'rb') as f:
-        num_bad_lines = 0
-        for i, line in tqdm.tqdm(enumerate(f), total=num_lines, disable=not verbose, ncols=100, desc="Loading vectors"):
-            if i in skiprows:
-                continue
-            try:
-                w, vector = _parse_line(line)
-                words.append(w.decode(encoding))
-                assert len(vector) == vec_dim
-                vectors.append(vector)
-            except KeyboardInterrupt as e:
-                raise e
-            except:
-                num_bad_lines += 1
-                logger.warning(f"Bad line detected: {line.rstrip()}")
+    if binary is None:
+        binary = path.endswith('.bin')
+    if binary:
+        words, vectors = _load_from_binary_file(path, encoding, verbose=verbose)
+    else:
+        words, vectors = _load_from_text_file(path, encoding, skiprows, verbose=verbose, num_workers=num_workers, chunk_size=chunk_size)
     
-    if num_bad_lines > 0:
-        logger.warning(f"Totally {num_bad_lines} bad lines exist and were skipped")
-    
-    vectors = torch.tensor(vectors)
+    vectors = torch.from_numpy(vectors)
     return words, vectors
 
 
 
+def _lookup_key(token: str):
+    """The normalized key for fuzzy lookup, i.e., full-width characters to half-width, case-folded, and digits to zeros. 
+    """
+    return digit_re.sub('0', Full2Half.full2half(token).casefold())
+
+
+def _variant_rank(token: str):
+    """The priority of a token among those sharing a lookup key, following the order of lower, title and upper cases. 
+    """
+    if token == token.lower():
+        return 0
+    elif token == token.title():
+        return 1
+    elif token == token.upper():
+        return 2
+    else:
+        return 3
+
+
+
+def _merge_topk(best_scores: torch.Tensor, best_indices: torch.Tensor, scores: torch.Tensor, indices: torch.Tensor, k: int):
+    """Merge the running top-k with the candidates of a new chunk. 
+    """
+    best_scores = torch.cat([best_scores, scores], dim=1)
+    best_indices = torch.cat([best_indices, indices], dim=1)
+    if best_scores.size(1) > k:
+        best_scores, pos = best_scores.topk(k, dim=1)
+        best_indices = best_indices.gather(1, pos)
+    return best_scores, best_indices
+
+
+def _normalize_rows(x: torch.Tensor, norms: torch.Tensor=None):
+    x = x.float()
+    if norms is None:
+        norms = x.norm(dim=1)
+    return x / norms.clamp(min=1e-12).unsqueeze(1)
+
+
+
+class IVFIndex(object):
+    """An inverted-file index for approximate nearest-neighbor search by cosine similarity. 
+    
+    The (normalized) vectors are clustered by spherical k-means into `num_lists` inverted lists. A query 
+    is compared to the centroids, and then exactly to the vectors in the `num_probes` closest lists. 
+    Only the centroids, row norms and list assignments are stored; the vectors are never copied. 
+    
+    Parameters
+    ----------
+    vectors: torch.Tensor
+        The (num_rows, emb_dim) matrix, which may be memory-mapped. 
+    num_lists: int
+        The number of inverted lists; defaults to about sqrt(num_rows). 
+    num_probes: int
+        The number of lists to search per query. Searching all lists is exact. 
+    """
+    def __init__(self, vectors: torch.Tensor, num_lists: int=None, num_probes: int=8, num_iters: int=10, 
+                 max_train_size: int=100000, chunk_size: int=2**16, seed: int=0):
+        self.vectors = vectors
+        self.num_lists = min(num_lists or int(vectors.size(0)**0.5) + 1, vectors.size(0))
+        self.num_probes = num_probes
+        self.chunk_size = chunk_size
+        generator = torch.Generator().manual_seed(seed)
+        
+        self.norms = torch.cat([vectors[start:start+chunk_size].float().norm(dim=1) for start in range(0, vectors.size(0), chunk_size)])
+        train_ids = torch.randperm(vectors.size(0), generator=generator)[:max(max_train_size, self.num_lists)]
+        train_ids = train_ids.sort().values
+        train_vecs = _normalize_rows(vectors[train_ids], self.norms[train_ids])
+        self.centroids = self._train_centroids(train_vecs, num_iters, generator)
+        
+        list_ids = torch.cat([self._assign(_normalize_rows(vectors[start:start+chunk_size], self.norms[start:start+chunk_size])) 
+                                  for start in range(0, vectors.size(0), chunk_size)])
+        # Rows grouped by list: the rows of list `l` are `order[offsets[l]:offsets[l+1]]`
+        # Note: `torch.argsort` supports `stable` only in recent versions
+        self.order = torch.from_numpy(numpy.argsort(list_ids.numpy(), kind='stable'))
+        self.offsets = torch.zeros(self.num_lists+1, dtype=torch.long)
+        self.offsets[1:] = torch.bincount(list_ids, minlength=self.num_lists).cumsum(0)
+        
+        
+    def _assign(self, normalized: torch.Tensor):
+        return (normalized @ self.centroids.T).argmax(dim=1)
+        
+    def _train_centroids(self, train_vecs: torch.Tensor, num_iters: int, generator: torch.Generator):
+        self.centroids = train_vecs[torch.randperm(train_vecs.size(0), generator=generator)[:self.num_lists]].clone()
+        for _ in range(num_iters):
+            list_ids = self._assign(train_vecs)
+            sums = torch.zeros_like(self.centroids).index_add_(0, list_ids, train_vecs)
+            counts = torch.bincount(list_ids, minlength=self.num_lists)
+            # Re-seed the empty lists with random training vectors
+            is_empty = counts == 0
+            sums[is_empty] = train_vecs[torch.randint(train_vecs.size(0), (int(is_empty.sum()), ), generator=generator)]
+            self.centroids = _normalize_rows(sums)
+        return self.centroids
+        
+    def search(self, queries: torch.Tensor, k: int=10, num_probes: int=None):
+        """Return the top-`k` cosine similarities and row indices of normalized `queries`, as two (num_queries, k) tensors. 
+        """
+        num_probes = min(num_probes or self.num_probes, self.num_lists)
+        probes = (queries @ self.centroids.T).topk(num_probes, dim=1).indices
+        
+        best_scores = queries.new_full((queries.size(0), k), -float('inf'))
+        best_indices = torch.full((queries.size(0), k), -1, dtype=torch.long)
+        # Loop over the probed lists, with all queries probing a list scored in one product
+        for list_id in probes.unique().tolist():
+            query_ids = (probes == list_id).any(dim=1).nonzero().squeeze(1)
+            row_ids = self.order[self.offsets[list_id]:self.offsets[list_id+1]]
+            if len(row_ids) == 0:
+                continue
+            scores = queries[query_ids] @ _normalize_rows(self.vectors[row_ids], self.norms[row_ids]).T
+            scores, pos = scores.topk(min(k, len(row_ids)), dim=1)
+            best_scores[query_ids], best_indices[query_ids] = _merge_topk(best_scores[query_ids], best_indices[query_ids], scores, row_ids[pos], k)
+        return best_scores, best_indices
+
+
+
 class Vectors(object):
     def __init__(self, itos: List[str], vectors: torch.FloatTensor, unk_init=None):
         if len(itos) != vectors.size(0):
@@ -68,6 +302,7 @@ class Vectors(object):
         self.itos = itos
         self.vectors = vectors
         self.unk_init = torch.zeros if unk_init is None else unk_init
+        self.ivf_index = None
         
         
     @property
@@ -78,6 +313,8 @@ class Vectors(object):
     def itos(self, itos: List[str]):
         self._itos = itos
         self.stoi = {w: i for i, w in enumerate(itos)}
+        # The index for fuzzy lookup is lazily built
+        self._key2idx = None
         
     def __getitem__(self, token: str):
         if token in self.stoi:
@@ -85,17 +322,82 @@ class Vectors(object):
         else:
             return self.unk_init(self.emb_dim)
         
+    def _build_lookup_index(self):
+        key2idx, key2rank = {}, {}
+        for idx, w in enumerate(self.itos):
+            key, rank = _lookup_key(w), _variant_rank(w)
+            # Earlier tokens (typically more frequent) are preferred among the same rank
+            if key not in key2rank or rank < key2rank[key]:
+                key2idx[key] = idx
+                key2rank[key] = rank
+        self._key2idx = key2idx
+        
+    def lookup_indices(self, tokens: List[str]):
+        """Return the row indices of `tokens` as an int64 array, with -1 for missing tokens. 
+        
+        A token is matched exactly first, then by its lower-case, title-case and upper-case variants, and 
+        finally by its normalized key (see `_lookup_key`), which resolves to the lower-case, title-case, 
+        upper-case or other variant in priority. 
+        """
+        tokens = list(tokens)
+        stoi = self.stoi
+        indices = numpy.fromiter((stoi.get(tok, -1) for tok in tokens), dtype=numpy.int64, count=len(tokens))
+        for variant in [str.lower, str.title, str.upper]:
+            missing = numpy.flatnonzero(indices < 0)
+            if len(missing) == 0:
+                return indices
+            indices[missing] = [stoi.get(variant(tokens[i]), -1) for i in missing]
+        
+        missing = numpy.flatnonzero(indices < 0)
+        if len(missing) > 0:
+            if self._key2idx is None:
+                self._build_lookup_index()
+            indices[missing] = [self._key2idx.get(_lookup_key(tokens[i]), -1) for i in missing]
+        return indices
+        
     def lookup(self, token: str):
-        tried_set = set()
-        # Backup tokens
-        for possible_token in [token, token.lower(), token.title(), token.upper()]:
-            if possible_token in tried_set:
-                continue
-            if possible_token in self.stoi:
-                return self.vectors[self.stoi[possible_token]]
-            else:
-                tried_set.add(possible_token)
-        return None
+        idx = self.lookup_indices([token])[0]
+        return self.vectors[idx] if idx >= 0 else None
+        
+    def build_ivf_index(self, **kwargs):
+        """Build an `IVFIndex` for approximate `knn` and `most_similar` over large tables. 
+        """
+        self.ivf_index = IVFIndex(self.vectors, **kwargs)
+        return self.ivf_index
+        
+    def knn(self, queries: torch.Tensor, k: int=10, exact: bool=False, chunk_size: int=2**16):
+        """Return the top-`k` cosine similarities and row indices of `queries`, as two (num_queries, k) tensors. 
+        
+        The search is exact over chunks of `chunk_size` rows, unless an IVF index is built and `exact` is False. 
+        """
+        queries = _normalize_rows(queries.unsqueeze(0) if queries.dim() == 1 else queries)
+        k = min(k, self.voc_dim)
+        if self.ivf_index is not None and not exact:
+            return self.ivf_index.search(queries, k)
+        
+        best_scores = queries.new_empty((queries.size(0), 0))
+        best_indices = torch.empty((queries.size(0), 0), dtype=torch.long)
+        for start in range(0, self.voc_dim, chunk_size):
+            scores = queries @ _normalize_rows(self.vectors[start:start+chunk_size]).T
+            scores, indices = scores.topk(min(k, scores.size(1)), dim=1)
+            best_scores, best_indices = _merge_topk(best_scores, best_indices, scores, indices + start, k)
+        return best_scores, best_indices
+        
+    def most_similar(self, tokens: Union[str, List[str]], k: int=10, **kwargs):
+        """Return the `k` most similar tokens (with cosine similarities) of each token, excluding itself. 
+        An empty list is returned for a token without vector. 
+        """
+        if isinstance(tokens, str):
+            return self.most_similar([tokens], k=k, **kwargs)[0]
+        
+        indices = torch.from_numpy(self.lookup_indices(tokens))
+        is_found = indices >= 0
+        results = [[] for _ in tokens]
+        if is_found.any():
+            scores, neighbors = self.knn(self.vectors[indices[is_found]], k=k+1, **kwargs)
+            for i, idx, curr_scores, curr_neighbors in zip(is_found.nonzero().squeeze(1).tolist(), indices[is_found].tolist(), scores.tolist(), neighbors.tolist()):
+                results[i] = [(self.itos[j], score) for j, score in zip(curr_neighbors, curr_scores) if j != idx and j >= 0][:k]
+        return results
         
     def __repr__(self):
         return f"{self.__class__.__name__}({self.voc_dim}, {self.emb_dim})"
@@ -112,23 +414,107 @@ class Vectors(object):
         return self.vectors.size(1)
         
     @staticmethod
-    def save_to_cache(path: str, itos: List[str], vectors: torch.FloatTensor):
-        logger.info(f"Saving vectors to {path}.pt")
-        torch.save((itos, vectors), f"{path}.pt")
+    def _cache_paths(path: str):
+        return f"{path}.vectors.npy", f"{path}.itos.txt", f"{path}.index.npz"
         
-    @staticmethod
-    def load_from_cache(path: str):
-        logger.info(f"Loading vectors from {path}.pt")
-        itos, vectors = torch.load(f"{path}.pt")
-        return itos, vectors
+    @classmethod
+    def cache_exists(cls, path: str):
+        return all(os.path.exists(p) for p in cls._cache_paths(path)) or os.path.exists(f"{path}.pt")
+        
+    @classmethod
+    def save_to_cache(cls, path: str, itos: List[str], vectors: torch.FloatTensor, hash_batch_size: int=100000):
+        """Save vectors as a numpy matrix (to be memory-mapped), the tokens as UTF-8 lines, and an index of 
+        the sorted token hashes (for looking up rows without reading all tokens). 
+        """
+        vectors_path, itos_path, index_path = cls._cache_paths(path)
+        logger.info(f"Saving vectors to {vectors_path}")
+        numpy.save(vectors_path, vectors.numpy().astype(numpy.float32, copy=False))
+        
+        encoded = [w.encode('utf-8') for w in itos]
+        with open(itos_path, 'wb') as f:
+            f.write(b"\n".join(encoded))
+        offsets = numpy.zeros(len(itos)+1, dtype=numpy.int64)
+        numpy.cumsum([len(w)+1 for w in encoded], out=offsets[1:])
+        # Hash in batches, to bound the memory of fixed-width unicode arrays
+        keys = numpy.concatenate([_hash_tokens(numpy.asarray(itos[k:k+hash_batch_size], dtype=numpy.str_)) 
+                                  for k in range(0, len(itos), hash_batch_size)] + [numpy.empty(0, dtype=numpy.uint64)])
+        ids = numpy.argsort(keys, kind='stable')
+        numpy.savez(index_path, keys=keys[ids], ids=ids, offsets=offsets)
+        
+    @classmethod
+    def load_from_cache(cls, path: str):
+        vectors_path, itos_path, index_path = cls._cache_paths(path)
+        if not os.path.exists(vectors_path):
+            logger.info(f"Loading vectors from {path}.pt")
+            itos, vectors = torch.load(f"{path}.pt")
+            return itos, vectors
+        
+        logger.info(f"Loading vectors from {vectors_path}")
+        # Copy-on-write memory map: the rows are read from disk only when accessed
+        vectors = numpy.load(vectors_path, mmap_mode='c')
+        with open(itos_path, 'rb') as f:
+            itos = f.read().decode('utf-8').split("\n") if vectors.shape[0] > 0 else []
+        return itos, torch.from_numpy(vectors)
         
     @classmethod
-    def load(cls, path: str, encoding=None, **kwargs):
-        if os.path.exists(f"{path}.pt"):
+    def load_from_cache_for_vocab(cls, path: str, vocab: List[str]):
+        """Load only the rows of tokens in `vocab`, including their lower-, title- and upper-case variants. 
+        The other rows and tokens are never read into memory. 
+        
+        Notes
+        -----
+        The variants by full-width or digit normalization are not covered, since the cached index is built on raw tokens. 
+        """
+        candidates = list(dict.fromkeys(possible_token for token in vocab 
+                                            for possible_token in [token, token.lower(), token.title(), token.upper()]))
+        vectors_path, itos_path, index_path = cls._cache_paths(path)
+        if not os.path.exists(vectors_path):
             itos, vectors = cls.load_from_cache(path)
-        else:
-            itos, vectors = _load_from_file(path, encoding, **kwargs)
+            stoi = {w: i for i, w in enumerate(itos)}
+            found = sorted((stoi[token], token) for token in candidates if token in stoi)
+            return [token for row, token in found], vectors[torch.tensor([row for row, token in found], dtype=torch.long)]
+        
+        logger.info(f"Loading vectors from {vectors_path} for {len(vocab)} tokens")
+        with numpy.load(index_path) as index:
+            keys, ids, offsets = index['keys'], index['ids'], index['offsets']
+        
+        found = []
+        if len(keys) > 0 and len(candidates) > 0:
+            hashes = _hash_tokens(numpy.asarray(candidates, dtype=numpy.str_))
+            # The last of duplicate tokens is used, consistent with `stoi`
+            pos = (numpy.searchsorted(keys, hashes, side='right') - 1).clip(min=0)
+            itos_bytes = numpy.memmap(itos_path, dtype=numpy.uint8, mode='r')
+            for token, k, is_hit in zip(candidates, pos.tolist(), (keys[pos] == hashes).tolist()):
+                row = int(ids[k])
+                # Verify the token, in case of hash collisions
+                if is_hit and itos_bytes[offsets[row]:offsets[row+1]-1].tobytes().decode('utf-8') == token:
+                    found.append((row, token))
+        
+        # Read the rows in the file order
+        found.sort()
+        rows = numpy.array([row for row, token in found], dtype=numpy.int64)
+        vectors = numpy.load(vectors_path, mmap_mode='r')
+        return [token for row, token in found], torch.from_numpy(numpy.ascontiguousarray(vectors[rows]))
+        
+    @classmethod
+    def _load_with_cache(cls, path: str, load_from_source, vocab: List[str]=None):
+        if not cls.cache_exists(path):
+            itos, vectors = load_from_source()
             cls.save_to_cache(path, itos, vectors)
+        if vocab is None:
+            return cls.load_from_cache(path)
+        else:
+            return cls.load_from_cache_for_vocab(path, vocab)
+        
+    @classmethod
+    def load(cls, path: str, encoding=None, vocab: List[str]=None, **kwargs):
+        """
+        Parameters
+        ----------
+        vocab: List[str]
+            If provided, only the vectors of these tokens (and their backup tokens) are loaded. 
+        """
+        itos, vectors = cls._load_with_cache(path, lambda: _load_from_file(path, encoding, **kwargs), vocab=vocab)
         return cls(itos, vectors)
 
 
@@ -137,27 +523,19 @@ class GloVe(Vectors):
     """
     https://nlp.stanford.edu/projects/glove/
     """
-    def __init__(self, path: str, encoding=None, **kwargs):
-        if os.path.exists(f"{path}.pt"):
-            itos, vectors = self.load_from_cache(path)
-        else:
-            itos, vectors = _load_from_file(path, encoding)
-            self.save_to_cache(path, itos, vectors)
-        
+    def __init__(self, path: str, encoding=None, num_workers: int=0, vocab: List[str]=None, **kwargs):
+        itos, vectors = self._load_with_cache(path, lambda: _load_from_file(path, encoding, num_workers=num_workers), vocab=vocab)
         super().__init__(itos, vectors, **kwargs)
 
 
 class Senna(Vectors):
-    def __init__(self, path: str, **kwargs):
-        if os.path.exists(f"{path}.pt"):
-            itos, vectors = self.load_from_cache(path)
-        else:
-            with open(f"{path}/hash/words.lst", 'r') as f:
-                itos = [w.strip() for w in f.readlines()]
-            with open(f"{path}/embeddings/embeddings.txt", 'r') as f:
-                vectors = [[float(v) for v in vector.strip().split()] for vector in f.readlines()]
-                
-            vectors = torch.tensor(vectors)
-            self.save_to_cache(path, itos, vectors)
-        
+    def __init__(self, path: str, vocab: List[str]=None, **kwargs):
+        itos, vectors = self._load_with_cache(path, lambda: self._load_from_source(path), vocab=vocab)
         super().__init__(itos, vectors, **kwargs)
+
+    @staticmethod
+    def _load_from_source(path: str):
+        with open(f"{path}/hash/words.lst", 'r') as f:
+            itos = [w.strip() for w in f.readlines()]
+        vectors = torch.from_numpy(numpy.loadtxt(f"{path}/embeddings/embeddings.txt", dtype=numpy.float32, ndmin=2))
+        return itos, vectors
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from typing import List
 from collections import Counter
+import itertools
+import numpy
 
 
 class Vocab(object):
@@ -48,11 +50,172 @@ class Vocab(object):
         self._itos = itos
         self.stoi = {w: i for i, w in enumerate(itos)}
         
+    @property
+    def unk_idx(self):
+        return self.stoi.get('<unk>')
+        
     def __getitem__(self, token):
         return self.stoi.get(token, self.stoi.get('<unk>'))
         
     def __len__(self):
         return len(self.itos)
         
-    def lookup_indices(self, tokens):
-        return [self.__getitem__(token) for token in tokens]
+    def lookup_indices(self, tokens: List[str]):
+        # `map` over the bound `dict.get` runs the loop in C
+        return list(map(self.stoi.get, tokens, itertools.repeat(self.unk_idx)))
+        
+    def lookup_tokens(self, indices: List[int]):
+        return [self.itos[i] for i in indices]
+        
+    def lookup_array(self, tokens: List[str]):
+        """Map a sequence of tokens to an int64 array of indices. 
+        """
+        indices = numpy.fromiter(map(self.stoi.get, tokens, itertools.repeat(self.unk_idx if self.unk_idx is not None else -1)), 
+                                 dtype=numpy.int64, count=len(tokens))
+        if (indices < 0).any():
+            raise KeyError(f"Tokens missing in vocabulary without `<unk>`: {[tok for tok, idx in zip(tokens, indices) if idx < 0]}")
+        return indices
+        
+    def lookup_batch(self, batch_tokens: List[List[str]]):
+        """Map a batch of token sequences to a list of int64 arrays of indices, with one bulk lookup. 
+        """
+        if len(batch_tokens) == 0:
+            return []
+        lens = [len(tokens) for tokens in batch_tokens]
+        indices = self.lookup_array([tok for tokens in batch_tokens for tok in tokens])
+        return numpy.split(indices, numpy.cumsum(lens[:-1]))
+        
+    def freeze(self, hashed: bool=False):
+        """Return a `FrozenVocab` with the same token-index mapping. 
+        """
+        return FrozenVocab(self.itos, hashed=hashed)
+
+
+
+def _hash_tokens(tokens: numpy.ndarray):
+    """Stable (across processes) 64-bit FNV-1a hashes of the code points of a unicode array, vectorized over the tokens. 
+    """
+    char_mat = tokens.view(numpy.uint32).reshape(tokens.size, tokens.dtype.itemsize // 4)
+    lens = numpy.char.str_len(tokens).reshape(-1)
+    hashes = numpy.full(tokens.size, 0xcbf29ce484222325, dtype=numpy.uint64)
+    prime = numpy.uint64(0x100000001b3)
+    with numpy.errstate(over='ignore'):
+        for j in range(char_mat.shape[1]):
+            # The padding null characters are skipped, so that the hashes do not depend on the array width
+            updated = (hashes ^ char_mat[:, j]) * prime
+            hashes = numpy.where(j < lens, updated, hashes)
+    return hashes.reshape(tokens.shape)
+
+
+
+class FrozenVocab(object):
+    """An immutable vocabulary backed by numpy arrays, with vectorized lookups by binary search over 
+    the sorted 64-bit hashes of tokens. 
+    
+    Without Python dicts or strings, it takes much less memory than `Vocab` for large vocabularies of 
+    short tokens (e.g., bigrams or trigrams), and is pickled (or saved by `save`) as a few raw arrays. 
+    
+    Parameters
+    ----------
+    itos: List[str]
+        The tokens in index order. 
+    hashed: bool
+        If False, the tokens are kept in a fixed-width unicode array, which verifies the lookups and 
+        supports `itos` and `lookup_tokens`. 
+        If True, only the hashes are kept. A hash collision (with a probability around n^2/2^65 for 
+        n tokens) maps an unseen token to the index of a known token. 
+    unk_token: str
+        The token for unknown tokens. 
+    """
+    def __init__(self, itos: List[str]=None, hashed: bool=False, unk_token: str='<unk>'):
+        self.hashed = hashed
+        self.unk_token = unk_token
+        if itos is not None:
+            tokens = numpy.asarray(itos, dtype=numpy.str_)
+            keys = _hash_tokens(tokens)
+            self._ids = numpy.argsort(keys, kind='stable').astype(numpy.int32)
+            self._keys = keys[self._ids]
+            if (self._keys[1:] == self._keys[:-1]).any():
+                raise ValueError("Duplicate tokens (or hash collisions) in `itos`")
+            self._tokens = None if hashed else tokens
+            self._build_unk_idx()
+        
+        
+    def _build_unk_idx(self):
+        idx = self._search(numpy.asarray([self.unk_token], dtype=numpy.str_))[0]
+        self.unk_idx = None if idx < 0 else int(idx)
+        
+    def _search(self, tokens: numpy.ndarray):
+        if len(self._keys) == 0:
+            return numpy.full(tokens.shape, -1, dtype=numpy.int64)
+        keys = _hash_tokens(tokens)
+        pos = numpy.searchsorted(self._keys, keys).clip(max=len(self._keys)-1)
+        indices = self._ids[pos].astype(numpy.int64)
+        is_found = self._keys[pos] == keys
+        if not self.hashed:
+            is_found &= self._tokens[indices] == tokens
+        indices[~is_found] = -1
+        return indices
+        
+    @property
+    def itos(self):
+        if self.hashed:
+            raise TypeError("`itos` is unavailable for a hashed `FrozenVocab`")
+        return self._tokens.tolist()
+        
+    def __getitem__(self, token):
+        return self.lookup_indices([token])[0]
+        
+    def __len__(self):
+        return len(self._keys)
+        
+    def __getstate__(self):
+        return {'hashed': self.hashed, 'unk_token': self.unk_token, 'keys': self._keys, 'ids': self._ids, 'tokens': self._tokens}
+        
+    def __setstate__(self, state: dict):
+        self.hashed = state['hashed']
+        self.unk_token = state['unk_token']
+        self._keys = state['keys']
+        self._ids = state['ids']
+        self._tokens = state['tokens']
+        self._build_unk_idx()
+        
+    def lookup_array(self, tokens: List[str]):
+        """Map a sequence of tokens to an int64 array of indices. 
+        """
+        indices = self._search(numpy.asarray(tokens, dtype=numpy.str_))
+        if (indices < 0).any():
+            if self.unk_idx is None:
+                raise KeyError(f"Tokens missing in vocabulary without `{self.unk_token}`: {[tok for tok, idx in zip(tokens, indices) if idx < 0]}")
+            indices[indices < 0] = self.unk_idx
+        return indices
+        
+    def lookup_indices(self, tokens: List[str]):
+        return self.lookup_array(tokens).tolist()
+        
+    def lookup_tokens(self, indices: List[int]):
+        if self.hashed:
+            raise TypeError("`lookup_tokens` is unavailable for a hashed `FrozenVocab`")
+        return self._tokens[numpy.asarray(indices, dtype=numpy.int64)].tolist()
+        
+    def lookup_batch(self, batch_tokens: List[List[str]]):
+        """Map a batch of token sequences to a list of int64 arrays of indices, with one bulk lookup. 
+        """
+        if len(batch_tokens) == 0:
+            return []
+        lens = [len(tokens) for tokens in batch_tokens]
+        indices = self.lookup_array([tok for tokens in batch_tokens for tok in tokens])
+        return numpy.split(indices, numpy.cumsum(lens[:-1]))
+        
+    def save(self, file_path: str):
+        tokens = numpy.empty(0, dtype=numpy.str_) if self.hashed else self._tokens
+        numpy.savez(file_path, hashed=self.hashed, unk_token=self.unk_token, keys=self._keys, ids=self._ids, tokens=tokens)
+        
+    @classmethod
+    def load(cls, file_path: str):
+        vocab = cls.__new__(cls)
+        with numpy.load(file_path, allow_pickle=False) as npz:
+            hashed = bool(npz['hashed'])
+            vocab.__setstate__({'hashed': hashed, 'unk_token': str(npz['unk_token']), 
+                                'keys': npz['keys'], 'ids': npz['ids'], 'tokens': None if hashed else npz['tokens']})
+        return vocab
@@ -89,14 +89,190 @@ class TensorWrapper(object):
 
 
 
+def _collect_tensor_slots(wrapper: TensorWrapper, name: str, slots: list, skip=None):
+    """Recursively collect the slots `(wrapper, name, keys)` holding tensors, where `wrapper` is the innermost 
+    `TensorWrapper`, `name` is its attribute, and `keys` index the tensor in the (nested) lists/dicts of the attribute. 
+    The attributes `(wrapper, name)` satisfying `skip` are not collected. 
+    """
+    if skip is not None and skip(wrapper, name):
+        return
+        
+    def _collect(x, keys: tuple):
+        if isinstance(x, torch.Tensor):
+            slots.append((wrapper, name, keys))
+        elif isinstance(x, TensorWrapper):
+            for sub_name in x.__dict__:
+                _collect_tensor_slots(x, sub_name, slots, skip=skip)
+        elif isinstance(x, list):
+            for i, xi in enumerate(x):
+                _collect(xi, keys + (i, ))
+        elif isinstance(x, dict):
+            for k, xi in x.items():
+                _collect(xi, keys + (k, ))
+    
+    _collect(getattr(wrapper, name), ())
+
+
+def _get_slot(slot):
+    wrapper, name, keys = slot
+    x = getattr(wrapper, name)
+    for k in keys:
+        x = x[k]
+    return x
+
+
+def _copy_containers(x):
+    # Copy the nested lists/dicts, but not the tensors and `TensorWrapper`s therein
+    if isinstance(x, list):
+        return [_copy_containers(xi) for xi in x]
+    elif isinstance(x, dict):
+        return {k: _copy_containers(xi) for k, xi in x.items()}
+    else:
+        return x
+
+
+def _set_slots(slots, values):
+    """Assign `values` to `slots`. The lists/dicts holding the tensors are rebuilt instead of modified in place, 
+    since they may be shared with other objects (e.g., the cached `TargetWrapper`s of `Dataset`). 
+    """
+    rebuilt = {}
+    for (wrapper, name, keys), value in zip(slots, values):
+        if len(keys) == 0:
+            setattr(wrapper, name, value)
+            continue
+        if (id(wrapper), name) not in rebuilt:
+            rebuilt[(id(wrapper), name)] = _copy_containers(getattr(wrapper, name))
+            setattr(wrapper, name, rebuilt[(id(wrapper), name)])
+        x = rebuilt[(id(wrapper), name)]
+        for k in keys[:-1]:
+            x = x[k]
+        x[keys[-1]] = value
+
+
+def _contiguous_stride(size: torch.Size):
+    stride, numel = [], 1
+    for dim_size in reversed(size):
+        stride.insert(0, numel)
+        numel *= dim_size
+    return tuple(stride)
+
+
+def _pack_tensors(tensors: list, pin_memory: bool=False):
+    """Copy `tensors` into a contiguous byte buffer, and return the buffer with the layout of each tensor. 
+    The offsets are aligned to the largest element size, so that each tensor can be viewed from the buffer. 
+    """
+    align = max([t.element_size() for t in tensors] + [1])
+    layout, num_bytes = [], 0
+    for t in tensors:
+        num_bytes = (num_bytes + align - 1) // align * align
+        # The offset is counted in elements of the tensor's dtype
+        layout.append((num_bytes // t.element_size(), t.dtype, t.size(), _contiguous_stride(t.size())))
+        num_bytes += t.numel() * t.element_size()
+    num_bytes = (num_bytes + align - 1) // align * align
+    
+    buffer = torch.empty(num_bytes, dtype=torch.uint8, pin_memory=pin_memory)
+    views = _unpack_tensors(buffer, layout)
+    for t, view in zip(tensors, views):
+        view.copy_(t)
+    return buffer, layout, views
+
+
+def _unpack_tensors(buffer: torch.Tensor, layout: list):
+    # One `as_strided` per tensor is much cheaper than slicing and viewing
+    typed_buffers = {}
+    views = []
+    for offset, dtype, size, stride in layout:
+        if dtype not in typed_buffers:
+            typed_buffers[dtype] = buffer.view(dtype)
+        views.append(typed_buffers[dtype].as_strided(size, stride, offset))
+    return views
+
+
+
 class Batch(TensorWrapper):
     """A wrapper of batch. 
+    
+    The tensors (including those in the nested `TensorWrapper`s, lists and dicts) are registered on construction. 
+    `pin_memory` packs them into one contiguous pinned buffer, and `to` moves them to another device by a single 
+    (non-blocking) copy of the buffer, with the tensors replaced by views of the copied buffer. 
+    
+    Notes
+    -----
+    `register_tensors` should be re-invoked if tensors are added to the batch after construction; 
+    otherwise, the batch falls back to moving the tensors one by one, if any registered slot is detected modified. 
     """
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.register_tensors()
         
     def __repr__(self):
-        return "Batch with attributes: {}".format(", ".join(self.__dict__))
+        return "Batch with attributes: {}".format(", ".join(name for name in self.__dict__ if not name.startswith('_')))
+        
+        
+    def register_tensors(self):
+        # The per-example targets are not registered if their padded form is in the batch (see `TargetWrapper`)
+        skip = lambda wrapper, name: getattr(wrapper, '_batched_attributes', {}).get(name) in self.__dict__
+        slots = []
+        for name in self.__dict__:
+            if not name.startswith('_'):
+                _collect_tensor_slots(self, name, slots, skip=skip)
+        
+        # Tensors shared by multiple slots are packed once
+        tensor_ids, self._tensors = {}, []
+        for slot in slots:
+            t = _get_slot(slot)
+            if id(t) not in tensor_ids:
+                tensor_ids[id(t)] = len(self._tensors)
+                self._tensors.append(t)
+        # Use tuples, which are skipped by `_apply_to_tensors`
+        self._tensors = tuple(self._tensors)
+        self._tensor_slots = tuple(slots)
+        self._slot2tensor = tuple(tensor_ids[id(_get_slot(slot))] for slot in slots)
+        self._buffer = None
+        return self
+        
+    def _registered_tensors_valid(self):
+        return (hasattr(self, '_tensor_slots') and 
+                all(_get_slot(slot) is self._tensors[k] for slot, k in zip(self._tensor_slots, self._slot2tensor)) and 
+                all(not t.requires_grad for t in self._tensors))
+        
+    def _assign_tensors(self, tensors: list, buffer: torch.Tensor=None):
+        _set_slots(self._tensor_slots, [tensors[k] for k in self._slot2tensor])
+        self._tensors = tuple(tensors)
+        self._buffer = buffer
+        
+        
+    def _packed_buffer(self, pin_memory: bool=False):
+        # Re-use the buffer if the tensors are already packed (e.g., pinned in `DataLoader`)
+        if self._buffer is not None and (self._buffer.is_pinned() or not pin_memory):
+            return self._buffer, self._buffer_layout
+        buffer, self._buffer_layout, views = _pack_tensors(self._tensors, pin_memory=pin_memory)
+        self._assign_tensors(views, buffer)
+        return buffer, self._buffer_layout
+        
+    def _apply_to_tensors(self, func):
+        # Fall back to applying `func` to the tensors one by one, and then re-register the resulting tensors
+        self._buffer = None
+        super()._apply_to_tensors(func)
+        return self.register_tensors()
+        
+    def pin_memory(self):
+        if not self._registered_tensors_valid() or any(t.device.type != 'cpu' for t in self._tensors):
+            return super().pin_memory()
+        self._packed_buffer(pin_memory=True)
+        return self
+        
+    def to(self, *args, **kwargs):
+        # Only the device movement (e.g., `batch.to(device, non_blocking=True)`) is packed
+        if (len(args) == 1 and isinstance(args[0], (str, torch.device)) and set(kwargs.keys()) <= {'non_blocking'} and 
+                self._registered_tensors_valid() and len(self._tensors) > 0):
+            device = torch.device(args[0])
+            if all(t.device.type == 'cpu' for t in self._tensors) and device.type != 'cpu':
+                buffer, layout = self._packed_buffer()
+                buffer = buffer.to(device, **kwargs)
+                self._assign_tensors(_unpack_tensors(buffer, layout), buffer)
+                return self
+        return super().to(*args, **kwargs)
 
 
 
@@ -111,6 +287,10 @@ class TargetWrapper(TensorWrapper):
         in other words, those **attributes that will be used in decoding** should be identical with or without the ground truth. 
         However, some **attributes that will not be used in decoding** may contain information of the ground truth for computing evaluation loss. 
     (2) Do NOT check the attributes (being tensors or not) for a target object. 
+    (3) `_batched_attributes` maps the attributes to the names of their padded forms in `Batch` (if any), which 
+        are used in computing losses instead; the attributes are then not moved along with the batch. 
     """
+    _batched_attributes = {}
+        
     def __init__(self, training: bool=True):
         self.training = training
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import sys
+import argparse
+import timeit
+import torch
+
+from eznlp import auto_device
+from eznlp.io import JsonIO
+from eznlp.dataset import Dataset
+from eznlp.wrapper import TensorWrapper
+from eznlp.model import ExtractorConfig
+from eznlp.model import SpanClassificationDecoderConfig, SpanRelClassificationDecoderConfig, JointExtractionDecoderConfig
+
+
+def parse_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--device', type=str, default='auto',
+                        help="device to transfer to; `meta` measures the host-side overhead only")
+    parser.add_argument('--batch_size', type=int, default=32,
+                        help="batch size")
+    parser.add_argument('--num_repeats', type=int, default=200,
+                        help="number of transfers to time")
+    return parser.parse_args()
+
+
+def _legacy_to(batch, device):
+    # Move the tensors one by one, as `TensorWrapper.to`
+    return TensorWrapper._apply_to_tensors(batch, lambda x: x.to(device, non_blocking=True))
+
+
+if __name__ == '__main__':
+    args = parse_arguments(argparse.ArgumentParser())
+    device = auto_device() if args.device == 'auto' else torch.device(args.device)
+    if device.type == 'cpu':
+        device = torch.device('meta')
+    
+    data = JsonIO(text_key='tokens', chunk_key='entities', chunk_type_key='type', chunk_start_key='start', chunk_end_key='end',
+                  relation_key='relations', relation_type_key='type', relation_head_key='head', relation_tail_key='tail',
+                  verbose=False).read("data/conll2004/demo.conll04_train.json")
+    config = ExtractorConfig(decoder=JointExtractionDecoderConfig(ck_decoder=SpanClassificationDecoderConfig(),
+                                                                  attr_decoder=None,
+                                                                  rel_decoder=SpanRelClassificationDecoderConfig()))
+    dataset = Dataset(data, config)
+    dataset.build_vocabs_and_dims()
+    
+    def make_batch():
+        # Pinning (and packing) is done in the `DataLoader`, so it is excluded from the timing
+        batch = dataset.collate([dataset[i % len(dataset)] for i in range(args.batch_size)])
+        if device.type == 'cuda':
+            return batch.pin_memory()
+        else:
+            batch._packed_buffer()
+            return batch
+    
+    print(f"Device: {device}, {len(make_batch()._tensors)} tensors per batch", file=sys.stderr)
+    
+    for name, move in [('per-tensor', _legacy_to), ('packed', lambda batch, device: batch.to(device, non_blocking=True))]:
+        # Use fresh batches, since the batches are moved inplace
+        batches = [make_batch() for _ in range(args.num_repeats)]
+        def run():
+            for batch in batches:
+                move(batch, device)
+            if device.type == 'cuda':
+                torch.cuda.synchronize(device)
+        elapsed = timeit.timeit(run, number=1)
+        print(f"{name:>10}: {elapsed / args.num_repeats * 1e6:.1f} us per batch", file=sys.stderr)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import argparse
+import timeit
+import numpy
+import torch
+
+from eznlp.vectors import Vectors, _load_from_file, _parse_line
+
+
+def parse_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--num_words', type=int, default=200000,
+                        help="number of words in the synthetic file")
+    parser.add_argument('--vec_dim', type=int, default=200,
+                        help="vector dimension")
+    parser.add_argument('--num_workers', type=int, default=os.cpu_count(),
+                        help="number of processes for parallel parsing")
+    parser.add_argument('--path', type=str, default="cache/benchmark-vectors.txt",
+                        help="path of the synthetic file")
+    return parser.parse_args()
+
+
+def _legacy_load(path: str, encoding='utf-8'):
+    # Infer the shape in a first pass, and parse every line into a list of floats in a second pass
+    with open(path, 'rb') as f:
+        for i, line in enumerate(f):
+            pass
+    words, vectors = [], []
+    with open(path, 'rb') as f:
+        for line in f:
+            w, vector = _parse_line(line)
+            words.append(w.decode(encoding))
+            vectors.append(vector)
+    return words, torch.tensor(vectors)
+
+
+if __name__ == '__main__':
+    args = parse_arguments(argparse.ArgumentParser())
+    rng = numpy.random.default_rng(0)
+    with open(args.path, 'w', encoding='utf-8') as f:
+        for i in range(args.num_words):
+            f.write(f"word{i} " + " ".join(f"{v:.5f}" for v in rng.standard_normal(args.vec_dim)) + "\n")
+    with open(args.path.replace('.txt', '.bin'), 'wb') as f:
+        f.write(f"{args.num_words} {args.vec_dim}\n".encode('utf-8'))
+        for i in range(args.num_words):
+            f.write(f"word{i} ".encode('utf-8') + rng.standard_normal(args.vec_dim).astype(numpy.float32).tobytes() + b"\n")
+    print(f"Synthetic file: {args.num_words} x {args.vec_dim}, {os.path.getsize(args.path) / 2**20:.1f} MB", file=sys.stderr)
+    
+    for name, load in [('legacy', lambda: _legacy_load(args.path)), 
+                       ('bulk', lambda: _load_from_file(args.path)), 
+                       (f'bulk x{args.num_workers}', lambda: _load_from_file(args.path, num_workers=args.num_workers)), 
+                       ('binary', lambda: _load_from_file(args.path.replace('.txt', '.bin')))]:
+        elapsed = timeit.timeit(load, number=1)
+        print(f"{name:>10}: {elapsed:.2f} s", file=sys.stderr)
+
+    itos, vectors = _load_from_file(args.path)
+    Vectors.save_to_cache(args.path, itos, vectors)
+    vocab = itos[::100]
+    for name, load in [('legacy cache', lambda: torch.load(f"{args.path}.pt")), 
+                       ('memmap cache', lambda: Vectors.load(args.path)), 
+                       (f'vocab {len(vocab)}', lambda: Vectors.load(args.path, vocab=vocab))]:
+        if name == 'legacy cache':
+            torch.save((itos, vectors), f"{args.path}.pt")
+        elapsed = timeit.timeit(load, number=1)
+        print(f"{name:>12}: {elapsed:.3f} s", file=sys.stderr)
+
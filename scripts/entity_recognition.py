@@ -21,7 +21,7 @@ from eznlp.model.bert_like import segment_uniformly_for_bert_like
 from eznlp.training import Trainer, count_params, evaluate_entity_recognition
 
 from utils import add_base_arguments, parse_to_args
-from utils import load_data, dataset2language, load_pretrained, load_vectors, build_trainer, header_format, profile
+from utils import load_data, dataset2language, load_pretrained, load_vectors, build_train_loader, build_eval_loader, build_trainer, header_format, profile
 
 
 def parse_arguments(parser: argparse.ArgumentParser):
@@ -204,9 +204,7 @@ def process_IE_data(train_data, dev_data, test_data, args, config):
             vectors = load_vectors(args.language, 50)
         tokenizer = LexiconTokenizer(vectors.itos)
         for data in [train_data, dev_data, test_data]:
-            for data_entry in data:
-                data_entry['tokens'].build_softwords(tokenizer.tokenize)
-                data_entry['tokens'].build_softlexicons(tokenizer.tokenize)
+            tokenizer.batch_build_softwords([data_entry['tokens'] for data_entry in data])
     
     return train_data, dev_data, test_data
 
@@ -253,15 +251,15 @@ if __name__ == '__main__':
         dev_set   = Dataset(dev_data,  train_set.config, training=False)
         test_set  = Dataset(test_data, train_set.config, training=False)
         
-        train_loader = torch.utils.data.DataLoader(train_set, batch_size=args.batch_size, shuffle=True,  collate_fn=train_set.collate)
-        dev_loader   = torch.utils.data.DataLoader(dev_set,   batch_size=args.batch_size, shuffle=False, collate_fn=dev_set.collate)
+        train_loader = build_train_loader(train_set, args)
+        dev_loader   = build_eval_loader(dev_set, args)
     else:
         train_set = Dataset(train_data + dev_data, config, training=True)
         train_set.build_vocabs_and_dims(test_data)
         dev_set   = Dataset([],        train_set.config, training=False)
         test_set  = Dataset(test_data, train_set.config, training=False)
         
-        train_loader = torch.utils.data.DataLoader(train_set, batch_size=args.batch_size, shuffle=True,  collate_fn=train_set.collate)
+        train_loader = build_train_loader(train_set, args)
         dev_loader   = None
     
     logger.info(train_set.summary)
@@ -14,6 +14,7 @@ import transformers
 from eznlp import auto_device
 from eznlp.io import RawTextIO
 from eznlp.dataset import PreTrainingDataset
+from eznlp.sampler import ShardedRandomSampler
 from eznlp.plm import MaskedLMConfig
 from eznlp.training import MaskedLMTrainer, LRLambda, count_params
 
@@ -121,10 +122,16 @@ if __name__ == '__main__':
     assert len(file_paths) > 0
     logger.info(f"Text data files: {len(file_paths)}")
     
+    if use_ddp:
+        rank, world_size = torch.distributed.get_rank(), torch.distributed.get_world_size()
+    else:
+        rank, world_size = 0, 1
+    
+    # Each process only reads and holds its own shard
     io = RawTextIO(encoding='utf-8', verbose=args.log_terminal)
     train_data = []
     for fn in file_paths:
-        train_data += io.read(fn)
+        train_data += io.read(fn, rank=rank, world_size=world_size)
     
     config = MaskedLMConfig(bert_like=bert4pt, tokenizer=tokenizer, 
                             masking_rate=args.masking_rate, masking_rate_dev=args.masking_rate_dev, 
@@ -134,7 +141,10 @@ if __name__ == '__main__':
     
     logger.info(train_set.summary)
     if use_ddp:
-        train_sampler = torch.utils.data.distributed.DistributedSampler(train_set, shuffle=True)
+        # All processes should run the same number of steps
+        num_samples = torch.tensor(len(train_set), device=device)
+        torch.distributed.all_reduce(num_samples, op=torch.distributed.ReduceOp.MIN)
+        train_sampler = ShardedRandomSampler(len(train_set), num_samples=num_samples.item(), shuffle=True, seed=args.seed)
     else:
         train_sampler = None
     
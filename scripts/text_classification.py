@@ -21,7 +21,7 @@ from eznlp.model.bert_like import truncate_for_bert_like
 from eznlp.training import Trainer, count_params, evaluate_text_classification
 
 from utils import add_base_arguments, parse_to_args
-from utils import load_data, dataset2language, load_pretrained, load_vectors, build_trainer, header_format
+from utils import load_data, dataset2language, load_pretrained, load_vectors, build_train_loader, build_eval_loader, build_trainer, header_format
 
 
 def parse_arguments(parser: argparse.ArgumentParser):
@@ -166,8 +166,8 @@ if __name__ == '__main__':
     test_set  = Dataset(test_data, train_set.config, training=False)
     
     logger.info(train_set.summary)
-    train_loader = torch.utils.data.DataLoader(train_set, batch_size=args.batch_size, shuffle=True,  collate_fn=train_set.collate)
-    dev_loader   = torch.utils.data.DataLoader(dev_set,   batch_size=args.batch_size, shuffle=False, collate_fn=dev_set.collate)
+    train_loader = build_train_loader(train_set, args)
+    dev_loader   = build_eval_loader(dev_set, args)
     
     
     logger.info(header_format("Building", sep='-'))
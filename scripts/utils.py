@@ -4,20 +4,19 @@ import argparse
 import logging
 import re
 import json
-import spacy
+import functools
 import jieba
 import random
 import time
 import numpy
 import sklearn.model_selection
 import torch
-import allennlp.modules
-import transformers
-import flair
 
 from eznlp.io import TabularIO, CategoryFolderIO, ConllIO, JsonIO, TextClsIO, KarpathyIO, BratIO, Src2TrgIO
 from eznlp.io import PostIO
 from eznlp.vectors import Vectors, GloVe
+from eznlp.model.flair import load_flair_lm
+from eznlp.sampler import LengthBucketBatchSampler, TokenBudgetBatchSampler
 from eznlp.training import Trainer, LRLambda, collect_params, check_param_groups
 from eznlp.metrics import precision_recall_f1_report
 
@@ -57,6 +56,12 @@ def add_base_arguments(parser: argparse.ArgumentParser):
                              help='scheduler', choices=['None', 'ReduceLROnPlateau', 'LinearDecayWithWarmup', 'PowerDecayWithWarmup'])
     group_train.add_argument('--num_grad_acc_steps', type=int, default=1, 
                              help="number of gradient accumulation steps")
+    group_train.add_argument('--num_workers', type=int, default=0, 
+                             help="number of (persistent) subprocesses for data loading")
+    group_train.add_argument('--length_bucketing', default=False, action='store_true', 
+                             help="whether to batch training sequences of similar lengths")
+    group_train.add_argument('--batch_max_cost', type=int, default=0, 
+                             help="cost budget of a training batch estimated by the decoder (non-positive values fall back to `batch_size`)")
     
     group_model = parser.add_argument_group('model configurations')
     group_model.add_argument('--emb_dim', type=int, default=100, 
@@ -110,8 +115,11 @@ def parse_to_args(parser: argparse.ArgumentParser):
 
 
 
-spacy_nlp_en = spacy.load("en_core_web_sm", disable=['tagger', 'parser', 'ner'])
-spacy_nlp_de = spacy.load("de_core_news_sm", disable=['tagger', 'parser', 'ner'])
+@functools.lru_cache(maxsize=None)
+def load_spacy_nlp(name: str):
+    # NOTE: spaCy models are loaded on demand, to avoid slowing down the startup of all scripts
+    import spacy
+    return spacy.load(name, disable=['tagger', 'parser', 'ner'])
 
 
 dataset2language = {'conll2003': 'English', 
@@ -375,14 +383,14 @@ def load_data(args: argparse.Namespace):
         test_data  = tabular_io.read("data/Tang2015/yelp-2013-seg-20-20.test.ss")
         
     elif args.dataset == 'imdb':
-        folder_io = CategoryFolderIO(categories=["pos", "neg"], mapping={"<br />": "\n"}, tokenize_callback=spacy_nlp_en, encoding='utf-8', verbose=args.log_terminal, 
+        folder_io = CategoryFolderIO(categories=["pos", "neg"], mapping={"<br />": "\n"}, tokenize_callback=load_spacy_nlp("en_core_web_sm"), encoding='utf-8', verbose=args.log_terminal, 
                                      case_mode='lower', number_mode='None')
         train_data = folder_io.read("data/imdb/train")
         test_data  = folder_io.read("data/imdb/test")
         train_data, dev_data = sklearn.model_selection.train_test_split(train_data, test_size=0.2, random_state=args.seed)
         
     elif args.dataset == 'yelp_full':
-        tabular_io = TabularIO(text_col_id=1, label_col_id=0, sep=",", mapping={"\\n": "\n", '\\"': '"'}, tokenize_callback=spacy_nlp_en, verbose=args.log_terminal, 
+        tabular_io = TabularIO(text_col_id=1, label_col_id=0, sep=",", mapping={"\\n": "\n", '\\"': '"'}, tokenize_callback=load_spacy_nlp("en_core_web_sm"), verbose=args.log_terminal, 
                                case_mode='Lower', number_mode='None')
         train_data = tabular_io.read("data/yelp_review_full/train.csv")
         test_data  = tabular_io.read("data/yelp_review_full/test.csv")
@@ -439,7 +447,7 @@ def load_data(args: argparse.Namespace):
         
         
     elif args.dataset == 'multi30k':
-        io = Src2TrgIO(tokenize_callback=spacy_nlp_de, trg_tokenize_callback=spacy_nlp_en, encoding='utf-8', verbose=args.log_terminal, 
+        io = Src2TrgIO(tokenize_callback=load_spacy_nlp("de_core_news_sm"), trg_tokenize_callback=load_spacy_nlp("en_core_web_sm"), encoding='utf-8', verbose=args.log_terminal, 
                        case_mode='Lower', number_mode='None')
         train_data = io.read("data/multi30k/train.en", "data/multi30k/train.de")
         dev_data   = io.read("data/multi30k/val.en", "data/multi30k/val.de")
@@ -472,15 +480,17 @@ def load_data(args: argparse.Namespace):
 
 def load_pretrained(pretrained_str, args: argparse.Namespace, cased=False):
     if pretrained_str.lower() == 'elmo':
+        import allennlp.modules
         return allennlp.modules.Elmo(options_file="assets/allennlp/elmo_2x4096_512_2048cnn_2xhighway_options.json", 
                                      weight_file="assets/allennlp/elmo_2x4096_512_2048cnn_2xhighway_weights.hdf5", 
                                      num_output_representations=1)
         
     elif pretrained_str.lower() == 'flair':
-        return (flair.models.LanguageModel.load_language_model("assets/flair/news-forward-0.4.1.pt"), 
-                flair.models.LanguageModel.load_language_model("assets/flair/news-backward-0.4.1.pt"))
-        
-    elif args.language.lower() == 'english':
+        return (load_flair_lm("assets/flair/news-forward-0.4.1.pt"), 
+                load_flair_lm("assets/flair/news-backward-0.4.1.pt"))
+    
+    import transformers
+    if args.language.lower() == 'english':
         if pretrained_str.lower().startswith('bert'):
             if 'wwm' in pretrained_str.lower():
                 PATH = "assets/transformers/bert-large-cased-whole-word-masking" if cased else "assets/transformers/bert-large-uncased-whole-word-masking"
@@ -585,6 +595,28 @@ def header_format(content: str, sep='=', width=100):
 
 
 
+def _loader_kwargs(args: argparse.Namespace):
+    return {'num_workers': args.num_workers, 
+            'persistent_workers': args.num_workers > 0, 
+            'pin_memory': torch.cuda.is_available()}
+
+
+def build_train_loader(train_set, args: argparse.Namespace):
+    if args.batch_max_cost > 0:
+        sampler = TokenBudgetBatchSampler(train_set.costs, max_cost=args.batch_max_cost)
+        return torch.utils.data.DataLoader(train_set, batch_sampler=sampler, collate_fn=train_set.collate, **_loader_kwargs(args))
+    elif args.length_bucketing:
+        sampler = LengthBucketBatchSampler(train_set.seq_lens, batch_size=args.batch_size)
+        return torch.utils.data.DataLoader(train_set, batch_sampler=sampler, collate_fn=train_set.collate, **_loader_kwargs(args))
+    else:
+        return torch.utils.data.DataLoader(train_set, batch_size=args.batch_size, shuffle=True, collate_fn=train_set.collate, **_loader_kwargs(args))
+
+
+def build_eval_loader(dataset, args: argparse.Namespace):
+    return torch.utils.data.DataLoader(dataset, batch_size=args.batch_size, shuffle=False, collate_fn=dataset.collate, **_loader_kwargs(args))
+
+
+
 def build_trainer(model, device, num_train_batches: int, args: argparse.Namespace):
     param_groups = [{'params': model.pretrained_parameters(), 'lr': args.finetune_lr}]
     param_groups.append({'params': collect_params(model, param_groups), 'lr': args.lr})
@@ -607,7 +639,7 @@ def build_trainer(model, device, num_train_batches: int, args: argparse.Namespac
         scheduler = None
     
     return Trainer(model, optimizer=optimizer, scheduler=scheduler, schedule_by_step=schedule_by_step, num_grad_acc_steps=args.num_grad_acc_steps,
-                   device=device, grad_clip=args.grad_clip, use_amp=args.use_amp)
+                   device=device, non_blocking=(args.num_workers > 0), grad_clip=args.grad_clip, use_amp=args.use_amp)
 
 
 
@@ -6,11 +6,11 @@ import torch
 import torchvision
 import allennlp.modules
 import transformers
-import flair
 
 from eznlp import auto_device
 from eznlp.token import TokenSequence
 from eznlp.vectors import Vectors, GloVe
+from eznlp.model.flair import load_flair_lm
 from eznlp.io import TabularIO, ConllIO, JsonIO, KarpathyIO, BratIO, Src2TrgIO
 
 
@@ -163,11 +163,11 @@ def bert_like_with_tokenizer(request, bert_with_tokenizer, roberta_with_tokenize
 
 @pytest.fixture
 def flair_fw_lm():
-    return flair.models.LanguageModel.load_language_model("assets/flair/lm-mix-english-forward-v0.2rc.pt")
+    return load_flair_lm("assets/flair/lm-mix-english-forward-v0.2rc.pt")
 
 @pytest.fixture
 def flair_bw_lm():
-    return flair.models.LanguageModel.load_language_model("assets/flair/lm-mix-english-backward-v0.2rc.pt")
+    return load_flair_lm("assets/flair/lm-mix-english-backward-v0.2rc.pt")
 
 @pytest.fixture(params=['fw', 'bw'])
 def flair_lm(request, flair_fw_lm, flair_bw_lm):
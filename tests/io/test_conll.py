@@ -242,3 +242,29 @@ class TestConllIO(object):
         assert max(ck[2]-ck[1] for entry in data for ck in entry['chunks']) == 20
         assert len(post_ck_counter) == 7
         assert sum(ck_counter.values()) - sum(post_ck_counter.values()) == 154
+
+
+
+@pytest.mark.parametrize("document_level", [False, True])
+@pytest.mark.parametrize("num_workers, chunk_size", [(0, None), (2, 1), (2, 500)])
+def test_iter_read(document_level, num_workers, chunk_size):
+    io = ConllIO(text_col_id=0, tag_col_id=3, scheme='BIO1', additional_col_id2name={1: 'pos_tag'}, 
+                 document_sep_starts=["-DOCSTART-"], document_level=document_level)
+    data = io.read("data/conll2003/demo.eng.train")
+    
+    kwargs = {} if chunk_size is None else {'chunk_size': chunk_size}
+    iter_data = list(io.iter_read("data/conll2003/demo.eng.train", num_workers=num_workers, **kwargs))
+    assert len(iter_data) == len(data)
+    for entry, iter_entry in zip(data, iter_data):
+        assert iter_entry['tokens'] == entry['tokens']
+        assert iter_entry['chunks'] == entry['chunks']
+
+
+@pytest.mark.parametrize("document_level", [False, True])
+@pytest.mark.parametrize("world_size", [2, 3])
+def test_iter_read_sharded(document_level, world_size):
+    io = ConllIO(text_col_id=0, tag_col_id=3, scheme='BIO1', additional_col_id2name={1: 'pos_tag'}, 
+                 document_sep_starts=["-DOCSTART-"], document_level=document_level)
+    data = io.read("data/conll2003/demo.eng.train")
+    for rank in range(world_size):
+        assert list(io.iter_read("data/conll2003/demo.eng.train", rank=rank, world_size=world_size)) == data[rank::world_size]
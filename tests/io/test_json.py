@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import pytest
+import json
 import jieba
 
 from eznlp.io import JsonIO, SQuADIO, KarpathyIO, TextClsIO, BratIO
@@ -261,6 +262,40 @@ def test_read_write_consistency(is_whole_piece):
 
 
 
+@pytest.mark.parametrize("tokenize_callback", ['char', jieba.tokenize])
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_batch_tokenization(tokenize_callback, num_workers):
+    raw_data = [{'text': "李明住在中山西路。", 'entities': [{'type': 'PER', 'start': 0, 'end': 2}, {'type': 'LOC', 'start': 4, 'end': 8}]}, 
+                {'text': "我爱北京天安门！", 'entities': [{'type': 'LOC', 'start': 2, 'end': 7}]}] * 5
+    with open("cache/batch-tokenization-demo.json", 'w', encoding='utf-8') as f:
+        json.dump(raw_data, f, ensure_ascii=False)
+    
+    io = JsonIO(is_tokenized=False, tokenize_callback=tokenize_callback, text_key='text', chunk_key='entities', num_workers=num_workers, encoding='utf-8')
+    data = io.read("cache/batch-tokenization-demo.json")
+    assert len(data) == len(raw_data)
+    for entry, raw_entry in zip(data, raw_data):
+        assert entry['tokens'] == io._build_tokens(raw_entry['text'])
+        assert "".join(entry['tokens'].raw_text) == raw_entry['text']
+
+
+
+@pytest.mark.parametrize("is_whole_piece", [False, True])
+@pytest.mark.parametrize("num_workers, batch_size", [(0, 1), (2, 1), (2, 30)])
+def test_iter_read(is_whole_piece, num_workers, batch_size):
+    io = JsonIO(relation_key='relations', relation_type_key='type', relation_head_key='head', relation_tail_key='tail', verbose=False)
+    data = io.read("data/conll2004/demo.conll04_train.json")
+    
+    mark = "wp" if is_whole_piece else "nonwp"
+    trg_fn = f"cache/conll04-iter-read-{mark}.json"
+    io.is_whole_piece = is_whole_piece
+    io.write(data, trg_fn)
+    
+    assert io.read(trg_fn, num_workers=num_workers, batch_size=batch_size) == data
+    assert list(io.iter_read(trg_fn, num_workers=num_workers, batch_size=batch_size)) == data
+    assert list(io.iter_read(trg_fn, rank=1, world_size=2, num_workers=num_workers, batch_size=batch_size)) == data[1::2]
+
+
+
 class TestSQuADIO(object):
     def test_squad_v2(self, spacy_nlp_en):
         io = SQuADIO(tokenize_callback=spacy_nlp_en, verbose=False)
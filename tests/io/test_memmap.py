@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import pickle
+import pytest
+import numpy
+import torch
+
+from eznlp.token import TokenSequence
+from eznlp.io import ConllIO, MemmapIO
+from eznlp.annotation import ChunkArray
+from eznlp.dataset import Dataset
+from eznlp.model import ExtractorConfig
+
+
+def _assert_entries_equal(entry, reloaded):
+    assert reloaded.keys() == entry.keys()
+    assert len(reloaded['tokens']) == len(entry['tokens'])
+    for field in reloaded['tokens'].columns.keys():
+        assert list(getattr(reloaded['tokens'], field)) == list(getattr(entry['tokens'], field))
+    for key in entry.keys() - {'tokens'}:
+        assert reloaded[key] == entry[key]
+
+
+@pytest.mark.parametrize("demo", ['conll2003', 'conll2004', 'HwaMei'])
+def test_write_and_read(demo, conll2003_demo, conll2004_demo, HwaMei_demo):
+    data = {'conll2003': conll2003_demo, 'conll2004': conll2004_demo, 'HwaMei': HwaMei_demo}[demo]
+    io = MemmapIO(verbose=False)
+    io.write(data, f"cache/memmap-{demo}")
+    reloaded = io.read(f"cache/memmap-{demo}")
+    
+    assert len(reloaded) == len(data)
+    for entry, re_entry in zip(data, reloaded):
+        _assert_entries_equal(entry, re_entry)
+    _assert_entries_equal(data[-1], reloaded[-1])
+    assert len(reloaded[2:5]) == 3
+    
+    # Integer token fields are views of the memory maps
+    if 'start' in reloaded[0]['tokens'].columns:
+        assert isinstance(reloaded[0]['tokens'].start, numpy.memmap)
+    
+    unpickled = pickle.loads(pickle.dumps(reloaded))
+    assert len(pickle.dumps(reloaded)) < 1000
+    _assert_entries_equal(data[0], unpickled[0])
+
+
+def test_convert_and_load(conll2003_demo):
+    io = ConllIO(text_col_id=0, tag_col_id=3, scheme='BIO1', verbose=False)
+    data = MemmapIO(verbose=False).convert(io, "data/conll2003/demo.eng.train", "cache/memmap-conll2003-convert")
+    assert len(data) == len(conll2003_demo)
+    
+    config = ExtractorConfig('sequence_tagging')
+    dataset = Dataset(data, config)
+    dataset.build_vocabs_and_dims()
+    model = config.instantiate()
+    
+    dataloader = torch.utils.data.DataLoader(dataset, batch_size=4, shuffle=True, collate_fn=dataset.collate, num_workers=2)
+    num_examples = 0
+    for batch in dataloader:
+        losses = model(batch)
+        num_examples += losses.size(0)
+    assert num_examples == len(dataset)
+
+
+def test_read_compact(HwaMei_demo):
+    io = MemmapIO(verbose=False)
+    io.write(HwaMei_demo, "cache/memmap-HwaMei-compact")
+    reloaded = io.read("cache/memmap-HwaMei-compact", compact=True)
+    
+    for entry, re_entry in zip(HwaMei_demo, reloaded):
+        assert isinstance(re_entry['chunks'], ChunkArray)
+        assert isinstance(re_entry['chunks'].records.base, numpy.ndarray)
+        _assert_entries_equal(entry, re_entry)
+    assert reloaded[0]['chunks'].labels is reloaded[0]['relations'].ck_labels
+    assert pickle.loads(pickle.dumps(reloaded)).compact
+
+
+def test_write_inferred_token_fields():
+    tokens = TokenSequence.from_tokenized_text(["a", "b", "c"], additional_tags={'tag_id': [1, None, 3], 
+                                                                              'tag_arr': [numpy.array([1, 2]), numpy.array([3]), numpy.array([], dtype=numpy.int64)]})
+    data = [{'tokens': TokenSequence.from_tokenized_text([]), 'label': 'x'}, 
+            {'tokens': tokens[:1], 'label': 'y'}, 
+            {'tokens': tokens, 'label': 'x'}]
+    
+    io = MemmapIO(verbose=False)
+    io.write(data, "cache/memmap-inferred")
+    reloaded = io.read("cache/memmap-inferred")
+    # The fields missing in the empty first entry are kept, and `tag_id` is widened from `int` to `json`
+    assert reloaded.meta['token_fields']['tag_id'] == 'json'
+    assert reloaded.meta['token_fields']['raw_text'] == 'str'
+    assert len(reloaded[0]['tokens']) == 0
+    assert reloaded[1]['tokens'].tag_id == [1]
+    assert reloaded[2]['tokens'].tag_id == [1, None, 3]
+    assert reloaded[2]['tokens'].tag_arr == [[1, 2], [3], []]
@@ -15,3 +15,34 @@ class TestRawTextIO(object):
         io = RawTextIO(encoding='utf-8')
         reloaded = io.read("data/Wikipedia/text-zh/AA/wiki_00.cache")
         assert reloaded == data
+
+
+
+def test_iter_read():
+    docs = [" ".join(f"doc{d}-tok{k}" for k in range(25)) for d in range(4)]
+    with open("cache/raw-text-demo.txt", 'w', encoding='utf-8') as f:
+        f.write("\n-DOCSTART-\n".join(docs))
+    
+    io = RawTextIO(str.split, max_len=10, document_sep_starts=["-DOCSTART-"], encoding='utf-8', verbose=False)
+    data = io.read("cache/raw-text-demo.txt")
+    assert len(data) == 4 * 3
+    assert list(io.iter_read("cache/raw-text-demo.txt")) == data
+
+
+def test_sharded_read():
+    docs = [" ".join(f"doc{d}-tok{k}" for k in range(25)) for d in range(5)]
+    with open("cache/raw-text-demo.txt", 'w', encoding='utf-8') as f:
+        f.write("\n-DOCSTART-\n".join(docs))
+    
+    io = RawTextIO(str.split, max_len=10, document_sep_starts=["-DOCSTART-"], encoding='utf-8', verbose=False)
+    data = io.read("cache/raw-text-demo.txt")
+    shards = [io.read("cache/raw-text-demo.txt", rank=rank, world_size=2) for rank in range(2)]
+    assert [len(shard) for shard in shards] == [3*3, 2*3]
+    assert sorted(entry['rejoined_text'] for shard in shards for entry in shard) == sorted(entry['rejoined_text'] for entry in data)
+    assert list(io.iter_read("cache/raw-text-demo.txt", rank=1, world_size=2)) == shards[1]
+    
+    io.write(data, "cache/raw-text-demo.cache")
+    io = RawTextIO(encoding='utf-8', verbose=False)
+    shards = [io.read("cache/raw-text-demo.cache", rank=rank, world_size=3) for rank in range(3)]
+    assert [len(shard) for shard in shards] == [5, 5, 5]
+    assert [entry for k in range(5) for shard in shards for entry in shard[k:k+1]] == data
@@ -4,6 +4,7 @@ import torch
 
 from eznlp.dataset import Dataset
 from eznlp.model import EncoderConfig, BertLikeConfig, BoundarySelectionDecoderConfig, ExtractorConfig
+from eznlp.model.decoder.base import pad_targets
 from eznlp.model.decoder.boundary_selection import _spans_from_upper_triangular
 from eznlp.training import Trainer
 
@@ -188,6 +189,60 @@ def test_boundaries_obj_for_neg_sampling(neg_sampling_rate, hard_neg_sampling_ra
         assert abs(boundaries_obj.non_mask.sum().item() - (25*neg_sampling_rate + 25*hard_neg_sampling_rate + 5)) < 5
 
 
+def test_boundaries_obj_static_part():
+    entry = {'tokens': list("abcdefhijk"), 
+             'chunks': [('EntA', 0, 1), ('EntA', 0, 4), ('EntB', 0, 5), ('EntA', 3, 5), ('EntA', 4, 5)]}
+    config = BoundarySelectionDecoderConfig(neg_sampling_rate=0.3, hard_neg_sampling_rate=0.6)
+    config.build_vocab([entry])
+    static_example = config.exemplify_static(entry, training=True)
+    assert not hasattr(static_example['boundaries_obj'], 'non_mask')
+    
+    # Only the negative boundaries are re-sampled, while the label matrix is re-used
+    boundaries_obj = config.exemplify_stochastic(entry, static_example, training=True)['boundaries_obj']
+    assert boundaries_obj is not static_example['boundaries_obj']
+    assert boundaries_obj.boundary2label_id is static_example['boundaries_obj'].boundary2label_id
+    assert not hasattr(static_example['boundaries_obj'], 'non_mask')
+    assert all(boundaries_obj.non_mask[start, end-1].item() for label, start, end in entry['chunks'])
+    assert not boundaries_obj.non_mask.tril(diagonal=-1).any().item()
+
+
+@pytest.mark.parametrize("neg_sampling_rate, sb_epsilon", [(1.0, 0.0), (0.5, 0.0), (1.0, 0.1)])
+def test_batched_losses(neg_sampling_rate, sb_epsilon, conll2004_demo):
+    config = ExtractorConfig(decoder=BoundarySelectionDecoderConfig(neg_sampling_rate=neg_sampling_rate, sb_epsilon=sb_epsilon))
+    dataset = Dataset(conll2004_demo, config)
+    dataset.build_vocabs_and_dims()
+    model = config.instantiate()
+    model.eval()
+    
+    batch = dataset.collate([dataset[i] for i in range(4)])
+    max_len = batch.seq_lens.max().item()
+    assert batch.boundary2label_ids.size()[:3] == (4, max_len, max_len)
+    assert batch.boundaries_non_mask.size() == (4, max_len, max_len)
+    
+    losses, states = model(batch, return_states=True)
+    batch_scores = model.decoder.compute_scores(batch, states['full_hidden'])
+    criterion = config.decoder.instantiate_criterion(reduction='sum')
+    for k, (boundaries_obj, curr_len) in enumerate(zip(batch.boundaries_objs, batch.seq_lens.tolist())):
+        curr_non_mask = getattr(boundaries_obj, 'non_mask', model.decoder._get_span_non_mask(curr_len))
+        expected_loss = criterion(batch_scores[k, :curr_len, :curr_len][curr_non_mask], boundaries_obj.boundary2label_id[curr_non_mask])
+        assert torch.allclose(losses[k], expected_loss, rtol=1e-5)
+
+
+@pytest.mark.parametrize("num_dims, trailing_size", [(1, ()), (2, ()), (2, (3, ))])
+def test_pad_targets(num_dims, trailing_size):
+    sizes = [(3, 2), (0, 4), (5, 5), (1, 0)]
+    tensors = [torch.randn(*size[:num_dims], *trailing_size) for size in sizes]
+    padded, non_mask = pad_targets(tensors, num_dims=num_dims, padding_value=-1)
+    assert padded.size() == (4, 5, 5)[:num_dims+1] + trailing_size
+    assert non_mask.size() == (4, 5, 5)[:num_dims+1]
+    for k, t in enumerate(tensors):
+        curr_slices = (k, *[slice(0, size) for size in t.size()[:num_dims]])
+        assert (padded[curr_slices] == t).all().item()
+        assert non_mask[curr_slices].all().item()
+        assert non_mask[k].sum().item() == t.size()[:num_dims].numel()
+    assert (padded[~non_mask] == -1).all().item()
+
+
 @pytest.mark.parametrize("seq_len", [1, 5, 10, 100])
 def test_spans_from_upper_triangular(seq_len):
     assert len(list(_spans_from_upper_triangular(seq_len))) == (seq_len+1)*seq_len // 2
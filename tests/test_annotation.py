@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import pickle
+import pytest
+import random
+import numpy
+
+from eznlp.annotation import LabelTable, ChunkArray, AnnotationCoder
+from eznlp.io import PostIO
+from eznlp.dataset import Dataset
+from eznlp.model import BoundarySelectionDecoderConfig, ExtractorConfig
+from eznlp.metrics import precision_recall_f1_report
+
+
+def test_chunk_array():
+    chunks = [('PER', 3, 5), ('LOC', 0, 1), ('PER', 7, 8)]
+    compact = ChunkArray.from_tuples(chunks, LabelTable())
+    assert compact.labels.id2label == ['PER', 'LOC']
+    assert compact.records.dtype.itemsize == 12
+    
+    assert len(compact) == 3
+    assert list(compact) == chunks
+    assert compact == chunks
+    assert compact[1] == ('LOC', 0, 1)
+    assert compact[1:] == chunks[1:]
+    assert ('PER', 7, 8) in compact
+    assert ('PER', 0, 1) not in compact
+    assert ('ORG', 0, 1) not in compact
+    assert compact + [('ORG', 0, 1)] == chunks + [('ORG', 0, 1)]
+    assert compact.map_labels({'<none>': 0, 'LOC': 1, 'PER': 2}).tolist() == [2, 1, 2]
+    assert pickle.loads(pickle.dumps(compact)) == chunks
+
+
+def test_coder_and_post_io(conll2004_demo):
+    coder = AnnotationCoder()
+    data = PostIO(verbose=False).compact(conll2004_demo, coder)
+    assert all(entry['chunks'].labels is coder.ck_labels for entry in data)
+    assert all(entry['relations'].ck_labels is coder.ck_labels for entry in data)
+    
+    expanded = PostIO(verbose=False).expand(data)
+    for entry, ex_entry in zip(conll2004_demo, expanded):
+        assert ex_entry['chunks'] == entry['chunks']
+        assert ex_entry['relations'] == entry['relations']
+        assert isinstance(ex_entry['chunks'], list)
+
+
+@pytest.mark.parametrize("key", ['chunks', 'relations'])
+@pytest.mark.parametrize("macro_over", ['types', 'samples'])
+def test_compact_metrics(key, macro_over, conll2004_demo):
+    list_tuples_gold = [entry[key] for entry in conll2004_demo]
+    # Perturb the gold annotations as predictions, including unseen labels and duplicates
+    rng = random.Random(0)
+    list_tuples_pred = [[tp for tp in tuples if rng.random() < 0.7] + ([tuples[0], ('NEW', *tuples[0][1:])] if len(tuples) > 0 else [])
+                            for tuples in list_tuples_gold]
+    
+    coder = AnnotationCoder()
+    list_compact_gold = [coder.encode_annotations(key, tuples) for tuples in list_tuples_gold]
+    scores, ave_scores = precision_recall_f1_report(list_tuples_gold, list_tuples_pred, macro_over=macro_over)
+    compact_scores, compact_ave_scores = precision_recall_f1_report(list_compact_gold, list_tuples_pred, macro_over=macro_over)
+    assert compact_scores == scores
+    # The macro scores may differ in float rounding, due to the summation order over types
+    for key in ['macro', 'micro']:
+        assert compact_ave_scores[key] == pytest.approx(ave_scores[key])
+
+
+@pytest.mark.parametrize("neg_sampling_rate", [1.0, 0.5])
+def test_compact_boundaries_obj(neg_sampling_rate, conll2004_demo):
+    config = ExtractorConfig(decoder=BoundarySelectionDecoderConfig(neg_sampling_rate=neg_sampling_rate))
+    dataset = Dataset(conll2004_demo, config)
+    dataset.build_vocabs_and_dims()
+    
+    compact_data = PostIO(verbose=False).compact(conll2004_demo)
+    for entry, compact_entry in zip(conll2004_demo, compact_data):
+        boundaries_obj = config.exemplify(entry)['boundaries_obj']
+        compact_boundaries_obj = config.exemplify(compact_entry)['boundaries_obj']
+        assert (compact_boundaries_obj.boundary2label_id == boundaries_obj.boundary2label_id).all().item()
+        if neg_sampling_rate < 1:
+            assert compact_boundaries_obj.non_mask[boundaries_obj.boundary2label_id != config.decoder.none_idx].all().item()
+    
+    compact_set = Dataset(compact_data, config)
+    batch = compact_set.collate([compact_set[i] for i in range(4)])
+    y_gold = config.decoder.retrieve(batch)
+    assert all(isinstance(chunks, ChunkArray) for chunks in y_gold)
+    scores, ave_scores = precision_recall_f1_report(y_gold, [entry['chunks'] for entry in conll2004_demo[:4]])
+    assert ave_scores['micro']['f1'] == 1
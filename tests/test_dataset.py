@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 import pytest
 import torch
+import numpy
 
-from eznlp.token import Token
-from eznlp.dataset import Dataset
+from eznlp.token import Token, TokenSequence
+from eznlp.io import ConllIO
+from eznlp.wrapper import Batch, TargetWrapper
+from eznlp.dataset import Dataset, StreamingDataset, _fingerprint
 from eznlp.config import ConfigDict
 from eznlp.model import OneHotConfig, MultiHotConfig, ExtractorConfig
+from eznlp.model import SpanClassificationDecoderConfig, SpanRelClassificationDecoderConfig, JointExtractionDecoderConfig
 
 
 def test_batch_to_cuda(conll2003_demo, device):
@@ -26,7 +30,7 @@ def test_batch_to_cuda(conll2003_demo, device):
     assert batch.ohots['en_pattern'].is_pinned()
     assert batch.mhots['en_shape_features'].is_pinned()
     assert batch.seq_lens.is_pinned()
-    assert batch.tags_objs[0].tag_ids.is_pinned()
+    assert batch.tag_ids.is_pinned()
     
     assert batch.ohots['text'].device.type.startswith('cpu')
     batch = batch.to(device)
@@ -42,4 +46,175 @@ def test_batches(conll2003_demo, device):
     dataloader = torch.utils.data.DataLoader(dataset, batch_size=4, shuffle=True, collate_fn=dataset.collate)
     for batch in dataloader:
         batch.to(device)
-        
\ No newline at end of file
+        
+
+
+def test_batch_packed_transfer(conll2004_demo):
+    config = ExtractorConfig(decoder=JointExtractionDecoderConfig(ck_decoder=SpanClassificationDecoderConfig(), 
+                                                                  attr_decoder=None, 
+                                                                  rel_decoder=SpanRelClassificationDecoderConfig()))
+    dataset = Dataset(conll2004_demo, config)
+    dataset.build_vocabs_and_dims()
+    batch = dataset.collate([dataset[i] for i in range(4)])
+    assert len(batch._tensors) > 5
+    
+    tensors = list(batch._tensors)
+    batch._packed_buffer()
+    assert all(t.data_ptr() != p.data_ptr() for t, p in zip(tensors, batch._tensors))
+    assert all(t.dtype == p.dtype and t.size() == p.size() and (t == p).all().item() for t, p in zip(tensors, batch._tensors))
+    assert batch.span_label_ids.untyped_storage().data_ptr() == batch.seq_lens.untyped_storage().data_ptr()
+    # The per-example targets are not packed, as their padded form is in the batch
+    assert all(spans_obj.label_ids is not t for spans_obj in batch.spans_objs for t in batch._tensors)
+    
+    # Moved by a single copy of the buffer
+    batch.to(torch.device('meta'), non_blocking=True)
+    assert batch._buffer.device.type == 'meta'
+    assert all(t.device.type == 'meta' for t in batch._tensors)
+    assert batch.seq_lens.device.type == 'meta'
+    assert batch.spans_objs[1].span_size_ids.device.type == 'meta'
+    assert batch.span_label_ids.dtype == torch.long
+    
+    # Fall back to moving the tensors one by one
+    batch = dataset.collate([dataset[i] for i in range(4)])
+    batch.to(torch.float64)
+    assert batch.seq_lens.dtype == torch.float64 and batch._tensors[0].dtype == torch.float64
+
+
+
+def test_batch_packed_transfer_rebuilds_containers():
+    tensors = [torch.arange(3), torch.ones(2, 2)]
+    target = TargetWrapper()
+    target.tensor_list = list(tensors)
+    target.tensor_dict = {'x': tensors[0]}
+    batch = Batch(target=target, seq_lens=torch.tensor([3]))
+    
+    lists_and_dicts = (target.tensor_list, target.tensor_dict)
+    batch._packed_buffer()
+    # The original containers (e.g., shared with cached examples) are not modified in place
+    assert lists_and_dicts[0][0] is tensors[0] and lists_and_dicts[0][1] is tensors[1]
+    assert lists_and_dicts[1]['x'] is tensors[0]
+    assert batch.target.tensor_list[0] is not tensors[0] and (batch.target.tensor_list[0] == tensors[0]).all().item()
+    assert batch.target.tensor_dict['x'] is batch.target.tensor_list[0]
+    assert batch._registered_tensors_valid()
+
+
+@pytest.mark.parametrize("cache_mode", ['memory', 'disk'])
+def test_exemplify_cache_deterministic(cache_mode, conll2003_demo):
+    config = ExtractorConfig('sequence_tagging', 
+                             ohots=ConfigDict({f: OneHotConfig(field=f, emb_dim=20) for f in Token._basic_ohot_fields}))
+    dataset = Dataset(conll2003_demo, config, cache_mode=cache_mode, cache_dir='cache')
+    dataset.build_vocabs_and_dims()
+    uncached_dataset = Dataset(conll2003_demo, config)
+    
+    for i in range(len(dataset)):
+        example, uncached_example = dataset[i], uncached_dataset[i]
+        assert example['tokenized_text'] == uncached_example['tokenized_text']
+        assert (example['ohots']['text'] == uncached_example['ohots']['text']).all().item()
+        assert (example['tags_obj'].tag_ids == uncached_example['tags_obj'].tag_ids).all().item()
+        # The cached `TargetWrapper` should be protected from in-place modifications
+        assert example['tags_obj'] is not dataset[i]['tags_obj']
+    
+    if cache_mode == 'disk':
+        import os
+        assert os.path.exists(dataset.cache_path)
+        reloaded_dataset = Dataset(conll2003_demo, config, cache_mode='disk', cache_dir='cache')
+        reloaded_dataset.build_cache()
+        assert all((reloaded_dataset[i]['tags_obj'].tag_ids == dataset[i]['tags_obj'].tag_ids).all().item() for i in range(len(dataset)))
+
+
+def test_fingerprint(conll2003_demo):
+    entry = conll2003_demo[0]
+    tokens = entry['tokens']
+    assert _fingerprint(entry) == _fingerprint({'tokens': tokens[:], 'chunks': list(entry['chunks'])})
+    
+    # Fields other than `text` are also covered
+    retagged_tokens = TokenSequence.from_tokenized_text(tokens.raw_text, additional_tags={'pos_tag': ['NN'] * len(tokens)})
+    assert retagged_tokens.text == tokens.text
+    assert _fingerprint(retagged_tokens) != _fingerprint(tokens)
+    cased_tokens = TokenSequence.from_tokenized_text([tok.upper() for tok in tokens.raw_text], case_mode='Lower')
+    uncased_tokens = TokenSequence.from_tokenized_text([tok.lower() for tok in tokens.raw_text], case_mode='Lower')
+    assert cased_tokens.text == uncased_tokens.text
+    assert _fingerprint(cased_tokens) != _fingerprint(uncased_tokens)
+    
+    assert _fingerprint(numpy.arange(3)) != _fingerprint(numpy.arange(1, 4))
+    assert _fingerprint({'b', 'a'}) == _fingerprint({'a', 'b'})
+    with pytest.raises(TypeError):
+        _fingerprint({'callback': lambda x: x})
+
+
+def test_exemplify_cache_stochastic(conll2003_demo):
+    config = ExtractorConfig('span_classification', 
+                             ohots=ConfigDict({'text': OneHotConfig(field='text', emb_dim=20)}))
+    config.decoder.num_neg_chunks = 5
+    dataset = Dataset(conll2003_demo, config, cache_mode='memory')
+    dataset.build_vocabs_and_dims()
+    assert config.is_stochastic(training=True)
+    # The candidate spans are cached, but not sampled
+    static_example = config.exemplify_static(conll2003_demo[0], training=True)
+    assert not hasattr(static_example['spans_obj'], 'spans')
+    assert len(static_example['spans_obj']._neg_spans) > 0
+    
+    long_idx = max(range(len(dataset)), key=lambda i: len(conll2003_demo[i]['tokens']))
+    ex1, ex2 = dataset[long_idx], dataset[long_idx]
+    # The static features are cached, while the negative spans are re-sampled
+    assert ex1['ohots']['text'] is ex2['ohots']['text']
+    assert ex1['spans_obj'] is not ex2['spans_obj']
+    assert len(ex1['spans_obj'].spans) == len(conll2003_demo[long_idx]['chunks']) + 5
+    assert not config.is_stochastic(training=False)
+
+
+@pytest.mark.parametrize("decoder", ['sequence_tagging', 'span_classification', 'boundary_selection'])
+def test_estimated_costs(decoder, conll2003_demo):
+    dataset = Dataset(conll2003_demo, ExtractorConfig(decoder))
+    dataset.build_vocabs_and_dims()
+    seq_lens, costs = dataset.seq_lens, dataset.costs
+    if decoder == 'sequence_tagging':
+        assert costs == seq_lens
+    elif decoder == 'span_classification':
+        assert costs == [len(dataset.config.exemplify(entry, training=False)['spans_obj'].spans) for entry in conll2003_demo]
+    else:
+        assert costs == [l**2 for l in seq_lens]
+
+
+@pytest.mark.parametrize("shuffle_buffer_size", [0, 16])
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_streaming_dataset(shuffle_buffer_size, num_workers, conll2003_demo):
+    io = ConllIO(text_col_id=0, tag_col_id=3, scheme='BIO1', verbose=False)
+    config = ExtractorConfig('sequence_tagging')
+    dataset = Dataset(conll2003_demo, config)
+    dataset.build_vocabs_and_dims()
+    
+    streaming_dataset = StreamingDataset(["data/conll2003/demo.eng.train"], io, config, shuffle_buffer_size=shuffle_buffer_size)
+    dataloader = torch.utils.data.DataLoader(streaming_dataset, batch_size=4, num_workers=num_workers, collate_fn=streaming_dataset.collate)
+    tokenized_texts = [tokenized_text for batch in dataloader for tokenized_text in batch.tokenized_text]
+    
+    # Each entry is yielded exactly once, regardless of shuffling and sharding
+    assert sorted(tokenized_texts) == sorted(entry['tokens'].text for entry in conll2003_demo)
+    if shuffle_buffer_size == 0 and num_workers == 0:
+        assert tokenized_texts == [entry['tokens'].text for entry in conll2003_demo]
+    
+    for batch in dataloader:
+        assert batch.tags_objs[0].tag_ids.size(0) == batch.seq_lens[0].item()
+
+
+@pytest.mark.parametrize("decoder", ['sequence_tagging', 'span_classification', 'boundary_selection', 'joint_extraction'])
+def test_multi_worker_loading(decoder, conll2004_demo):
+    if decoder == 'joint_extraction':
+        config = ExtractorConfig(decoder=JointExtractionDecoderConfig(ck_decoder=SpanClassificationDecoderConfig(), 
+                                                                      attr_decoder=None, 
+                                                                      rel_decoder=SpanRelClassificationDecoderConfig()))
+    else:
+        config = ExtractorConfig(decoder)
+    dataset = Dataset(conll2004_demo, config, cache_mode='memory')
+    dataset.build_vocabs_and_dims()
+    model = config.instantiate()
+    
+    dataloader = torch.utils.data.DataLoader(dataset, batch_size=4, shuffle=True, collate_fn=dataset.collate, 
+                                             num_workers=2, persistent_workers=True)
+    for epoch in range(2):
+        num_examples = 0
+        for batch in dataloader:
+            losses = model(batch)
+            assert losses.size(0) == batch.seq_lens.size(0)
+            num_examples += batch.seq_lens.size(0)
+        assert num_examples == len(dataset)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import sys
+import subprocess
+
+
+def _run_in_subprocess(code: str):
+    # Run in a fresh interpreter, since the test session has already imported many packages
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip()
+
+
+def test_lazy_imports():
+    heavy_modules = ['flair', 'spacy', 'jieba', 'hanziconv', 'transformers', 'torchvision', 'truecase', 'nltk', 'allennlp', 'pandas', 'matplotlib']
+    code = ("import sys\n"
+            "import eznlp\n"
+            "import eznlp.model, eznlp.plm, eznlp.io, eznlp.training, eznlp.utils\n"
+            f"print(','.join(m for m in {heavy_modules!r} if m in sys.modules))")
+    assert _run_in_subprocess(code) == ""
+
+
+
+def test_import_time_budget():
+    # Exclude the time of importing `torch`, which is a hard dependency; the budget is relative to it on slow machines
+    code = ("import time\n"
+            "t0 = time.perf_counter()\n"
+            "import torch\n"
+            "t1 = time.perf_counter()\n"
+            "import eznlp\n"
+            "import eznlp.model, eznlp.plm, eznlp.io, eznlp.training, eznlp.utils\n"
+            "print(t1 - t0, time.perf_counter() - t1)")
+    torch_time, eznlp_time = (float(t) for t in _run_in_subprocess(code).split())
+    assert eznlp_time < max(1.0, 0.5*torch_time)
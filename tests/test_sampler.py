@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import pytest
+import random
+
+from eznlp.sampler import LengthBucketBatchSampler, TokenBudgetBatchSampler, ShardedRandomSampler
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+@pytest.mark.parametrize("drop_last", [False, True])
+def test_length_bucket_batch_sampler(shuffle, drop_last):
+    lengths = [random.randint(1, 100) for _ in range(1000)]
+    sampler = LengthBucketBatchSampler(lengths, batch_size=16, num_batches_per_bucket=20, shuffle=shuffle, drop_last=drop_last)
+    
+    batches = list(sampler)
+    assert len(batches) == len(sampler)
+    assert all(len(batch) == 16 for batch in batches[:-1] if not shuffle)
+    
+    indices = [i for batch in batches for i in batch]
+    assert len(indices) == len(set(indices))
+    if not drop_last:
+        assert sorted(indices) == list(range(len(lengths)))
+    
+    # Padding waste should be much smaller than that of random batching
+    num_padded = sum(max(lengths[i] for i in batch)*len(batch) - sum(lengths[i] for i in batch) for batch in batches)
+    assert num_padded < 0.2 * sum(lengths)
+    
+    if shuffle:
+        assert list(sampler) != batches
+    else:
+        assert list(sampler) == batches
+        assert indices == sorted(indices, key=lambda i: lengths[i]) or drop_last
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_token_budget_batch_sampler(shuffle):
+    costs = [random.randint(1, 100)**2 for _ in range(1000)] + [20000]
+    sampler = TokenBudgetBatchSampler(costs, max_cost=10000, bucket_size=200, shuffle=shuffle)
+    
+    num_batches = len(sampler)
+    batches = list(sampler)
+    assert len(batches) == num_batches
+    
+    indices = [i for batch in batches for i in batch]
+    assert sorted(indices) == list(range(len(costs)))
+    assert all(max(costs[i] for i in batch)*len(batch) <= 10000 for batch in batches if len(batch) > 1)
+    assert [1000] in batches
+    
+    # Short sequences are packed into large batches
+    batch_sizes = sorted(len(batch) for batch in batches)
+    assert batch_sizes[-1] >= 10 * batch_sizes[0]
+
+
+@pytest.mark.parametrize("num_samples", [None, 50, 150])
+def test_sharded_random_sampler(num_samples):
+    sampler = ShardedRandomSampler(100, num_samples=num_samples, seed=515)
+    indices0 = list(sampler)
+    assert len(indices0) == len(sampler)
+    assert set(indices0).issubset(range(100))
+    assert list(sampler) == indices0
+    
+    sampler.set_epoch(1)
+    indices1 = list(sampler)
+    assert indices1 != indices0
+    
+    another = ShardedRandomSampler(100, num_samples=num_samples, seed=515)
+    another.set_epoch(1)
+    assert list(another) == indices1
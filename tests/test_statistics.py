@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import copy
+import pytest
+from collections import Counter
+
+from eznlp.token import Token
+from eznlp.config import ConfigDict
+from eznlp.statistics import merge_stats, collect_stats
+from eznlp.model import OneHotConfig, ExtractorConfig
+from eznlp.model import SpanClassificationDecoderConfig, SpanRelClassificationDecoderConfig, JointExtractionDecoderConfig
+
+
+def test_merge_stats():
+    stats = {'counter': Counter(['b', 'a']), 'flag': False, 'max_len': 3, 'set': {1}, 'list': [Counter(['x'])]}
+    other = {'counter': Counter(['c', 'a']), 'flag': True, 'max_len': 2, 'set': {2}, 'list': [Counter(['y'])]}
+    stats = merge_stats(stats, other)
+    assert list(stats['counter'].items()) == [('b', 1), ('a', 2), ('c', 1)]
+    assert stats['flag'] is True
+    assert stats['max_len'] == 3
+    assert stats['set'] == {1, 2}
+    assert stats['list'] == [Counter(['x', 'y'])]
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_single_pass_build(num_workers, conll2004_demo):
+    config = ExtractorConfig(ohots=ConfigDict({f: OneHotConfig(field=f, emb_dim=20) for f in Token._basic_ohot_fields}), 
+                             decoder=JointExtractionDecoderConfig(ck_decoder=SpanClassificationDecoderConfig(), 
+                                                                  attr_decoder=None, 
+                                                                  rel_decoder=SpanRelClassificationDecoderConfig()))
+    partitions = [conll2004_demo[:200], conll2004_demo[200:]]
+    
+    # Build each component with its own pass, as the reference
+    ref_config = copy.deepcopy(config)
+    for c in ref_config.ohots.values():
+        c.build_vocab(*partitions)
+    ref_config.decoder.build_vocab(*partitions)
+    
+    config.build_vocabs_and_dims(*partitions, num_workers=num_workers)
+    for f, c in config.ohots.items():
+        assert c.vocab.itos == ref_config.ohots[f].vocab.itos
+        assert c.max_len == ref_config.ohots[f].max_len
+    assert config.decoder.ck_decoder.idx2label == ref_config.decoder.ck_decoder.idx2label
+    assert config.decoder.ck_decoder.allow_nested == ref_config.decoder.ck_decoder.allow_nested
+    assert config.decoder.rel_decoder.idx2rel_label == ref_config.decoder.rel_decoder.idx2rel_label
+    assert config.decoder.rel_decoder.legal_head_tail_types == ref_config.decoder.rel_decoder.legal_head_tail_types
+
+
+def test_parallel_collect_stats(conll2004_demo):
+    components = {'text': OneHotConfig(field='text'), 'decoder': SpanClassificationDecoderConfig()}
+    partitions = [conll2004_demo[:200], conll2004_demo[200:]]
+    seq_stats = collect_stats(components, partitions)
+    par_stats = collect_stats(components, partitions, num_workers=2, shard_size=50)
+    for p_seq_stats, p_par_stats in zip(seq_stats, par_stats):
+        for name in components:
+            for key, value in p_seq_stats[name].items():
+                assert p_par_stats[name][key] == value
+                if isinstance(value, Counter):
+                    assert list(p_par_stats[name][key].keys()) == list(value.keys())
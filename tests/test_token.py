@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 import pytest
 import pickle
+import random
+import jieba
+import numpy
 
 from eznlp.token import Full2Half
 from eznlp.token import zh_punct_re, zh_char_re
-from eznlp.token import Token, TokenSequence, LexiconTokenizer
+from eznlp.token import text_normalization_cache_info, set_text_normalization_cache_size
+from eznlp.token import Token, CompactToken, TokenSequence, ColumnarTokenSequence, LexiconTokenizer
 
 
 def test_full2half():
@@ -17,6 +21,40 @@ def test_regex():
     assert all(zh_char_re.fullmatch(c) for c in "你我他憂郁的烏龜")
 
 
+def test_text_normalization_cache():
+    set_text_normalization_cache_size(16)
+    tokens = TokenSequence.from_tokenized_text("This is a -3.14 demo , this is a demo .".split(), case_mode='Lower', number_mode='Marks')
+    assert tokens.text == ["this", "is", "a", "<-real1>", "demo", ",", "this", "is", "a", "demo", "."]
+    
+    cache_info = text_normalization_cache_info()
+    assert cache_info.misses == 8
+    assert cache_info.hits == 3
+    assert cache_info.maxsize == 16
+    
+    # Unhashable normalizers bypass the cache
+    class Normalizer(dict):
+        def __call__(self, x):
+            return self.get(x, x)
+    tokens = TokenSequence.from_tokenized_text("This is a demo .".split(), case_mode='Lower', post_text_normalizer=Normalizer({'demo': 'DEMO'}))
+    assert tokens.text == ["this", "is", "a", "DEMO", "."]
+    assert text_normalization_cache_info().misses == 8
+    set_text_normalization_cache_size()
+
+
+def test_sequence_level_en_features():
+    tokenized_text = ["Mr.", "Ｓmith", "'s", "iPhone", "٣-12", "IBM", "O'", "is", "中文", "."]
+    tokens = TokenSequence.from_tokenized_text(tokenized_text)
+    
+    en_shape_features = tokens.en_shape_features
+    assert en_shape_features.shape == (len(tokenized_text), len(Token._en_shape_feature_names))
+    for tok, tok_en_shape_features in zip(tokens.token_list, en_shape_features):
+        assert (tok.en_shape_features == tok_en_shape_features).all()
+    
+    assert tokens.en_pattern == [tok.en_pattern for tok in tokens.token_list]
+    assert tokens.en_pattern_sum == [tok.en_pattern_sum for tok in tokens.token_list]
+
+
+
 class TestToken(object):
     def test_assign_attr(self):
         tok = Token("-5.44", chunking='B-NP')
@@ -231,6 +269,19 @@ class TestTokenSequence(object):
         assert softlexicon_built == softlexicon_gold
         
         
+    @pytest.mark.parametrize("tokenize_callback", [None, 'char', jieba.tokenize, jieba.cut])
+    @pytest.mark.parametrize("num_workers", [1, 2])
+    def test_from_raw_texts(self, tokenize_callback, num_workers):
+        raw_texts = ["李明 住在 中山西路。", "我爱 北京天安门！", ""] * 3
+        tokens_list = TokenSequence.from_raw_texts(raw_texts, tokenize_callback, num_workers=num_workers, batch_size=2)
+        assert len(tokens_list) == len(raw_texts)
+        for tokens, raw_text in zip(tokens_list, raw_texts):
+            expected = TokenSequence.from_raw_text(raw_text, tokenize_callback)
+            assert tokens == expected
+            assert getattr(tokens, 'start', None) == getattr(expected, 'start', None)
+
+        
+        
     def test_serialization(self):
         token_list = [Token(tok, case_mode='Lower', number_mode='Marks') for tok in "This is a -3.14 demo .".split()]
         tokens = TokenSequence(token_list)
@@ -247,6 +298,91 @@ class TestTokenSequence(object):
 
 
 
+class TestCompactToken(object):
+    def test_consistency(self):
+        tokenized_text = "This is a -3.14 demo , Mr. Ｓmith .".split()
+        tokens = TokenSequence.from_tokenized_text(tokenized_text, case_mode='Lower', number_mode='Marks', additional_tags={'pos_tag': list(range(len(tokenized_text)))})
+        compact_tokens = TokenSequence.from_tokenized_text(tokenized_text, case_mode='Lower', number_mode='Marks', additional_tags={'pos_tag': list(range(len(tokenized_text)))}, compact=True)
+        assert all(isinstance(tok, CompactToken) for tok in compact_tokens.token_list)
+        assert not hasattr(compact_tokens[0], '__dict__')
+        
+        for field in ['raw_text', 'text', 'pos_tag', 'prefix_3', 'suffix_2', 'num_mark', 'en_pattern', 'en_pattern_sum']:
+            assert getattr(compact_tokens, field) == getattr(tokens, field)
+        assert compact_tokens == tokens
+        
+        
+    def test_undeclared_tag(self):
+        with pytest.raises(AttributeError):
+            CompactToken("Hello", pos_tag='UH')
+        
+        token_cls = CompactToken.with_tags('pos_tag')
+        assert CompactToken.with_tags('pos_tag') is token_cls
+        tok = token_cls("Hello", case_mode='Lower', pos_tag='UH')
+        assert tok.text == "hello"
+        assert tok.pos_tag == 'UH'
+        
+        
+    def test_serialization(self):
+        tokens = TokenSequence.from_tokenized_text("This is a -3.14 demo .".split(), case_mode='Lower', number_mode='Marks', start=0, compact=True)
+        
+        with open("cache/compact-tokens-demo.pkl", 'wb') as f:
+            pickle.dump(tokens, f)
+        with open("cache/compact-tokens-demo.pkl", 'rb') as f:
+            tokens_loaded = pickle.load(f)
+        
+        assert tokens_loaded == tokens
+        assert tokens_loaded.text == tokens.text
+        assert tokens_loaded.start == tokens.start
+
+
+
+class TestColumnarTokenSequence(object):
+    @pytest.mark.parametrize("tokenize_callback", [None, 'char'])
+    def test_consistency(self, tokenize_callback):
+        raw_text = "This is a -3.14 demo , Mr. Ｓmith ."
+        tokens = TokenSequence.from_raw_text(raw_text, tokenize_callback, case_mode='Lower', number_mode='Marks', additional_tok2tags=[('tag', {'<unk>': 'O', '.': 'P'})])
+        col_tokens = TokenSequence.from_raw_text(raw_text, tokenize_callback, case_mode='Lower', number_mode='Marks', additional_tok2tags=[('tag', {'<unk>': 'O', '.': 'P'})], columnar=True)
+        assert isinstance(col_tokens, ColumnarTokenSequence)
+        assert len(col_tokens) == len(tokens)
+        
+        for field in ['raw_text', 'text', 'tag', 'prefix_3', 'suffix_2', 'num_mark', 'en_pattern', 'en_pattern_sum']:
+            assert list(getattr(col_tokens, field)) == list(getattr(tokens, field))
+        assert all((x1 == x2).all() for x1, x2 in zip(col_tokens.en_shape_features, tokens.en_shape_features))
+        if tokenize_callback == 'char':
+            assert list(col_tokens.start) == list(tokens.start)
+            assert list(col_tokens.end) == list(tokens.end)
+        
+        assert col_tokens[3].__dict__ == tokens[3].__dict__
+        assert col_tokens[2:5].text == tokens[2:5].text
+        assert (col_tokens[:4] + col_tokens[4:]) == col_tokens
+        assert col_tokens.bigram == tokens.bigram
+        
+        col_tokens.build_pseudo_boundaries(sep_width=1)
+        tokens.build_pseudo_boundaries(sep_width=1)
+        assert list(col_tokens.start) == list(tokens.start)
+        assert list(col_tokens[2:].end) == list(tokens.end[2:])
+        
+        
+    def test_serialization(self):
+        tokens = TokenSequence.from_tokenized_text("This is a -3.14 demo .".split(), case_mode='Lower', number_mode='Marks', columnar=True)
+        
+        with open("cache/col-tokens-demo.pkl", 'wb') as f:
+            pickle.dump(tokens, f)
+        with open("cache/col-tokens-demo.pkl", 'rb') as f:
+            tokens_loaded = pickle.load(f)
+        
+        assert tokens_loaded == tokens
+        assert tokens_loaded.text == tokens.text
+        assert tokens_loaded.token_sep == tokens.token_sep
+
+
+    def test_numpy_integer_index(self):
+        tokens = TokenSequence.from_tokenized_text("This is a -3.14 demo .".split(), case_mode='Lower', number_mode='Marks', columnar=True)
+        for i in [numpy.int64(3), numpy.int32(3), numpy.uint8(3)]:
+            assert tokens[i].__dict__ == tokens[3].__dict__
+
+
+
 class TestLexiconTokenizer(object):
     @pytest.mark.parametrize("lexicon, text", 
                              [(["李明", "中山", "中山西路", "山西", "山西路", "西路"], "李明住在中山西路。"), 
@@ -259,3 +395,45 @@ class TestLexiconTokenizer(object):
             assert text[start:end] == w
         
         assert set(lexicon) == set([w for w, *_ in tokenized])
+        
+        
+    @pytest.mark.parametrize("max_len", [1, 2, 10])
+    @pytest.mark.parametrize("return_singleton", [True, False])
+    def test_tokenize_against_enumeration(self, max_len, return_singleton):
+        lexicon = ["李明", "中山", "中山西路", "山西", "山西路", "西路", "北京", "天安门", "北京天安门", "住"]
+        texts = ["李明住在中山西路。", "我爱北京天安门！", ""]
+        tokenizer = LexiconTokenizer(lexicon, max_len=max_len, return_singleton=return_singleton)
+        
+        expected = []
+        for text in texts:
+            expected.append([(text[start:end], start, end) for start in range(len(text)) for end in range(start+1, min(start+max_len, len(text))+1) 
+                                 if (return_singleton and end-start == 1) or text[start:end] in lexicon])
+        assert [list(tokenizer.tokenize(text)) for text in texts] == expected
+        assert tokenizer.batch_tokenize(texts) == expected
+
+        
+    @pytest.mark.parametrize("return_singleton", [True, False])
+    def test_tokenize_overlapping_words(self, return_singleton):
+        # Words over a small alphabet overlap heavily, which exercises the failure links of the automaton
+        rng = random.Random(0)
+        lexicon = {"".join(rng.choice("ab") for _ in range(rng.randint(1, 5))) for _ in range(20)}
+        texts = ["".join(rng.choice("abc") for _ in range(rng.randint(0, 30))) for _ in range(20)]
+        tokenizer = LexiconTokenizer(lexicon, max_len=4, return_singleton=return_singleton)
+        
+        expected = []
+        for text in texts:
+            expected.append([(text[start:end], start, end) for start in range(len(text)) for end in range(start+1, min(start+4, len(text))+1) 
+                                 if (return_singleton and end-start == 1) or text[start:end] in lexicon])
+        assert tokenizer.batch_tokenize(texts) == expected
+        
+        
+    def test_build_softwords_in_batch(self):
+        tokenizer = LexiconTokenizer(["李明", "中山", "中山西路", "山西", "山西路", "西路", "北京", "天安门", "北京天安门"])
+        batch_tokens = [TokenSequence.from_tokenized_text(list(text), token_sep="") for text in ["李明住在中山西路。", "我爱北京天安门！"]]
+        tokenizer.batch_build_softwords(batch_tokens)
+        for tokens in batch_tokens:
+            expected = TokenSequence.from_tokenized_text(tokens.raw_text, token_sep="")
+            expected.build_softwords(tokenizer.tokenize)
+            expected.build_softlexicons(tokenizer.tokenize)
+            assert all((sw == expected_sw).all() for sw, expected_sw in zip(tokens.softword, expected.softword))
+            assert tokens.softlexicon == expected.softlexicon
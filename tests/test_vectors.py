@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import os
+import pytest
+import numpy
+import torch
+
+from eznlp.vectors import Vectors, _load_from_file
+from eznlp.nn.init import reinit_embedding_by_pretrained_
+
+
+def _write_vectors(path: str, words, vectors, header: bool=False, binary: bool=False):
+    with open(path, 'wb') as f:
+        if header or binary:
+            f.write(f"{len(words)} {vectors.shape[1]}\n".encode('utf-8'))
+        for w, vec in zip(words, vectors):
+            if binary:
+                f.write(w.encode('utf-8') + b" " + vec.astype(numpy.float32).tobytes() + b"\n")
+            else:
+                f.write((w + " " + " ".join(f"{v:.6f}" for v in vec) + "\n").encode('utf-8'))
+
+
+@pytest.fixture
+def words_and_vectors():
+    words = [f"w{i}" for i in range(500)] + ["中国", "<unk>"]
+    vectors = numpy.random.default_rng(0).standard_normal((len(words), 20)).astype(numpy.float32)
+    return words, vectors
+
+
+@pytest.mark.parametrize("header", [False, True])
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_load_text(header, num_workers, words_and_vectors):
+    words, vectors = words_and_vectors
+    _write_vectors("cache/vectors-text.txt", words, vectors, header=header)
+    itos, loaded = _load_from_file("cache/vectors-text.txt", num_workers=num_workers, chunk_size=1000)
+    assert itos == words
+    assert loaded.dtype == torch.float32
+    assert numpy.allclose(loaded.numpy(), vectors, atol=1e-6)
+
+
+def test_load_binary(words_and_vectors):
+    words, vectors = words_and_vectors
+    _write_vectors("cache/vectors-binary.bin", words, vectors, binary=True)
+    itos, loaded = _load_from_file("cache/vectors-binary.bin")
+    assert itos == words
+    assert (loaded.numpy() == vectors).all()
+
+
+def test_load_with_bad_lines(words_and_vectors):
+    words, vectors = words_and_vectors
+    _write_vectors("cache/vectors-bad.txt", words, vectors)
+    with open("cache/vectors-bad.txt", 'ab') as f:
+        f.write(b"bad 1.0 2.0\n")
+        f.write(b"bad two words " + b" ".join(b"0.5" for _ in range(20)) + b"\n")
+        f.write(b"last " + b" ".join(b"0.5" for _ in range(20)) + b"\n")
+    
+    itos, loaded = _load_from_file("cache/vectors-bad.txt", skiprows=[0], chunk_size=1000)
+    assert itos == words[1:] + ["last"]
+    assert numpy.allclose(loaded[:-1].numpy(), vectors[1:], atol=1e-6)
+    assert (loaded[-1] == 0.5).all().item()
+    
+    vectors = Vectors(itos, loaded)
+    assert vectors.lookup("W1") is not None
+
+
+def test_memmap_cache_and_vocab_filtering(words_and_vectors):
+    words, vectors = words_and_vectors
+    words = words + ["W1", "w1"]
+    vectors = numpy.concatenate([vectors, vectors[:2] + 1], axis=0)
+    _write_vectors("cache/vectors-cache.txt", words, vectors)
+    for suffix in [".vectors.npy", ".itos.txt", ".index.npz", ".pt"]:
+        if os.path.exists(f"cache/vectors-cache.txt{suffix}"):
+            os.remove(f"cache/vectors-cache.txt{suffix}")
+    
+    full = Vectors.load("cache/vectors-cache.txt")
+    assert Vectors.cache_exists("cache/vectors-cache.txt")
+    reloaded = Vectors.load("cache/vectors-cache.txt")
+    assert reloaded.itos == full.itos
+    assert (reloaded.vectors == full.vectors).all().item()
+    
+    vocab = ["<pad>", "w5", "w1", "中国", "oov"]
+    filtered = Vectors.load("cache/vectors-cache.txt", vocab=vocab)
+    assert set(filtered.itos) == {"w5", "W1", "w1", "中国"}
+    for token in vocab:
+        if full.lookup(token) is None:
+            assert filtered.lookup(token) is None
+        else:
+            assert (filtered.lookup(token) == full.lookup(token)).all().item()
+    # The duplicate token takes the last occurrence
+    assert (filtered["w1"] == full["w1"]).all().item()
+    assert numpy.allclose(filtered["w1"].numpy(), vectors[-1], atol=1e-6)
+
+
+def test_normalized_lookup_and_reinit():
+    itos = ["apple", "Apple", "APPLE", "Banana", "BANANA", "2019", "ｃａｔ", "dOG"]
+    vectors = Vectors(itos, torch.arange(len(itos), dtype=torch.float).unsqueeze(1).expand(-1, 4).contiguous())
+    
+    tokens = ["APPLE", "aPPle", "banana", "1984", "cat", "Dog", "pear"]
+    assert vectors.lookup_indices(tokens).tolist() == [2, 0, 3, 5, 6, 7, -1]
+    assert vectors.lookup("pear") is None
+    assert (vectors.lookup("banana") == 3).all().item()
+    
+    embedding = torch.nn.Embedding(len(tokens)+1, 4, padding_idx=len(tokens))
+    oov = reinit_embedding_by_pretrained_(embedding, tokens + ["<pad>"], vectors, oov_init='zeros')
+    assert oov == ["pear", "<pad>"]
+    assert embedding.weight.data[:, 0].tolist() == [2, 0, 3, 5, 6, 7, 0, 0]
+
+
+def test_case_variants_before_normalized_key():
+    # `a2` and `a1` share the normalized key `a0`, but `A1` should resolve to `a1` by its lower-case variant
+    itos = ["a2", "a1", "B3"]
+    vectors = Vectors(itos, torch.arange(len(itos), dtype=torch.float).unsqueeze(1))
+    assert vectors.lookup_indices(["A1", "a1", "b3", "A5", "b7"]).tolist() == [1, 1, 2, 0, 2]
+    assert vectors.lookup("A1").item() == 1
+
+
+@pytest.fixture
+def clustered_vectors():
+    generator = torch.Generator().manual_seed(0)
+    centers = torch.randn(20, 16, generator=generator)
+    vectors = centers.repeat_interleave(100, dim=0) + 0.3 * torch.randn(2000, 16, generator=generator)
+    return Vectors([f"w{i}" for i in range(2000)], vectors)
+
+
+def test_knn(clustered_vectors):
+    queries = torch.randn(7, 16)
+    scores, indices = clustered_vectors.knn(queries, k=5, chunk_size=300)
+    normalized = torch.nn.functional.normalize(clustered_vectors.vectors, dim=1)
+    ref_scores, ref_indices = (torch.nn.functional.normalize(queries, dim=1) @ normalized.T).topk(5, dim=1)
+    assert torch.allclose(scores, ref_scores, atol=1e-5)
+    assert (indices == ref_indices).all().item()
+    
+    results = clustered_vectors.most_similar(["w0", "oov", "w150"], k=3)
+    assert len(results[0]) == 3 and all(token != "w0" for token, score in results[0])
+    assert results[1] == []
+    assert all(100 <= int(token[1:]) < 200 for token, score in results[2])
+    assert [token for token, score in clustered_vectors.most_similar("w0", k=3)] == [token for token, score in results[0]]
+
+
+def test_ivf_index(clustered_vectors):
+    queries = clustered_vectors.vectors[::50] + 0.1 * torch.randn(40, 16)
+    ref_scores, ref_indices = clustered_vectors.knn(queries, k=10)
+    
+    index = clustered_vectors.build_ivf_index(num_lists=20, num_probes=20)
+    scores, indices = clustered_vectors.knn(queries, k=10)
+    assert torch.allclose(scores, ref_scores, atol=1e-5)
+    
+    scores, indices = index.search(torch.nn.functional.normalize(queries, dim=1), k=10, num_probes=3)
+    recall = sum(len(set(row) & set(ref_row)) for row, ref_row in zip(indices.tolist(), ref_indices.tolist())) / ref_indices.numel()
+    assert recall > 0.9
+    assert (index.offsets[1:] - index.offsets[:-1]).sum().item() == 2000
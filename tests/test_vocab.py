@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import pickle
+import pytest
+import torch
+from collections import Counter
+
+from eznlp.vocab import Vocab, FrozenVocab
+from eznlp.dataset import Dataset
+from eznlp.config import ConfigDict
+from eznlp.model import OneHotConfig, ExtractorConfig
+
+
+@pytest.mark.parametrize("hashed", [False, True])
+def test_frozen_vocab(hashed):
+    vocab = Vocab(Counter("a b b c 中国 中国 x".split()))
+    frozen = vocab.freeze(hashed=hashed)
+    assert len(frozen) == len(vocab)
+    assert frozen.unk_idx == vocab.unk_idx == 0
+    
+    tokens = ['a', '中国', 'zz', '<pad>', '中']
+    assert frozen.lookup_indices(tokens) == vocab.lookup_indices(tokens) == [vocab[tok] for tok in tokens]
+    assert (frozen.lookup_array(tokens) == vocab.lookup_array(tokens)).all()
+    assert [ids.tolist() for ids in frozen.lookup_batch([tokens, [], ['x']])] == [vocab.lookup_indices(tokens), [], [vocab['x']]]
+    if hashed:
+        with pytest.raises(TypeError):
+            frozen.itos
+    else:
+        assert frozen.itos == vocab.itos
+        assert frozen.lookup_tokens([3, 0, 2]) == vocab.lookup_tokens([3, 0, 2])
+    
+    unpickled = pickle.loads(pickle.dumps(frozen))
+    assert unpickled.lookup_indices(tokens) == vocab.lookup_indices(tokens)
+    frozen.save("cache/frozen-vocab.npz")
+    assert FrozenVocab.load("cache/frozen-vocab.npz").lookup_indices(tokens) == vocab.lookup_indices(tokens)
+
+
+def test_frozen_vocab_without_unk():
+    frozen = FrozenVocab(['a', 'b'])
+    assert frozen.unk_idx is None
+    assert frozen.lookup_indices(['b', 'a']) == [1, 0]
+    with pytest.raises(KeyError):
+        frozen.lookup_indices(['c'])
+
+
+@pytest.mark.parametrize("vocab_backend", ['frozen', 'hashed'])
+def test_onehot_vocab_backend(vocab_backend, ResumeNER_demo):
+    ids_list = []
+    for backend in ['dict', vocab_backend]:
+        config = ExtractorConfig('sequence_tagging', ohots=ConfigDict({f: OneHotConfig(field=f, emb_dim=20, vocab_backend=backend) for f in ['text', 'bigram']}))
+        dataset = Dataset(ResumeNER_demo, config)
+        dataset.build_vocabs_and_dims()
+        batch = dataset.collate([dataset[i] for i in range(4)])
+        ids_list.append(batch.ohots)
+    
+    assert isinstance(config.ohots['bigram'].vocab, FrozenVocab)
+    for f in ['text', 'bigram']:
+        assert (ids_list[0][f] == ids_list[1][f]).all().item()
+    
+    model = config.instantiate()
+    losses = model(batch)
+    assert losses.dim() == 1
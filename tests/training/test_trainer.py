@@ -58,3 +58,16 @@ def test_gradient_accumulation(conll2003_demo, device):
     assert trainer1.num_steps / trainer1.num_grad_acc_steps == trainer2.num_steps / trainer2.num_grad_acc_steps
     assert all((p1 - p2).abs().max().item() < 1e-4 for p1, p2 in zip(model1.parameters(), model2.parameters()))
     assert all((p1 - pb).abs().max().item() > 1e-4 for p1, pb in zip(model1.parameters(), params_backup))
+
+
+
+def test_predict_sort_by_length(conll2003_demo, device):
+    config = ExtractorConfig('sequence_tagging')
+    dataset = Dataset(conll2003_demo, config, training=False)
+    dataset.build_vocabs_and_dims()
+    model = config.instantiate().to(device)
+    
+    trainer = Trainer(model, device=device)
+    set_chunks_pred = trainer.predict(dataset, batch_size=4)
+    set_chunks_pred_sorted = trainer.predict(dataset, batch_size=4, sort_by_length=True)
+    assert set_chunks_pred_sorted == set_chunks_pred